@@ -0,0 +1,44 @@
+"""Sequential paging (iter_alarms) vs parallel page fan-out (fetch_all_alarms).
+
+Run with: uv run python benchmarks/bench_bulk_export.py
+"""
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import StandInServer  # noqa: E402
+
+from opengate_alarms.client import OpenGateAlarmClient  # noqa: E402
+from opengate_alarms.models import Pagination, SearchRequest  # noqa: E402
+
+TOTAL = 10_000
+PAGE_SIZE = 500
+LATENCY = 0.1
+
+
+async def main() -> None:
+    logging.getLogger("opengate_alarms").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    request = SearchRequest(limit=Pagination(size=PAGE_SIZE, start=1))
+    pages = TOTAL // PAGE_SIZE
+    with StandInServer(total=TOTAL, latency=LATENCY) as server:
+        async with OpenGateAlarmClient(api_key="bench", base_url=server.base_url) as client:
+            client.base_url = server.base_url
+
+            start = time.perf_counter()
+            count = len([a async for a in client.iter_alarms(request, prefetch=0)])
+            print(f"sequential:       {count} alarms in {time.perf_counter() - start:.2f}s")
+
+            for concurrency in (4, 10):
+                start = time.perf_counter()
+                alarms = await client.fetch_all_alarms(request, concurrency=concurrency)
+                elapsed = time.perf_counter() - start
+                ideal = LATENCY * pages / concurrency
+                print(f"concurrency={concurrency:<3}  {len(alarms)} alarms in {elapsed:.2f}s (latency x pages/concurrency = {ideal:.2f}s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
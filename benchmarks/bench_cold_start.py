@@ -0,0 +1,58 @@
+"""Cold-start time to the first alarm rows in the TUI, with and without a snapshot.
+
+Starts the app headless against the stand-in server (which answers every
+request after ``LATENCY`` seconds) twice with a fresh snapshot database:
+the first start has nothing stored and waits for the API, the second one
+renders the snapshot left by the first before the API answers.
+
+Run with: uv run python benchmarks/bench_cold_start.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import StandInServer  # noqa: E402
+
+TOTAL = 2000
+LATENCY = 0.5
+
+
+async def first_rows(app_class) -> float:
+    """Seconds from creating the app until the alarms table has rows."""
+    started = time.perf_counter()
+    app = app_class()
+    async with app.run_test() as pilot:
+        table = app.query_one("#alarms-table")
+        while table.row_count == 0:
+            await pilot.pause(0.005)
+        elapsed = time.perf_counter() - started
+        # Let the initial load finish so the snapshot is written (a finished
+        # worker is no longer listed). It starts the auto-refresh and prefetch
+        # workers, which never finish on their own, so those are cancelled.
+        load = next((worker for worker in app.workers if worker.group == "initial-load"), None)
+        if load is not None:
+            await load.wait()
+        app.workers.cancel_all()
+    return elapsed
+
+
+async def main() -> None:
+    with StandInServer(total=TOTAL, latency=LATENCY) as server, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OPENGATE_API_KEY"] = "bench"
+        os.environ["OPENGATE_BASE_URL"] = server.base_url
+        os.environ["OPENGATE_SNAPSHOT_PATH"] = str(Path(tmp) / "snapshots.db")
+        from opengate_alarms.tui.app import OpenGateApp
+
+        cold = await first_rows(OpenGateApp)
+        warm = await first_rows(OpenGateApp)
+        print(f"server latency {LATENCY * 1000:.0f} ms per request")
+        print(f"  no snapshot    first rows after {cold * 1000:>7.1f} ms")
+        print(f"  with snapshot  first rows after {warm * 1000:>7.1f} ms  ({cold / warm:.1f}x sooner)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""Compare a fresh httpx.AsyncClient per call against the shared pool.
+
+Run with: uv run python benchmarks/bench_connection_pool.py
+"""
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import StandInServer  # noqa: E402
+
+from opengate_alarms.client import OpenGateAlarmClient  # noqa: E402
+from opengate_alarms.models import Pagination, SearchRequest  # noqa: E402
+
+ITERATIONS = 200
+# Emulated TCP+TLS handshake to the remote endpoint
+CONNECT_DELAY = 0.02
+
+
+async def fresh_client_per_call(client: OpenGateAlarmClient, request: SearchRequest) -> float:
+    # Mirrors the previous behaviour: one AsyncClient (and one handshake) per query
+    url = f"{client.base_url}/search/entities/alarms"
+    payload = request.model_dump(by_alias=True, exclude_none=True)
+    start = time.perf_counter()
+    async with httpx.AsyncClient(headers=client.headers) as http:
+        response = await http.post(url, json=payload)
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def pooled_call(client: OpenGateAlarmClient, request: SearchRequest) -> float:
+    start = time.perf_counter()
+    await client.query_alarms(request)
+    return time.perf_counter() - start
+
+
+def report(label: str, samples: list) -> None:
+    samples = sorted(samples)
+    p50 = statistics.median(samples) * 1000
+    p95 = samples[int(len(samples) * 0.95) - 1] * 1000
+    print(f"{label:<24} p50={p50:7.2f} ms  p95={p95:7.2f} ms")
+
+
+async def main() -> None:
+    with StandInServer(total=500, connect_delay=CONNECT_DELAY) as server:
+        request = SearchRequest(limit=Pagination(size=20, start=1))
+        async with OpenGateAlarmClient(api_key="bench", base_url=server.base_url) as client:
+            client.base_url = server.base_url
+
+            before = server.connections
+            fresh = [await fresh_client_per_call(client, request) for _ in range(ITERATIONS)]
+            fresh_conns = server.connections - before
+
+            before = server.connections
+            pooled = [await pooled_call(client, request) for _ in range(ITERATIONS)]
+            pooled_conns = server.connections - before
+
+        print(f"{ITERATIONS} sequential queries, emulated handshake {CONNECT_DELAY * 1000:.0f} ms")
+        report(f"fresh client ({fresh_conns} conns)", fresh)
+        report(f"shared pool ({pooled_conns} conns)", pooled)
+        print(f"speedup (p50): {statistics.median(fresh) / statistics.median(pooled):.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""Throughput and peak memory of opengate-export for each output format.
+
+Exports the stand-in server's alarms with ``export_filter`` and reports rows/s
+and the peak traced memory. Peak memory should stay flat as ``TOTAL`` grows:
+only the pages in flight and the writer's buffer are held.
+
+Run with: uv run python benchmarks/bench_export.py [total]
+"""
+import asyncio
+import logging
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import StandInServer  # noqa: E402
+
+from opengate_alarms.catalog import FilterCatalog  # noqa: E402
+from opengate_alarms.client import OpenGateAlarmClient  # noqa: E402
+from opengate_alarms.export import ALARM_COLUMNS, ALARM_TYPES, ParquetWriter, export_filter  # noqa: E402
+
+TOTAL = 200_000
+PAGE_SIZE = 1000
+FILTERS = Path(__file__).parent.parent / "filters"
+
+
+async def run(base_url: str, fmt: str, directory: Path) -> None:
+    catalog = FilterCatalog(FILTERS)
+    catalog.refresh()
+    async with OpenGateAlarmClient(api_key="bench", base_url=base_url) as client:
+        client.base_url = base_url
+        tracemalloc.start()
+        stats = await export_filter(
+            catalog.get("alarms", "all_alarms.json"), directory / f"alarms.{fmt}", client=client, page_size=PAGE_SIZE
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"{fmt:<8} {stats.rows} rows in {stats.elapsed:.2f}s ({stats.rows_per_second:,.0f} rows/s), peak {peak / 1e6:.1f} MB")
+
+
+def warm_up(directory: Path) -> None:
+    """Write one Parquet row, so the modules pyarrow loads lazily are not counted as export memory."""
+    writer = ParquetWriter(directory / "warm-up", ALARM_COLUMNS, ALARM_TYPES)
+    writer.write([["id", "entity", "name", "severity", "status", datetime.now(timezone.utc), None, None]])
+    writer.close()
+
+
+async def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else TOTAL
+    logging.getLogger("opengate_alarms").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with StandInServer(total=total, latency=0.0) as server, tempfile.TemporaryDirectory() as tmp:
+        warm_up(Path(tmp))
+        for fmt in ("ndjson", "csv", "parquet"):
+            await run(server.base_url, fmt, Path(tmp))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
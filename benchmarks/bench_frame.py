@@ -0,0 +1,66 @@
+"""Aggregation speed and memory: list of ``Alarm`` models vs ``AlarmFrame``.
+
+Counts by severity, by severity x status, by entity and per hour over 200k
+synthetic alarms, and the memory each representation holds.
+
+Run with: uv run python benchmarks/bench_frame.py
+"""
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import make_alarm  # noqa: E402
+
+from opengate_alarms.frame import AlarmFrame  # noqa: E402
+from opengate_alarms.models import Alarm  # noqa: E402
+
+COUNT = 200_000
+ROUNDS = 3
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def bench(label: str, fn) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<34} {best * 1000:>9.1f} ms")
+    return best
+
+
+def main() -> None:
+    alarms, list_bytes = measure_memory(lambda: [Alarm(**make_alarm(i)) for i in range(COUNT)])
+    frame, frame_bytes = measure_memory(lambda: AlarmFrame.from_alarms(Alarm(**make_alarm(i)) for i in range(COUNT)))
+    print(f"{COUNT} alarms")
+    print(f"  list[Alarm] holds {list_bytes / 1e6:.1f} MB, AlarmFrame holds {frame_bytes / 1e6:.1f} MB")
+
+    hour = timedelta(hours=1)
+    print("list[Alarm]:")
+    before = bench("count by severity", lambda: Counter(a.severity for a in alarms))
+    before += bench("count by severity x status", lambda: Counter((a.severity, a.status) for a in alarms))
+    before += bench("count by entity", lambda: Counter(a.entity_id for a in alarms))
+    before += bench("per-hour histogram", lambda: Counter(a.creation_date.replace(minute=0, second=0, microsecond=0) for a in alarms))
+    before += bench("filter CRITICAL + OPEN", lambda: [a for a in alarms if a.severity == "CRITICAL" and a.status == "OPEN"])
+    print("AlarmFrame:")
+    after = bench("count by severity", lambda: frame.counts("severity"))
+    after += bench("count by severity x status", lambda: frame.group_by("severity", "status"))
+    after += bench("count by entity", lambda: frame.counts("entity_id"))
+    after += bench("per-hour histogram", lambda: frame.histogram(hour))
+    after += bench("filter CRITICAL + OPEN", lambda: frame.filter(frame.mask_eq("severity", "CRITICAL") & frame.mask_eq("status", "OPEN")))
+    print(f"total speed-up: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
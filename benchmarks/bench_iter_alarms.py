@@ -0,0 +1,47 @@
+"""Throughput and peak memory of iter_alarms for several prefetch depths.
+
+Run with: uv run python benchmarks/bench_iter_alarms.py
+"""
+import asyncio
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import StandInServer  # noqa: E402
+
+from opengate_alarms.client import OpenGateAlarmClient  # noqa: E402
+from opengate_alarms.models import Pagination, SearchRequest  # noqa: E402
+
+TOTAL = 20_000
+PAGE_SIZE = 500
+LATENCY = 0.02
+
+
+async def run(base_url: str, prefetch: int) -> None:
+    async with OpenGateAlarmClient(api_key="bench", base_url=base_url) as client:
+        client.base_url = base_url
+        request = SearchRequest(limit=Pagination(size=PAGE_SIZE, start=1))
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = 0
+        async for _ in client.iter_alarms(request, prefetch=prefetch):
+            count += 1
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"prefetch={prefetch}: {count} alarms in {elapsed:.2f}s ({count / elapsed:,.0f}/s), peak {peak / 1e6:.1f} MB")
+
+
+async def main() -> None:
+    logging.getLogger("opengate_alarms").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with StandInServer(total=TOTAL, latency=LATENCY) as server:
+        for prefetch in (0, 1, 4):
+            await run(server.base_url, prefetch)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
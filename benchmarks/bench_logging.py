@@ -0,0 +1,128 @@
+"""Event-loop stalls during a refresh storm, with synchronous vs queued logging.
+
+Fires ``REFRESHES`` alarm searches, ``CONCURRENCY`` at a time, against the
+stand-in server while a probe task sleeps 1 ms in a loop and records how late
+it wakes up. "sync" is the previous import-time setup (``basicConfig`` with a
+``FileHandler`` and a console handler, both written on the event loop
+thread); "queued" is ``configure_logging()``, which formats and writes on a
+listener thread and rate limits the per-request lines. The console is a
+stream that takes ``WRITE_DELAY`` per write, like a busy terminal or a
+network filesystem. Each mode runs ``ROUNDS`` times, alternating.
+
+Run with: uv run python benchmarks/bench_logging.py
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import StandInServer  # noqa: E402
+
+from opengate_alarms.client import OpenGateAlarmClient  # noqa: E402
+from opengate_alarms.logconfig import configure_logging, stop_logging  # noqa: E402
+from opengate_alarms.models import Pagination, SearchRequest  # noqa: E402
+
+TOTAL = 5000
+REFRESHES = 1000
+CONCURRENCY = 20
+PROBE = 0.001
+WRITE_DELAY = 0.0005
+ROUNDS = 3
+
+
+class SlowStream:
+    """Discards what is written, taking ``delay`` seconds per write."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+async def probe(lags, stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(PROBE)
+        lags.append(loop.time() - started - PROBE)
+
+
+async def storm(base_url: str) -> list:
+    lags: list = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    async with OpenGateAlarmClient(api_key="bench", base_url=base_url) as client:
+        async def refresh(i: int) -> None:
+            async with semaphore:
+                request = SearchRequest(filter={"eq": {"alarm.status": "OPEN"}}, limit=Pagination(size=5, start=i % 20 + 1))
+                await client.query_alarms(request)
+
+        await asyncio.gather(*(refresh(i) for i in range(REFRESHES)))
+    stop.set()
+    await probe_task
+    return lags
+
+
+def report(name: str, runs: list) -> None:
+    lags = sorted(lag for lags, _ in runs for lag in lags)
+    elapsed = statistics.median(elapsed for _, elapsed in runs)
+    stalled = statistics.median(sum(lags) for lags, _ in runs)
+    print(
+        f"  {name:<7} {elapsed * 1000:>7.0f} ms per storm  stall p50 {statistics.median(lags) * 1000:>5.2f} ms"
+        f"  p99 {lags[int(len(lags) * 0.99)] * 1000:>5.2f} ms  max {lags[-1] * 1000:>6.2f} ms  summed {stalled * 1000:>7.1f} ms"
+    )
+
+
+async def run_sync(base_url: str, log_path: Path):
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    handlers = [logging.FileHandler(log_path), logging.StreamHandler()]
+    for handler in handlers:
+        root.addHandler(handler)
+    try:
+        started = time.perf_counter()
+        return await storm(base_url), time.perf_counter() - started
+    finally:
+        for handler in handlers:
+            root.removeHandler(handler)
+            handler.close()
+
+
+async def run_queued(base_url: str, log_path: Path):
+    configure_logging(path=str(log_path))
+    try:
+        started = time.perf_counter()
+        return await storm(base_url), time.perf_counter() - started
+    finally:
+        stop_logging()
+
+
+async def main() -> None:
+    results = {"sync": [], "queued": []}
+    with StandInServer(total=TOTAL, latency=0.002) as server, tempfile.TemporaryDirectory() as tmp, \
+            contextlib.redirect_stderr(SlowStream(WRITE_DELAY)):
+        os.environ["OPENGATE_BASE_URL"] = server.base_url
+        base_url = OpenGateAlarmClient().base_url
+        for _ in range(ROUNDS):
+            results["sync"].append(await run_sync(base_url, Path(tmp) / "sync.log"))
+            results["queued"].append(await run_queued(base_url, Path(tmp) / "queued.log"))
+
+    print(f"{REFRESHES} refreshes, {CONCURRENCY} concurrent, probe every {PROBE * 1000:.0f} ms, median of {ROUNDS} rounds")
+    for name, runs in results.items():
+        report(name, runs)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
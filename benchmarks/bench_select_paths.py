@@ -0,0 +1,102 @@
+"""Column extraction speed for the Entities table on a synthetic device_status dataset.
+
+Compares the per-cell ``get_nested_value`` walk the TUI used before with
+``ColumnPlan`` rows (select parsed once, column paths precomputed), over the
+10 columns of ``filters/entities/device_status.json`` and 100k device entities.
+
+Run with: uv run python benchmarks/bench_select_paths.py
+"""
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import make_device  # noqa: E402
+
+from opengate_alarms.select_paths import ColumnPlan, parse_complex_select  # noqa: E402
+
+COUNT = 100_000
+ROUNDS = 3
+FILTER = Path(__file__).parent.parent / "filters" / "entities" / "device_status.json"
+
+
+def legacy_get_nested_value(data: Any, path: List[str]) -> Any:
+    # Previous path: OpenGateApp.get_nested_value, walked again for every cell
+    current = data
+    for i, part in enumerate(path):
+        if current is None:
+            return None
+        if isinstance(current, dict):
+            if part in current:
+                current = current[part]
+            elif i == 0 and part == "provision":
+                continue
+            elif "current" in current and isinstance(current["current"], dict) and part in current["current"]:
+                current = current["current"][part]
+            elif "_current" in current and isinstance(current["_current"], dict) and part in current["_current"]:
+                current = current["_current"][part]
+            else:
+                return None
+        elif isinstance(current, list) and current:
+            current = current[0]
+            if isinstance(current, dict):
+                if part in current:
+                    current = current[part]
+                elif "current" in current and isinstance(current["current"], dict) and part in current["current"]:
+                    current = current["current"][part]
+                elif "_current" in current and isinstance(current["_current"], dict) and part in current["_current"]:
+                    current = current["_current"][part]
+                else:
+                    return None
+        else:
+            return None
+    return current
+
+
+def bench(label: str, fn, entities) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        # Keep collector passes over the 100k entity dicts out of the timing
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        rows = fn(entities)
+        best = min(best, time.perf_counter() - start)
+        gc.enable()
+    assert len(rows) == COUNT
+    print(f"{label:<28} {best * 1000:>8.0f} ms  {COUNT / best:>12,.0f} rows/s")
+    return best
+
+
+def main() -> None:
+    columns = parse_complex_select(json.loads(FILTER.read_text())["select"])
+    entities = [make_device(i) for i in range(COUNT)]
+
+    def legacy(items):
+        rows = []
+        for entity in items:
+            row = []
+            for _, path in columns:
+                val = legacy_get_nested_value(entity, path)
+                row.append(str(val) if val is not None else "N/A")
+            rows.append(row)
+        return rows
+
+    plan = ColumnPlan(columns)
+
+    def planned(items):
+        row = plan.row
+        return [row(entity) for entity in items]
+
+    assert legacy(entities[:1000]) == planned(entities[:1000])
+    print(f"{COUNT} entities x {len(columns)} columns, best of {ROUNDS}")
+    before = bench("get_nested_value per cell", legacy, entities)
+    after = bench("ColumnPlan", planned, entities)
+    print(f"speed-up: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Startup cost of the opengate-tui entry point, checked against a budget.
+
+Imports ``opengate_alarms.tui.app`` in fresh interpreters with
+``-X importtime`` and reports the median cumulative import time, the
+packages that contribute most, and whether any of the modules that should
+load lazily (NumPy, pandas, opengate-data, dotenv) were imported. Then the
+app is started headless against the stand-in server, which answers after
+``LATENCY`` seconds, to check that the first frame does not wait for it.
+
+Exits with status 1 when the import time is over ``BUDGET_MS`` (or the
+budget passed as the first argument), so it can run in CI.
+
+Run with: uv run python benchmarks/bench_startup.py [budget_ms]
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import StandInServer  # noqa: E402
+
+ENTRY_MODULE = "opengate_alarms.tui.app"
+BUDGET_MS = 700.0
+ROUNDS = 5
+LATENCY = 0.5
+# Only needed once a frame is built, a sync entity search runs or settings are loaded
+LAZY_MODULES = ("numpy", "pandas", "opengate_data", "dotenv")
+
+
+def import_once() -> Tuple[float, Dict[str, float], List[str]]:
+    """Cumulative import time of the entry module (ms), self time per top-level package, lazy modules loaded."""
+    check = f"import sys, {ENTRY_MODULE}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        packages[name.split(".")[0]] += int(self_us) / 1000
+        if name == ENTRY_MODULE:
+            total = int(cumulative_us) / 1000
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total, packages, loaded
+
+
+async def first_frame() -> Tuple[float, int]:
+    """Seconds until the headless app is mounted, and the API requests served by then."""
+    with StandInServer(total=200, latency=LATENCY) as server, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OPENGATE_API_KEY"] = "bench"
+        os.environ["OPENGATE_BASE_URL"] = server.base_url
+        os.environ["OPENGATE_SNAPSHOT_PATH"] = str(Path(tmp) / "snapshots.db")
+        from opengate_alarms.tui.app import OpenGateApp
+
+        started = time.perf_counter()
+        app = OpenGateApp()
+        async with app.run_test():
+            elapsed = time.perf_counter() - started
+            answered = server.requests
+            app.workers.cancel_all()
+    return elapsed, answered
+
+
+def main() -> int:
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    runs = [import_once() for _ in range(ROUNDS)]
+    total = statistics.median(run[0] for run in runs)
+    packages: Dict[str, float] = defaultdict(float)
+    for _, per_package, _ in runs:
+        for name, ms in per_package.items():
+            packages[name] += ms / ROUNDS
+    loaded = sorted({name for _, _, names in runs for name in names})
+
+    print(f"import {ENTRY_MODULE}: {total:.0f} ms (median of {ROUNDS}), budget {budget:.0f} ms")
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:8]:
+        print(f"  {name:<20} {ms:>7.1f} ms")
+    print(f"lazy modules imported at startup: {', '.join(loaded) if loaded else 'none'}")
+
+    elapsed, answered = asyncio.run(first_frame())
+    print(f"first frame after {elapsed * 1000:.0f} ms, {answered} API requests served by then (latency {LATENCY * 1000:.0f} ms)")
+
+    if total > budget or loaded:
+        print("OVER BUDGET" if total > budget else "lazy modules imported eagerly")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Time to first alarm and peak memory: buffered query_alarms vs stream_alarms.
+
+Run with: uv run python benchmarks/bench_streaming.py
+"""
+import asyncio
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from standin_server import StandInServer  # noqa: E402
+
+from opengate_alarms.client import OpenGateAlarmClient  # noqa: E402
+from opengate_alarms.models import Pagination, SearchRequest  # noqa: E402
+
+PAGE_SIZE = 20_000
+# Emulated bandwidth: one 64 KiB chunk every 5 ms (~13 MB/s)
+CHUNK_DELAY = 0.005
+
+
+async def buffered(client: OpenGateAlarmClient, request: SearchRequest):
+    start = time.perf_counter()
+    alarms = await client.query_alarms(request)
+    first = time.perf_counter() - start
+    count = len(alarms)
+    return first, count
+
+
+async def streamed(client: OpenGateAlarmClient, request: SearchRequest):
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async for _ in client.stream_alarms(request):
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    return first, count
+
+
+async def main() -> None:
+    logging.getLogger("opengate_alarms").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    request = SearchRequest(limit=Pagination(size=PAGE_SIZE, start=1))
+    with StandInServer(total=PAGE_SIZE, chunk_delay=CHUNK_DELAY, memoize=True) as server:
+        async with OpenGateAlarmClient(api_key="bench", base_url=server.base_url) as client:
+            client.base_url = server.base_url
+            # Warm-up so the server has the encoded page cached
+            await client.query_alarms(request)
+            for label, fn in (("buffered query_alarms", buffered), ("stream_alarms", streamed)):
+                tracemalloc.start()
+                first, count = await fn(client, request)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{label:<22} first alarm after {first * 1000:7.1f} ms, {count} alarms, peak {peak / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+"""Local stand-in for the OpenGate north API, used by the benchmarks.
+
+Serves synthetic alarms over plain HTTP/1.1 with keep-alive. ``connect_delay``
+is slept once per new TCP connection to emulate the TCP+TLS handshake cost of
+the real endpoint, and ``latency`` is slept once per request. ``chunk_delay``
+is slept between 64 KiB body chunks to emulate a slow download, and
+``memoize`` caches encoded responses so the server's own allocations stay out
+of client-side memory measurements after a warm-up request.
+"""
+import json
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+SEVERITIES = ["CRITICAL", "URGENT", "WARNING", "INFORMATIVE"]
+STATUSES = ["OPEN", "ATTENDED", "CLOSED"]
+
+
+def make_alarm(i: int) -> Dict[str, Any]:
+    opened = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=i)
+    return {
+        "identifier": f"AL-{i:08d}",
+        "entityIdentifier": f"DEV-{i % 500:04d}",
+        "name": f"Alarm {i % 37}",
+        "severity": SEVERITIES[i % len(SEVERITIES)],
+        "status": STATUSES[i % len(STATUSES)],
+        "openingDate": opened.isoformat().replace("+00:00", "Z"),
+        "rule": f"rule-{i % 11}",
+        "description": "Synthetic alarm",
+    }
+
+
+def _current(value: Any) -> Dict[str, Any]:
+    return {"_current": {"value": value, "date": "2024-01-01T00:00:00Z"}}
+
+
+def make_device(i: int) -> Dict[str, Any]:
+    """A device entity shaped like the ``filters/entities/device_status.json`` selection."""
+    return {
+        "provision": {
+            "device": {
+                "identifier": _current(f"DEV-{i:06d}"),
+                "name": _current(f"Device {i}"),
+                "model": _current({"manufacturer": "Acme", "name": f"M{i % 7}"}),
+                "administrativeState": _current("ACTIVE" if i % 5 else "TESTING"),
+                "communicationModules": [
+                    {
+                        "subscription": {
+                            "administrativeState": _current("ACTIVE"),
+                            "address": _current({"apn": "iot.example", "value": f"10.0.{i // 256 % 256}.{i % 256}"}),
+                        }
+                    }
+                ],
+            }
+        },
+        "device": {
+            "communicationModules": [
+                {
+                    "subscription": {
+                        "presence": {
+                            "unifiedPresence": _current("ONLINE" if i % 3 else "OFFLINE"),
+                            "ipRtt": _current(i % 400),
+                        }
+                    },
+                    "operationalStatus": _current("NORMAL"),
+                }
+            ]
+        },
+        # Some devices never reported this datastream
+        **({"enel": {"device": {"command": {"zkeepalive": _current("OK")}}}} if i % 4 else {}),
+    }
+
+
+class StandInServer:
+    def __init__(
+        self,
+        total: int = 1000,
+        latency: float = 0.0,
+        connect_delay: float = 0.0,
+        chunk_delay: float = 0.0,
+        memoize: bool = False,
+    ):
+        self.total = total
+        self.latency = latency
+        self.connect_delay = connect_delay
+        self.chunk_delay = chunk_delay
+        self.memoize = memoize
+        self._responses: Dict[Any, bytes] = {}
+        self.connections = 0
+        self.requests = 0
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/north/v80"
+
+    def page(self, size: int, start: int) -> List[Dict[str, Any]]:
+        first = (start - 1) * size
+        return [make_alarm(i) for i in range(first, min(first + size, self.total))]
+
+    def handle(self, path: str, body: Dict[str, Any]) -> Any:
+        if path.endswith("/search/entities/alarms/summary"):
+            return {"summary": {"date": datetime.now(timezone.utc).isoformat(), "count": self.total, "summaryGroup": []}}
+        if path.endswith("/search/entities/alarms"):
+            limit = body.get("limit", {})
+            return {"alarms": self.page(limit.get("size", 50), limit.get("start", 1))}
+        if path.endswith("/alarms"):
+            return {}
+        return None
+
+    def start(self) -> "StandInServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Avoid Nagle/delayed-ACK stalls between header and body writes
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                server.connections += 1
+                if server.connect_delay:
+                    time.sleep(server.connect_delay)
+
+            def do_POST(self):
+                server.requests += 1
+                length = int(self.headers.get("Content-Length", 0))
+                request_raw = self.rfile.read(length) or b"{}"
+                if server.latency:
+                    time.sleep(server.latency)
+                raw = server._responses.get((self.path, request_raw))
+                if raw is None:
+                    data = server.handle(self.path, json.loads(request_raw))
+                    if data is None:
+                        self.send_response(404)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    raw = json.dumps(data).encode()
+                    if server.memoize:
+                        server._responses[(self.path, request_raw)] = raw
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                if not server.chunk_delay:
+                    self.wfile.write(raw)
+                    return
+                for i in range(0, len(raw), 65536):
+                    self.wfile.write(raw[i:i + 65536])
+                    self.wfile.flush()
+                    time.sleep(server.chunk_delay)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -40,6 +40,7 @@ async def get_open_alarms():
     print(f"Querying {url}...")
     print(f"Using filter: {json.dumps(payload, indent=2)}")
     
+    # One AsyncClient for the whole session: its connection pool is reused by every request and closed on exit
     async with httpx.AsyncClient(verify=verify_ssl) as client:
         try:
             response = await client.post(url, headers=headers, json=payload)
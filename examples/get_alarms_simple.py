@@ -42,6 +42,7 @@ async def get_open_alarms_simple():
     print(f"--- Simple Alarm Search ---")
     print(f"URL: {url}")
     
+    # One AsyncClient for the whole session: its connection pool is reused by every request and closed on exit
     async with httpx.AsyncClient(verify=verify_ssl) as client:
         try:
             response = await client.post(url, headers=headers, json=payload)
@@ -1,8 +1,7 @@
-from opengate_alarms.tui.app import OpenGateApp
+from opengate_alarms.tui.app import run
 
 def main():
-    app = OpenGateApp()
-    app.run()
+    run()
 
 
 if __name__ == "__main__":
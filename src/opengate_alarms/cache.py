@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Default time-to-live in seconds per endpoint namespace
+DEFAULT_TTLS = {
+    "alarms": 15.0,
+    "summary": 30.0,
+    "entities": 60.0,
+}
+
+_MISSING = object()
+
+
+def cache_key(payload: Any) -> str:
+    """Canonical hash of a request payload (key order and whitespace do not matter)."""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache with per-namespace TTLs and in-flight request coalescing.
+
+    Entries are keyed by ``(namespace, key)`` where the namespace is the endpoint
+    ("alarms", "summary", "entities") and the key is usually ``cache_key(payload)``.
+    Concurrent ``get_or_fetch`` calls for the same entry share one fetch.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            # Expired entries stay (until evicted) so get_stale() can still serve them
+            return default
+        self._entries.move_to_end((namespace, key))
+        return value
+
+    def get_stale(self, namespace: str, key: str, default: Any = None) -> Any:
+        """The stored value even if its TTL has passed, for use while the API is unavailable."""
+        entry = self._entries.get((namespace, key))
+        return default if entry is None else entry[1]
+
+    @property
+    def generation(self) -> int:
+        """Incremented by every ``invalidate()``; pass it back to ``set()`` to drop stale writes."""
+        return self._generation
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self._generation:
+            return
+        if ttl is None:
+            ttl = self.ttls.get(namespace, self.default_ttl)
+        self._entries[(namespace, key)] = (self._clock() + ttl, value)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, namespace: str, key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Return the cached value, joining an identical in-flight fetch or starting one."""
+        value = self.get(namespace, key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get((namespace, key))
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        # The fetch runs in its own task so cancelling whichever caller started it
+        # doesn't cancel it for the others waiting on the same entry
+        task = asyncio.ensure_future(self._fetch(namespace, key, fetch, self._generation))
+        self._inflight[(namespace, key)] = task
+        task.add_done_callback(lambda done: self._fetched((namespace, key), done))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, namespace: str, key: str, fetch: Callable[[], Awaitable[T]], generation: int) -> T:
+        value = await fetch()
+        # Don't store a response that was in flight while the cache was invalidated
+        self.set(namespace, key, value, generation=generation)
+        return value
+
+    def _fetched(self, entry: Tuple[str, str], task: asyncio.Future) -> None:
+        if self._inflight.get(entry) is task:
+            del self._inflight[entry]
+        if not task.cancelled():
+            # Every caller may have been cancelled; mark the exception as retrieved
+            task.exception()
+
+    def invalidate(self, namespace: Optional[str] = None) -> int:
+        """Drop every entry of ``namespace`` (or everything). Returns the number removed."""
+        self._generation += 1
+        if namespace is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+        keys = [k for k in self._entries if k[0] == namespace]
+        for k in keys:
+            del self._entries[k]
+        return len(keys)
@@ -0,0 +1,168 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from .cache import cache_key
+from .models import SearchRequest
+from .select_paths import Column, ColumnPlan, parse_complex_select
+
+logger = logging.getLogger("opengate_alarms.catalog")
+
+KINDS = ("alarms", "entities")
+
+# Search and columns used for the entities tab when no filter is selected
+DEFAULT_ENTITY_REQUEST: Dict[str, Any] = {"limit": {"size": 25, "start": 1}}
+DEFAULT_ENTITY_COLUMNS: List[Column] = [("ID", ["id"]), ("NAME", ["name"]), ("TYPE", ["resourceType"])]
+
+
+class FilterError(ValueError):
+    """A filter file that cannot be turned into a search."""
+
+
+@dataclass
+class CatalogEntry:
+    """One filter file, parsed and validated.
+
+    ``request`` is a ``SearchRequest`` for alarm filters and the search dict
+    for entity filters, and ``key`` is its canonical ``cache_key``. Entity
+    filters also carry their select ``columns`` and compiled ``plan``. A file
+    that failed to load has ``error`` set and no request.
+    """
+    kind: str
+    name: str
+    path: Path
+    version: Tuple[int, int]
+    request: Any = None
+    key: str = ""
+    columns: List[Column] = field(default_factory=list)
+    plan: Optional[ColumnPlan] = None
+    error: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return self.path.stem
+
+
+def parse_alarm_filter(data: Any) -> SearchRequest:
+    """A filter file is either ``{"filter": {...}}`` or the filter object itself."""
+    if not isinstance(data, dict):
+        raise FilterError("an alarm filter must be a JSON object")
+    try:
+        return SearchRequest(filter=data["filter"] if "filter" in data else data)
+    except ValidationError as e:
+        raise FilterError(f"invalid alarm filter: {e.errors()[0]['msg']}") from None
+
+
+def parse_entity_filter(data: Any) -> Tuple[Dict[str, Any], List[Column]]:
+    """Validate an entity search dict and return it with the columns of its ``select``."""
+    if not isinstance(data, dict):
+        raise FilterError("an entity filter must be a JSON object")
+    for name in ("filter", "limit"):
+        if name in data and not isinstance(data[name], dict):
+            raise FilterError(f"'{name}' must be a JSON object")
+    if "select" not in data:
+        return data, list(DEFAULT_ENTITY_COLUMNS)
+    if not isinstance(data["select"], list):
+        raise FilterError("'select' must be a list")
+    try:
+        columns = parse_complex_select(data["select"])
+    except (AttributeError, TypeError) as e:
+        raise FilterError(f"invalid select: {e}") from None
+    return data, columns
+
+
+class FilterCatalog:
+    """Every filter file under ``root/alarms`` and ``root/entities``, loaded once.
+
+    ``refresh()`` stats the directories and re-parses only files whose mtime
+    or size changed, so it is cheap enough to poll every few seconds. Parse
+    and validation errors are kept on the entry, so they can be reported as
+    soon as a file is loaded instead of when the filter is used.
+    """
+
+    def __init__(self, root: Union[str, Path] = "filters"):
+        self.root = Path(root)
+        self._entries: Dict[str, Dict[str, CatalogEntry]] = {kind: {} for kind in KINDS}
+
+    def entries(self, kind: str) -> List[CatalogEntry]:
+        return [entry for _, entry in sorted(self._entries[kind].items())]
+
+    def get(self, kind: str, name: Optional[str]) -> Optional[CatalogEntry]:
+        """Entry for file ``name`` (e.g. ``"open_alarms.json"``), or None."""
+        if not name:
+            return None
+        return self._entries[kind].get(name)
+
+    def errors(self) -> List[CatalogEntry]:
+        return [entry for kind in KINDS for entry in self.entries(kind) if entry.error is not None]
+
+    def refresh(self) -> List[Tuple[str, str]]:
+        """Load new and modified files and drop deleted ones.
+
+        Returns ``(kind, name)`` for every filter added, removed or whose
+        search (or error) changed. A file saved without changes is not reported.
+        """
+        entries, changed = self.scan()
+        self.apply(entries)
+        return changed
+
+    def scan(self) -> Tuple[Dict[str, Dict[str, CatalogEntry]], List[Tuple[str, str]]]:
+        """The file I/O half of ``refresh()``: new entries and changes, with the catalog untouched.
+
+        Safe to run in a worker thread while the catalog is being read; hand
+        the entries to ``apply()`` on the thread that reads it.
+        """
+        scanned: Dict[str, Dict[str, CatalogEntry]] = {}
+        changed = []
+        for kind in KINDS:
+            entries = self._entries[kind]
+            found = {}
+            directory = self.root / kind
+            if directory.is_dir():
+                for path in directory.glob("*.json"):
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    found[path.name] = (path, (stat.st_mtime_ns, stat.st_size))
+
+            changed.extend((kind, name) for name in entries if name not in found)
+            fresh = scanned[kind] = {}
+            for name, (path, version) in found.items():
+                previous = entries.get(name)
+                if previous is not None and previous.version == version:
+                    fresh[name] = previous
+                    continue
+                entry = fresh[name] = self._load(kind, path, version)
+                if previous is None or (previous.key, previous.error) != (entry.key, entry.error):
+                    changed.append((kind, name))
+        if changed:
+            logger.info(f"Filter catalog updated: {', '.join(f'{kind}/{name}' for kind, name in changed)}")
+        return scanned, changed
+
+    def apply(self, entries: Dict[str, Dict[str, CatalogEntry]]) -> None:
+        """Swap in the entries of a ``scan()``."""
+        self._entries = entries
+
+    def _load(self, kind: str, path: Path, version: Tuple[int, int]) -> CatalogEntry:
+        entry = CatalogEntry(kind, path.name, path, version)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if kind == "alarms":
+                entry.request = parse_alarm_filter(data)
+                entry.key = cache_key(entry.request.model_dump(by_alias=True, exclude_none=True))
+            else:
+                entry.request, entry.columns = parse_entity_filter(data)
+                entry.key = cache_key(entry.request)
+                entry.plan = ColumnPlan(entry.columns)
+        except (OSError, ValueError) as e:
+            # json.JSONDecodeError and FilterError are ValueErrors
+            entry.request, entry.plan = None, None
+            entry.error = str(e)
+            logger.error(f"Invalid {kind} filter {path.name}: {e}")
+        return entry
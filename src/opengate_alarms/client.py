@@ -1,94 +1,573 @@
+import asyncio
 import httpx
+import importlib.util
 import os
-from typing import List, Optional, Dict, Any
-from .models import Alarm, AlarmSummary, SearchRequest
-from dotenv import load_dotenv
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Deque, List, Optional, Dict, Any, Tuple
+from .cache import ResponseCache, cache_key
+from .decoding import AlarmRecord, decode_alarm_records, decode_alarms
+from .logconfig import REQUEST_LOGGER
+from .metrics import Instrumentation, RequestTrace
+from .models import Alarm, AlarmActionResult, AlarmSummary, Pagination, SearchRequest
+from .ratelimit import Priority, RequestScheduler, TokenBucket, request_priority
+from .resilience import RETRYABLE_STATUS, CircuitOpenError, Resilience, is_unavailable
+from .snapshot import SnapshotStore, endpoint_scope
+from .streaming import iter_json_items
 
 import logging
 from datetime import datetime
 
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("opengate_alarms.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("opengate_alarms.client")
+request_logger = logging.getLogger(REQUEST_LOGGER)
+
+# HTTP/2 needs the optional 'h2' package (pip install "httpx[http2]"); httpx imports it when used
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+DEFAULT_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# Rejections that apply to the whole request, not to particular alarm ids
+_UNSPLITTABLE_STATUS = {401, 403}
+
 
 class OpenGateAlarmClient:
+    """Async client for the OpenGate alarms API.
+
+    The client owns a single pooled ``httpx.AsyncClient`` that is created on
+    first use and reused by every call, so repeated queries skip the TCP/TLS
+    handshake. Use it as an async context manager or call ``aclose()`` when done.
 
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    Every request goes through ``resilience`` (retries with backoff, deadlines
+    and a circuit breaker per endpoint). While an endpoint is unavailable,
+    cached searches fall back to the last known result (an expired cache entry
+    or the on-disk snapshot) instead of failing.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        limits: Optional[httpx.Limits] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        http2: bool = True,
+        cache: Optional[ResponseCache] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        resilience: Optional[Resilience] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
         self.api_key = api_key or os.getenv("OPENGATE_API_KEY")
         # Use provided base_url, or env var, or default to production
-        env_url = os.getenv("OPENGATE_BASE_URL")
-        if env_url:
+        url = base_url or os.getenv("OPENGATE_BASE_URL")
+        if url:
             # Ensure we append the path if it's just the host
-            if not env_url.endswith("/north/v80"):
-                env_url = env_url.rstrip("/") + "/north/v80"
-            self.base_url = env_url
+            if not url.endswith("/north/v80"):
+                url = url.rstrip("/") + "/north/v80"
+            self.base_url = url
         else:
-            self.base_url = base_url or "https://api.opengate.es/north/v80"
-        
+            self.base_url = "https://api.opengate.es/north/v80"
+
         self.verify_ssl = os.getenv("OPENGATE_VERIFY_SSL", "True").lower() == "true"
-        
+
         self.headers = {
             "X-ApiKey": self.api_key,
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
 
-    async def query_alarms(self, search_request: Optional[SearchRequest] = None) -> List[Alarm]:
+        self.limits = limits or DEFAULT_LIMITS
+        self.timeout = timeout or DEFAULT_TIMEOUT
+        if http2 and not HTTP2_AVAILABLE:
+            logger.debug("HTTP/2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._http: Optional[httpx.AsyncClient] = None
+        # Optional response cache shared with other clients (e.g. the TUI's entity helper)
+        self.cache = cache
+        # Optional on-disk store written through on every fetched search page
+        self.snapshots = snapshots
+        self.resilience = resilience or Resilience()
+        # Shared request budget; configured from OPENGATE_RATE_LIMIT when not given
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler.from_env()
+        # Per-call phase timings, published to the process-wide metrics registry by default
+        self.instrumentation = instrumentation or Instrumentation()
+
+    @property
+    def retry_backoff(self) -> float:
+        """Base delay in seconds for exponential backoff between retries."""
+        return self.resilience.policy.base
+
+    @retry_backoff.setter
+    def retry_backoff(self, value: float) -> None:
+        self.resilience.policy.base = value
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared connection pool, created lazily on first access."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                verify=self.verify_ssl,
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool. The client can still be reused afterwards."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self) -> "OpenGateAlarmClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def query_alarms(self, search_request: Optional[SearchRequest] = None, use_cache: bool = True) -> List[Alarm]:
         if search_request is None:
             search_request = SearchRequest()
 
-        url = f"{self.base_url}/search/entities/alarms"
-        async with httpx.AsyncClient(verify=self.verify_ssl) as client:
-            payload = search_request.model_dump(by_alias=True, exclude_none=True)
-            # If payload is just default values (empty filter and default pagination), some APIs prefer empty dict
-            if not payload.get("filter") and payload.get("limit", {}).get("size") == 50 and payload.get("limit", {}).get("start") == 1:
-                payload = {}
-            
-            logger.info(f"Querying alarms - URL: {url} - Payload: {payload}")
-
-            
-            response = await client.post(url, headers=self.headers, json=payload)
-            
-            if response.status_code != 200:
-                logger.error(f"API Error {response.status_code}: {response.text}")
-            
+        payload = self._alarm_payload(search_request)
+
+        async def fetch() -> List[Alarm]:
+            alarms = await self._fetch_alarm_page(search_request)
+            self._save_snapshot(payload, alarms)
+            return alarms
+
+        alarms = await self._cached("alarms", payload, fetch, use_cache)
+        return list(alarms)
+
+    def _stale(self, namespace: str, payload: Any) -> Optional[Any]:
+        """Last known result for ``payload``: an expired cache entry, else the alarm snapshot."""
+        if self.cache is not None:
+            value = self.cache.get_stale(namespace, cache_key(payload))
+            if value is not None:
+                return value
+        if namespace == "alarms" and self.snapshots is not None:
+            snapshot = self.snapshots.load("alarms", payload, self._snapshot_scope)
+            if snapshot is not None:
+                return decode_alarms(snapshot.body)
+        return None
+
+    @property
+    def _snapshot_scope(self) -> str:
+        # Alarm searches are not scoped by organization; the API key decides what they see
+        return endpoint_scope(self.base_url, api_key=self.api_key)
+
+    def load_alarm_snapshot(self, search_request: Optional[SearchRequest] = None) -> Optional[Tuple[float, List[Alarm]]]:
+        """Last stored result of this search as ``(saved_at, alarms)``, without any network I/O."""
+        if self.snapshots is None:
+            return None
+        snapshot = self.snapshots.load("alarms", self._alarm_payload(search_request or SearchRequest()), self._snapshot_scope)
+        if snapshot is None:
+            return None
+        return snapshot.saved_at, decode_alarms(snapshot.body)
+
+    def _save_snapshot(self, payload: Dict[str, Any], alarms: List[Alarm]) -> None:
+        if self.snapshots is None:
+            return
+        try:
+            self.snapshots.save(
+                "alarms", payload, [alarm.model_dump(mode="json", by_alias=True) for alarm in alarms], self._snapshot_scope
+            )
+        except Exception as e:
+            logger.warning(f"Could not store alarm snapshot: {e}")
+
+    async def query_alarm_records(self, search_request: Optional[SearchRequest] = None) -> List[AlarmRecord]:
+        """Like ``query_alarms`` but skips validation and returns compact ``AlarmRecord`` objects."""
+        if search_request is None:
+            search_request = SearchRequest()
+
+        with self.instrumentation.request("alarms") as trace:
+            raw = await self._post_alarm_search(search_request, trace=trace)
+            with trace.timed("decode"):
+                records = decode_alarm_records(raw)
+            trace.metrics.items = len(records)
+        return records
+
+    async def iter_alarms(self, search_request: Optional[SearchRequest] = None, prefetch: int = 1) -> AsyncIterator[Alarm]:
+        """Iterate over every alarm matching the request, page by page.
+
+        Pages are requested from ``search_request.limit.start`` onwards using
+        ``limit.size`` as the page size. While one page is being consumed, up to
+        ``prefetch`` following pages are already in flight, so at most
+        ``prefetch + 1`` pages are held in memory. Iteration stops on the first
+        short (or empty) page.
+        """
+        # aclosing: pages still in flight are cancelled as soon as the caller stops
+        async with aclosing(self.iter_alarm_pages(search_request, prefetch)) as pages:
+            async for _, alarms in pages:
+                for alarm in alarms:
+                    yield alarm
+
+    async def iter_alarm_pages(
+        self, search_request: Optional[SearchRequest] = None, prefetch: int = 1
+    ) -> AsyncIterator[Tuple[int, List[Alarm]]]:
+        """Like ``iter_alarms`` but yields ``(start, alarms)`` for every page.
+
+        ``start`` is the page number the alarms came from, so callers can
+        checkpoint between pages and resume from ``start + 1``.
+        """
+        if search_request is None:
+            search_request = SearchRequest()
+        if prefetch < 0:
+            raise ValueError("prefetch must be >= 0")
+        if search_request.limit.size < 1:
+            raise ValueError("limit.size must be >= 1")
+
+        size = search_request.limit.size
+        next_start = search_request.limit.start
+        pending: Deque[Tuple[int, asyncio.Task]] = deque()
+
+        def schedule() -> None:
+            nonlocal next_start
+            page_request = search_request.model_copy(update={"limit": Pagination(size=size, start=next_start)})
+            pending.append((next_start, asyncio.create_task(self._fetch_alarm_page(page_request, allow_empty_payload=False))))
+            next_start += 1
+
+        try:
+            for _ in range(prefetch + 1):
+                schedule()
+            while pending:
+                start, task = pending.popleft()
+                alarms = await task
+                yield start, alarms
+                if len(alarms) < size:
+                    # Last page: anything still in flight is past the end
+                    return
+                schedule()
+        finally:
+            tasks = [task for _, task in pending]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def fetch_all_alarms(
+        self,
+        search_request: Optional[SearchRequest] = None,
+        total: Optional[int] = None,
+        concurrency: int = 4,
+        retries: int = 2,
+        rate_limit: Optional[float] = None,
+    ) -> List[Alarm]:
+        """Fetch every matching alarm by requesting pages concurrently.
+
+        ``total`` is the expected number of alarms; when omitted it is read from
+        ``get_summary()``. Pages from ``limit.start`` up to the one covering
+        ``total`` are fetched by at most ``concurrency`` requests at once, each
+        retried up to ``retries`` times on transport errors or 429/5xx, and
+        optionally throttled to ``rate_limit`` requests per second (on top of the
+        client's scheduler, where they run at ``Priority.BULK``). Results are
+        returned in page order. If the last expected page comes back full (new
+        alarms arrived since the count), the remaining pages are walked
+        sequentially.
+        """
+        if search_request is None:
+            search_request = SearchRequest()
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        # Exports yield to interactive and background requests on a shared scheduler
+        with request_priority(Priority.BULK):
+            if total is None:
+                summary = await self.get_summary(search_request.filter)
+                total = summary.count
+
+            size = search_request.limit.size
+            first = search_request.limit.start
+            page_count = max(1, -(-total // size))
+            semaphore = asyncio.Semaphore(concurrency)
+            bucket = TokenBucket(rate_limit) if rate_limit else None
+
+            async def fetch(start: int) -> List[Alarm]:
+                page_request = search_request.model_copy(update={"limit": Pagination(size=size, start=start)})
+                async with semaphore:
+                    return await self._fetch_alarm_page(page_request, allow_empty_payload=False, retries=retries, bucket=bucket)
+
+            pages = await asyncio.gather(*(fetch(first + i) for i in range(page_count)))
+            alarms = [alarm for page in pages for alarm in page]
+
+            next_start = first + page_count
+            while len(pages[-1]) == size:
+                logger.info(f"Result set grew past the expected {total} alarms, fetching page {next_start}")
+                pages[-1] = await fetch(next_start)
+                alarms.extend(pages[-1])
+                next_start += 1
+            return alarms
+
+    async def _fetch_alarm_page(
+        self,
+        search_request: SearchRequest,
+        allow_empty_payload: bool = True,
+        retries: Optional[int] = None,
+        bucket: Optional[TokenBucket] = None,
+    ) -> List[Alarm]:
+        """POST one search request and return the decoded alarms of the page."""
+        with self.instrumentation.request("alarms") as trace:
+            raw = await self._post_alarm_search(search_request, allow_empty_payload, retries, bucket, trace=trace)
+            # Parsing and validation happen in one pass here
+            with trace.timed("decode"):
+                alarms = decode_alarms(raw)
+            trace.metrics.items = len(alarms)
+        return alarms
+
+    async def stream_alarms(self, search_request: Optional[SearchRequest] = None, use_cache: bool = True) -> AsyncIterator[Alarm]:
+        """Yield the alarms of one page while the response body is still downloading.
+
+        The body is read with ``aiter_bytes()`` and parsed incrementally, so the
+        first alarms are available before the download finishes and the full
+        body is never held in memory. With a cache, a fresh cached page is
+        replayed instead and a fully streamed page is stored.
+        """
+        if search_request is None:
+            search_request = SearchRequest()
+
+        url, payload = self._alarm_search_payload(search_request)
+        key = cache_key(payload)
+        if self.cache is not None and use_cache:
+            cached = self.cache.get("alarms", key)
+            if cached is not None:
+                for alarm in cached:
+                    yield alarm
+                return
+
+        generation = self.cache.generation if self.cache is not None else None
+        collected: Optional[List[Alarm]] = [] if self.cache is not None or self.snapshots is not None else None
+        with self.instrumentation.request("alarms") as trace:
+            try:
+                response = await self._send_stream("alarms", url, payload, trace=trace)
+            except Exception as e:
+                stale = self._stale("alarms", payload) if use_cache and is_unavailable(e) else None
+                if stale is None:
+                    raise
+                logger.warning(f"Alarms unavailable ({e}), showing the last known result")
+                trace.metrics.error = type(e).__name__
+                for alarm in stale:
+                    yield alarm
+                return
+            try:
+                if response.status_code != 204:
+                    items = iter_json_items(trace.chunks(response.aiter_bytes()), keys=["alarms"])
+                    async for item in trace.decoded(items):
+                        with trace.timed("validate"):
+                            alarm = Alarm.model_validate(item)
+                        if collected is not None:
+                            collected.append(alarm)
+                        yield alarm
+            finally:
+                await response.aclose()
+        if self.cache is not None:
+            self.cache.set("alarms", key, collected, generation=generation)
+        if collected is not None:
+            self._save_snapshot(payload, collected)
+
+    async def _cached(self, namespace: str, payload: Any, fetch, use_cache: bool = True):
+        """Run ``fetch`` through the response cache, if any. ``use_cache=False`` forces a refetch.
+
+        With ``use_cache``, a fetch failing because the API is unavailable falls
+        back to the last known result when there is one.
+        """
+        if self.cache is None:
+            return await (self._or_stale(namespace, payload, fetch) if use_cache else fetch())
+        key = cache_key(payload)
+        if not use_cache:
+            generation = self.cache.generation
+            value = await fetch()
+            self.cache.set(namespace, key, value, generation=generation)
+            return value
+        return await self._or_stale(namespace, payload, lambda: self.cache.get_or_fetch(namespace, key, fetch))
+
+    async def _or_stale(self, namespace: str, payload: Any, fetch):
+        try:
+            return await fetch()
+        except Exception as e:
+            stale = self._stale(namespace, payload) if is_unavailable(e) else None
+            if stale is None:
+                raise
+            logger.warning(f"OpenGate '{namespace}' unavailable ({e}), serving the last known result")
+            return stale
+
+    async def _send(
+        self,
+        namespace: str,
+        url: str,
+        payload: Any,
+        retries: Optional[int] = None,
+        bucket: Optional[TokenBucket] = None,
+        trace: Optional[RequestTrace] = None,
+    ) -> httpx.Response:
+        """POST ``payload`` through the resilience layer, throttled by ``bucket`` on every attempt.
+
+        With a ``trace``, the network phases of the attempt that answered are recorded on it.
+        """
+        async def attempt() -> httpx.Response:
+            if bucket is not None:
+                await bucket.acquire()
+            if self.scheduler is not None:
+                await self.scheduler.acquire()
+            request = self.http.build_request("POST", url, json=payload, extensions=trace.extensions() if trace else None)
+            response = await self.http.send(request)
+            if trace is not None:
+                trace.response(request, response, body_read=True)
+            return response
+
+        return await self.resilience.send(namespace, attempt, retries)
+
+    async def _send_stream(self, namespace: str, url: str, payload: Any, trace: Optional[RequestTrace] = None) -> httpx.Response:
+        """Like ``_send`` but the body is left unread and error statuses are raised.
+
+        The caller must ``aclose()`` the returned response.
+        """
+        async def attempt() -> httpx.Response:
+            if self.scheduler is not None:
+                await self.scheduler.acquire()
+            request = self.http.build_request("POST", url, json=payload, extensions=trace.extensions() if trace else None)
+            response = await self.http.send(request, stream=True)
+            if trace is not None:
+                trace.response(request, response)
+            return response
+
+        response = await self.resilience.send(namespace, attempt)
+        if response.status_code not in (200, 204):
+            await response.aread()
+            logger.error(f"API Error {response.status_code}: {response.text}")
             response.raise_for_status()
-            data = response.json()
+        return response
+
+    def _alarm_payload(self, search_request: SearchRequest, allow_empty_payload: bool = True) -> Dict[str, Any]:
+        payload = search_request.model_dump(by_alias=True, exclude_none=True)
+        # If payload is just default values (empty filter and default pagination), some APIs prefer empty dict
+        if allow_empty_payload and not payload.get("filter") and payload.get("limit", {}).get("size") == 50 and payload.get("limit", {}).get("start") == 1:
+            payload = {}
+        return payload
+
+    def _alarm_search_payload(self, search_request: SearchRequest, allow_empty_payload: bool = True):
+        url = f"{self.base_url}/search/entities/alarms"
+        payload = self._alarm_payload(search_request, allow_empty_payload)
+
+        request_logger.info("Querying alarms - URL: %s - Payload: %s", url, payload)
+        return url, payload
+
+    async def _post_alarm_search(
+        self,
+        search_request: SearchRequest,
+        allow_empty_payload: bool = True,
+        retries: Optional[int] = None,
+        bucket: Optional[TokenBucket] = None,
+        trace: Optional[RequestTrace] = None,
+    ) -> bytes:
+        """POST one search request and return the raw response body (empty when there is no content)."""
+        url, payload = self._alarm_search_payload(search_request, allow_empty_payload)
+        response = await self._send("alarms", url, payload, retries, bucket, trace)
+
+        if response.status_code == 204:
+            # No content: the requested page is past the end of the result set
+            return b""
+        if response.status_code != 200:
+            logger.error(f"API Error {response.status_code}: {response.text}")
 
-            # The API usually returns a list of alarms directly or inside a field
-            # Based on docs, it returns a list of alarms
-            if isinstance(data, list):
-                return [Alarm(**item) for item in data]
-            elif "alarms" in data:
-                return [Alarm(**item) for item in data["alarms"]]
-            return []
+        response.raise_for_status()
+        return response.content
 
-    async def get_summary(self, filter_data: Optional[Dict[str, Any]] = None) -> AlarmSummary:
+    async def get_summary(self, filter_data: Optional[Dict[str, Any]] = None, use_cache: bool = True) -> AlarmSummary:
         url = f"{self.base_url}/search/entities/alarms/summary"
         payload = {"filter": filter_data or {}}
-        async with httpx.AsyncClient(verify=self.verify_ssl) as client:
-            response = await client.post(url, headers=self.headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            return AlarmSummary(**data["summary"])
+
+        async def fetch() -> AlarmSummary:
+            with self.instrumentation.request("summary") as trace:
+                response = await self._send("summary", url, payload, trace=trace)
+                response.raise_for_status()
+                with trace.timed("decode"):
+                    data = response.json()
+                with trace.timed("validate"):
+                    return AlarmSummary(**data["summary"])
+
+        return await self._cached("summary", payload, fetch, use_cache)
 
     async def change_state(self, action: str, alarm_ids: List[str], notes: Optional[str] = None) -> bool:
+        response = await self._post_state_change(action, alarm_ids, notes)
+        self._invalidate_alarms()
+        return response.status_code == 200
+
+    async def change_state_bulk(
+        self,
+        action: str,
+        alarm_ids: List[str],
+        notes: Optional[str] = None,
+        batch_size: int = 100,
+        concurrency: int = 4,
+        retries: int = 2,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> AlarmActionResult:
+        """Apply ``action`` (ATTEND or CLOSE) to many alarms in concurrent batches.
+
+        Duplicate ids are dropped and the rest are sent ``batch_size`` at a time,
+        with at most ``concurrency`` requests in flight on the pooled client.
+        Batches failing with a transport error or 429/5xx are retried up to
+        ``retries`` times with backoff. A batch rejected with another status is
+        split in halves until the rejected ids are isolated, so one bad id does
+        not fail the rest. ``progress(done, total)`` is called as ids settle.
+        Failures are reported per id in the result instead of raised.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        ids = list(dict.fromkeys(alarm_ids))
+        result = AlarmActionResult(action=action)
+        semaphore = asyncio.Semaphore(concurrency)
+        done = 0
+
+        def settle(batch: List[str], error: Optional[str]) -> None:
+            nonlocal done
+            if error is None:
+                result.succeeded.extend(batch)
+            else:
+                result.failed.update(dict.fromkeys(batch, error))
+            done += len(batch)
+            if progress is not None:
+                progress(done, len(ids))
+
+        async def send(batch: List[str]) -> None:
+            try:
+                async with semaphore:
+                    response = await self._post_state_change(action, batch, notes, retries)
+            except (httpx.TransportError, CircuitOpenError) as e:
+                settle(batch, str(e) or type(e).__name__)
+                return
+            status = response.status_code
+            if status == 200:
+                settle(batch, None)
+            elif len(batch) > 1 and status not in RETRYABLE_STATUS and status not in _UNSPLITTABLE_STATUS:
+                half = len(batch) // 2
+                await asyncio.gather(send(batch[:half]), send(batch[half:]))
+            else:
+                settle(batch, f"HTTP {status}")
+
+        await asyncio.gather(*(send(ids[i:i + batch_size]) for i in range(0, len(ids), batch_size)))
+        position = {alarm_id: i for i, alarm_id in enumerate(ids)}
+        result.succeeded.sort(key=position.__getitem__)
+        if result.succeeded:
+            self._invalidate_alarms()
+        logger.info(f"{action} on {len(ids)} alarms: {len(result.succeeded)} succeeded, {len(result.failed)} failed")
+        return result
+
+    async def _post_state_change(
+        self, action: str, alarm_ids: List[str], notes: Optional[str], retries: Optional[int] = None
+    ) -> httpx.Response:
         url = f"{self.base_url}/alarms"
         payload = {
             "action": action, # ATTEND or CLOSE
             "alarms": alarm_ids,
             "notes": notes
         }
-        async with httpx.AsyncClient(verify=self.verify_ssl) as client:
-            response = await client.post(url, headers=self.headers, json=payload)
-            return response.status_code == 200
+        with self.instrumentation.request("state") as trace:
+            return await self._send("state", url, payload, retries, trace=trace)
 
+    def _invalidate_alarms(self) -> None:
+        if self.cache is not None:
+            # Any cached alarm list or summary may now show a stale status
+            self.cache.invalidate("alarms")
+            self.cache.invalidate("summary")
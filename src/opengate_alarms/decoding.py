@@ -0,0 +1,97 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, TypeAdapter
+
+from .models import Alarm
+
+
+class _AlarmEnvelope(BaseModel):
+    alarms: List[Alarm] = []
+
+
+# The search endpoint answers either a bare list or {"alarms": [...]}
+_ALARM_PAGE_ADAPTER = TypeAdapter(Union[List[Alarm], _AlarmEnvelope])
+
+
+def decode_alarms(raw: Union[bytes, str]) -> List[Alarm]:
+    """Validate a raw search response body into ``Alarm`` models in one pass.
+
+    Parsing and validation (including ``openingDate``) run inside pydantic-core
+    straight from the bytes, instead of ``json.loads`` + ``Alarm(**item)`` per item.
+    """
+    if not raw:
+        return []
+    page = _ALARM_PAGE_ADAPTER.validate_json(raw)
+    return page if isinstance(page, list) else page.alarms
+
+
+@dataclass(slots=True)
+class AlarmRecord:
+    """Compact, unvalidated alarm with the same attributes as ``Alarm``."""
+    id: str
+    entity_id: str
+    name: str
+    severity: str
+    status: str
+    creation_date: Optional[datetime]
+    rule: Optional[str] = None
+    description: Optional[str] = None
+
+    def to_alarm(self) -> Alarm:
+        return Alarm(
+            id=self.id,
+            entity_id=self.entity_id,
+            name=self.name,
+            severity=self.severity,
+            status=self.status,
+            creation_date=self.creation_date,
+            rule=self.rule,
+            description=self.description,
+        )
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def records_from_items(items: List[Dict[str, Any]]) -> List[AlarmRecord]:
+    """Build ``AlarmRecord`` objects from already-parsed items without validation.
+
+    Trusted mode: the key style (plain or ``alarm.``-prefixed) is detected once
+    from the first item and missing fields become ``None`` instead of errors.
+    """
+    if not items:
+        return []
+    first = items[0]
+    prefix = "alarm." if "alarm.identifier" in first else ""
+    date_key = f"{prefix}openingDate" if f"{prefix}openingDate" in first else f"{prefix}creationDate"
+    k_id, k_entity, k_name, k_severity, k_status, k_rule, k_description = (
+        prefix + k for k in ("identifier", "entityIdentifier", "name", "severity", "status", "rule", "description")
+    )
+    return [
+        AlarmRecord(
+            item.get(k_id),
+            item.get(k_entity),
+            item.get(k_name),
+            item.get(k_severity),
+            item.get(k_status),
+            _parse_date(item.get(date_key)),
+            item.get(k_rule),
+            item.get(k_description),
+        )
+        for item in items
+    ]
+
+
+def decode_alarm_records(raw: Union[bytes, str]) -> List[AlarmRecord]:
+    """Trusted-mode decode of a raw search response body into ``AlarmRecord`` objects."""
+    if not raw:
+        return []
+    data = json.loads(raw)
+    items = data if isinstance(data, list) else data.get("alarms", [])
+    return records_from_items(items)
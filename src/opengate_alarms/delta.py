@@ -0,0 +1,184 @@
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from .client import OpenGateAlarmClient
+from .models import ALARM_FIELDS, Alarm, AlarmSummary, Filter, Pagination, SearchRequest
+
+if TYPE_CHECKING:
+    # NumPy is only imported once a frame is built
+    from .frame import AlarmFrame
+
+logger = logging.getLogger("opengate_alarms.delta")
+
+
+@dataclass
+class AlarmDelta:
+    """Changes applied to the local store by one refresh."""
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    full_sync: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class AlarmDeltaSync:
+    """Keeps an id-indexed local copy of the alarms matching a filter.
+
+    The first ``refresh()`` walks every page. Later refreshes only ask for alarms
+    opened at or after the ``openingDate`` high-water mark and merge them in. A
+    cheap reconciliation compares the server-side summary (the total and its
+    per-group counts, e.g. by status) with the local store and falls back to a full
+    walk only when they disagree, which is how closed alarms and status
+    changes are detected. Changes the summary cannot show, like two alarms
+    swapping status, are picked up by a full walk every ``reconcile_every``
+    refreshes.
+    """
+
+    def __init__(
+        self,
+        client: OpenGateAlarmClient,
+        filter_data: Optional[Dict[str, Any]] = None,
+        page_size: int = 500,
+        date_field: str = "alarm.openingDate",
+        reconcile_every: Optional[int] = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client
+        self.filter_data = filter_data or {}
+        self.page_size = page_size
+        self.date_field = date_field
+        self.reconcile_every = reconcile_every
+        self.alarms: Dict[str, Alarm] = {}
+        self.watermark: Optional[datetime] = None
+        # Clock time of the last refresh that brought the store up to date
+        self.synced_at: Optional[float] = None
+        self._clock = clock
+        self._refreshes = 0
+        self._synced = False
+        self._frame: Optional["AlarmFrame"] = None
+
+    @property
+    def initialized(self) -> bool:
+        return self._synced
+
+    def age(self) -> float:
+        """Seconds since the store was last brought up to date (infinite before the first sync)."""
+        return float("inf") if self.synced_at is None else self._clock() - self.synced_at
+
+    def frame(self) -> "AlarmFrame":
+        """Columnar copy of the local store, rebuilt only after the store changes."""
+        if self._frame is None:
+            from .frame import AlarmFrame
+
+            self._frame = AlarmFrame.from_alarms(self.alarms.values())
+        return self._frame
+
+    def _request(self, since: Optional[datetime] = None) -> SearchRequest:
+        filter_data = self.filter_data
+        if since is not None:
+            # gte rather than gt: alarms sharing the watermark timestamp that
+            # arrived after the last poll are still picked up; the id index dedupes.
+            since_filter = Filter(gte={self.date_field: since.isoformat().replace("+00:00", "Z")})
+            since_dict = since_filter.model_dump(by_alias=True, exclude_none=True)
+            filter_data = {"and": [filter_data, since_dict]} if filter_data else since_dict
+        return SearchRequest(filter=filter_data, limit=Pagination(size=self.page_size, start=1))
+
+    @staticmethod
+    def _advance(watermark: Optional[datetime], alarm: Alarm) -> datetime:
+        opened = _as_utc(alarm.creation_date)
+        return opened if watermark is None or opened > watermark else watermark
+
+    async def refresh(self) -> AlarmDelta:
+        if not self.initialized:
+            return await self.full_sync()
+
+        self._refreshes += 1
+        delta = AlarmDelta()
+        async for alarm in self.client.iter_alarms(self._request(since=self.watermark)):
+            existing = self.alarms.get(alarm.id)
+            if existing is None:
+                delta.added.append(alarm.id)
+            elif existing != alarm:
+                delta.updated.append(alarm.id)
+            self.alarms[alarm.id] = alarm
+            self.watermark = self._advance(self.watermark, alarm)
+        if delta.changed:
+            self._frame = None
+        self.synced_at = self._clock()
+
+        if await self._needs_reconcile():
+            reconciled = await self.full_sync()
+            # The full sync diffed against a store that already held this poll's merges
+            removed = set(reconciled.removed)
+            reconciled.added = sorted((set(reconciled.added) | set(delta.added)) - removed)
+            reconciled.updated = sorted((set(reconciled.updated) | set(delta.updated)) - removed - set(reconciled.added))
+            return reconciled
+        return delta
+
+    def invalidate(self) -> None:
+        """Make the next ``refresh()`` a full sync, e.g. after alarms changed state.
+
+        Delta polls only see newly opened alarms, so status changes made by
+        this client would otherwise go unnoticed until the next reconcile.
+        """
+        self._synced = False
+
+    async def _needs_reconcile(self) -> bool:
+        if self.reconcile_every and self._refreshes % self.reconcile_every == 0:
+            return True
+        summary = await self.client.get_summary(self.filter_data, use_cache=False)
+        mismatch = self._summary_mismatch(summary)
+        if mismatch:
+            logger.info(f"Reconciling alarm store: {mismatch}")
+            return True
+        return False
+
+    def _summary_mismatch(self, summary: AlarmSummary) -> Optional[str]:
+        """First count where the server summary and the local store disagree, if any."""
+        if summary.count != len(self.alarms):
+            return f"server has {summary.count}, local has {len(self.alarms)}"
+        for group in summary.summary_group:
+            for key, item in group.items():
+                attribute = ALARM_FIELDS.get(key)
+                if attribute is None:
+                    continue
+                local = Counter(str(getattr(alarm, attribute)) for alarm in self.alarms.values())
+                for entry in item.list:
+                    if local[entry.name] != entry.count:
+                        return f"server has {entry.count} with {key} {entry.name}, local has {local[entry.name]}"
+        return None
+
+    async def full_sync(self) -> AlarmDelta:
+        """Re-download the whole result set and diff it against the local store."""
+        previous = self.alarms
+        fresh: Dict[str, Alarm] = {}
+        watermark: Optional[datetime] = None
+        async for alarm in self.client.iter_alarms(self._request()):
+            fresh[alarm.id] = alarm
+            watermark = self._advance(watermark, alarm)
+
+        delta = AlarmDelta(full_sync=True)
+        for alarm_id, alarm in fresh.items():
+            old = previous.get(alarm_id)
+            if old is None:
+                delta.added.append(alarm_id)
+            elif old != alarm:
+                delta.updated.append(alarm_id)
+        delta.removed = [alarm_id for alarm_id in previous if alarm_id not in fresh]
+        self.alarms = fresh
+        self._frame = None
+        self.watermark = watermark
+        self.synced_at = self._clock()
+        self._synced = True
+        return delta
@@ -0,0 +1,520 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import aclosing
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Tuple
+
+from .catalog import KINDS, CatalogEntry, FilterCatalog
+from .logconfig import configure_logging
+from .models import Alarm, Filter, Pagination, SearchRequest, SearchSort
+from .ratelimit import Priority, request_priority
+
+logger = logging.getLogger("opengate_alarms.export")
+
+FORMATS = ("ndjson", "csv", "parquet")
+CHECKPOINT_MODES = ("page", "watermark")
+DEFAULT_PAGE_SIZE = 1000
+ALARM_COLUMNS = ["identifier", "entityIdentifier", "name", "severity", "status", "openingDate", "rule", "description"]
+ALARM_TYPES = ["string"] * 5 + ["timestamp"] + ["string"] * 2
+WATERMARK_FIELD = "alarm.openingDate"
+
+
+class ExportError(Exception):
+    """An export that cannot start or resume."""
+
+
+@dataclass
+class ExportStats:
+    rows: int = 0
+    pages: int = 0
+    elapsed: float = 0.0
+    # Rows already written by the run that is being resumed
+    resumed_rows: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.rows - self.resumed_rows) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class Checkpoint:
+    """Progress of one export, saved after every page that is safely on disk.
+
+    ``position`` is the output size in bytes (NDJSON, CSV) or the number of
+    closed Parquet part files. In page mode ``page`` is the next page to
+    request. In watermark mode the search is sorted by ``openingDate`` and a
+    resumed export asks again from ``watermark``, skipping the ids in ``seen``
+    (those already written with exactly that ``openingDate``).
+    """
+    kind: str
+    filter: str
+    format: str
+    mode: str
+    page: int = 1
+    rows: int = 0
+    position: int = 0
+    watermark: Optional[str] = None
+    seen: List[str] = field(default_factory=list)
+
+    def matches(self, other: "Checkpoint") -> bool:
+        return (self.kind, self.filter, self.format, self.mode) == (other.kind, other.filter, other.format, other.mode)
+
+    def save(self, path: Path) -> None:
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(asdict(self)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["Checkpoint"]:
+        try:
+            data = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            raise ExportError(f"unreadable checkpoint {path}: {e}") from None
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+class NdjsonWriter:
+    """One JSON document per line, appended and flushed page by page."""
+    tabular = False
+
+    def __init__(self, path: Path, columns: List[str], types: List[str], position: int = 0):
+        self._file = open_truncated(path, position, binary=True)
+
+    def write(self, documents: List[Any]) -> None:
+        dumps = json.dumps
+        self._file.write("".join(dumps(d, default=_json_default, ensure_ascii=False) + "\n" for d in documents).encode("utf-8"))
+        self._file.flush()
+
+    def durable(self) -> Optional[int]:
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self) -> int:
+        position = self.durable()
+        self._file.close()
+        return position
+
+    abort = close
+
+
+class CsvWriter:
+    """CSV with a header row; timestamps are written in ISO 8601."""
+    tabular = True
+
+    def __init__(self, path: Path, columns: List[str], types: List[str], position: int = 0):
+        self._file = open_truncated(path, position, binary=False)
+        self._writer = csv.writer(self._file)
+        self._timestamps = [i for i, kind in enumerate(types) if kind == "timestamp"]
+        if position == 0:
+            self._writer.writerow(columns)
+
+    def write(self, rows: List[List[Any]]) -> None:
+        for index in self._timestamps:
+            for row in rows:
+                if row[index] is not None:
+                    row[index] = row[index].isoformat()
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def durable(self) -> Optional[int]:
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self) -> int:
+        position = self.durable()
+        self._file.close()
+        return position
+
+    abort = close
+
+
+class ParquetWriter:
+    """A directory of Parquet part files written from Arrow record batches.
+
+    Every page becomes an Arrow record batch right away (a compact copy of
+    the Python rows), and the batches are written as one row group every
+    ``row_group_size`` rows; a part file is closed every ``part_rows`` rows.
+    Only closed parts are durable, so ``durable()`` reports progress (the
+    number of closed parts) only right after a part is closed, and a resumed
+    export deletes any part past the checkpoint before continuing.
+    """
+    tabular = True
+
+    def __init__(
+        self,
+        path: Path,
+        columns: List[str],
+        types: List[str],
+        position: int = 0,
+        row_group_size: int = 50_000,
+        part_rows: int = 1_000_000,
+    ):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ExportError('Parquet export needs pyarrow: pip install "opengate-alarms[parquet]"') from None
+        self._pa, self._pq = pa, pq
+        self.schema = pa.schema([
+            pa.field(name, pa.timestamp("us", tz="UTC") if kind == "timestamp" else pa.string())
+            for name, kind in zip(columns, types)
+        ])
+        self.directory = path
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for part in self.directory.glob("part-*.parquet"):
+            if int(part.stem.split("-")[1]) >= position:
+                part.unlink()
+        self.row_group_size = row_group_size
+        self.part_rows = part_rows
+        self.parts = position
+        self._writer = None
+        self._part_rows = 0
+        self._batches: List[Any] = []
+        self._buffered = 0
+
+    def write(self, rows: List[List[Any]]) -> None:
+        pa = self._pa
+        self._batches.append(pa.RecordBatch.from_arrays(
+            [pa.array(values, type=f.type) for values, f in zip(zip(*rows), self.schema)], schema=self.schema
+        ))
+        self._buffered += len(rows)
+        if self._buffered >= self.row_group_size or self._part_rows + self._buffered >= self.part_rows:
+            self._flush()
+        if self._part_rows >= self.part_rows:
+            self._close_part()
+
+    def _flush(self) -> None:
+        if not self._buffered:
+            return
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.directory / f"part-{self.parts:05d}.parquet", self.schema)
+        table = self._pa.Table.from_batches(self._batches, schema=self.schema)
+        self._writer.write_table(table, row_group_size=self._buffered)
+        self._part_rows += self._buffered
+        self._batches = []
+        self._buffered = 0
+
+    def _close_part(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self.parts += 1
+            self._part_rows = 0
+
+    def durable(self) -> Optional[int]:
+        return self.parts if self._writer is None and not self._buffered else None
+
+    def close(self) -> int:
+        self._flush()
+        self._close_part()
+        return self.parts
+
+    def abort(self) -> None:
+        # The open part is incomplete; a resumed export deletes it
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+WRITERS = {"ndjson": NdjsonWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+def open_truncated(path: Path, position: int, binary: bool):
+    """Open ``path`` for appending after dropping anything past ``position``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    mode = "ab" if binary else "a"
+    f = open(path, mode, **({} if binary else {"newline": "", "encoding": "utf-8"}))
+    f.truncate(position)
+    return f
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def format_for(output: Path) -> str:
+    """Output format from the file extension (``.ndjson``/``.jsonl``, ``.csv``, ``.parquet``)."""
+    suffix = output.suffix.lower()
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if suffix in (".csv", ".parquet"):
+        return suffix[1:]
+    raise ExportError(f"cannot tell the format of {output}, pass --format")
+
+
+class AlarmSource:
+    """Pages of an alarm filter, as ``Alarm`` objects."""
+    columns = ALARM_COLUMNS
+    types = ALARM_TYPES
+
+    def __init__(self, client, entry: CatalogEntry, page_size: int, mode: str):
+        self.client = client
+        self.entry = entry
+        self.page_size = page_size
+        self.mode = mode
+
+    def request(self, state: Checkpoint) -> SearchRequest:
+        request: SearchRequest = self.entry.request
+        if self.mode == "page":
+            return request.model_copy(update={"limit": Pagination(size=self.page_size, start=state.page)})
+        filter_data = request.filter
+        if state.watermark is not None:
+            since = Filter(gte={WATERMARK_FIELD: state.watermark}).model_dump(by_alias=True, exclude_none=True)
+            filter_data = {"and": [filter_data, since]} if filter_data else since
+        return request.model_copy(update={
+            "filter": filter_data,
+            "limit": Pagination(size=self.page_size, start=1),
+            "sort": [SearchSort(field=WATERMARK_FIELD, order="ASC")],
+        })
+
+    def pages(self, state: Checkpoint, prefetch: int) -> AsyncIterator[Tuple[int, List[Alarm]]]:
+        return self.client.iter_alarm_pages(self.request(state), prefetch=prefetch)
+
+    @staticmethod
+    def row(alarm: Alarm) -> List[Any]:
+        return [alarm.id, alarm.entity_id, alarm.name, alarm.severity, alarm.status,
+                alarm.creation_date, alarm.rule, alarm.description]
+
+    def document(self, alarm: Alarm) -> dict:
+        return dict(zip(self.columns, self.row(alarm)))
+
+    def skip(self, state: Checkpoint, alarms: List[Alarm]) -> List[Alarm]:
+        """Drop alarms already written before a watermark resume."""
+        if self.mode != "watermark" or not state.seen:
+            return alarms
+        seen = set(state.seen)
+        return [alarm for alarm in alarms if alarm.id not in seen]
+
+    def advance(self, state: Checkpoint, page: int, alarms: List[Alarm]) -> None:
+        state.page = page + 1
+        if self.mode != "watermark":
+            return
+        # Pages arrive sorted by openingDate, so the watermark only moves forward
+        for alarm in alarms:
+            opened = alarm.creation_date.isoformat().replace("+00:00", "Z")
+            if opened != state.watermark:
+                state.watermark, state.seen = opened, []
+            state.seen.append(alarm.id)
+
+
+class EntitySource:
+    """Pages of an entity filter; tabular formats get the filter's select columns."""
+    types: List[str]
+
+    def __init__(self, helper, entry: CatalogEntry, page_size: int, mode: str):
+        if mode != "page":
+            raise ExportError("entity exports can only be checkpointed by page")
+        self.helper = helper
+        self.entry = entry
+        self.page_size = page_size
+        self.columns = entry.plan.headers
+        self.types = ["string"] * len(self.columns)
+
+    def pages(self, state: Checkpoint, prefetch: int) -> AsyncIterator[Tuple[int, List[dict]]]:
+        request = {**self.entry.request, "limit": {"size": self.page_size, "start": state.page}}
+        # An export must not mix in last-known pages, so unavailability is raised
+        return self.helper.iter_entity_pages(request, prefetch=prefetch, allow_stale=False)
+
+    def row(self, entity: dict) -> List[Any]:
+        return list(self.entry.plan.row(entity))
+
+    @staticmethod
+    def document(entity: dict) -> dict:
+        return entity
+
+    @staticmethod
+    def skip(state: Checkpoint, entities: List[dict]) -> List[dict]:
+        return entities
+
+    @staticmethod
+    def advance(state: Checkpoint, page: int, entities: List[dict]) -> None:
+        state.page = page + 1
+
+
+async def export_filter(
+    entry: CatalogEntry,
+    output: Path,
+    fmt: Optional[str] = None,
+    mode: str = "page",
+    resume: bool = False,
+    checkpoint: Optional[Path] = None,
+    client=None,
+    entities_helper=None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    prefetch: int = 1,
+    progress: Optional[Callable[[ExportStats], None]] = None,
+    progress_interval: float = 5.0,
+) -> ExportStats:
+    """Stream every page of a catalog filter into ``output``.
+
+    Each page is written (on a worker thread, while the next pages are
+    already downloading) and the checkpoint updated before the next one is
+    taken, so memory stays at ``prefetch + 1`` pages plus the writer's
+    buffer. With ``resume`` an existing checkpoint for the same filter,
+    format and mode is continued; otherwise the output is started over. The
+    checkpoint is removed when the export completes. Requests run at
+    ``Priority.BULK``.
+    """
+    if entry.error is not None:
+        raise ExportError(f"{entry.kind}/{entry.name} is invalid: {entry.error}")
+    if mode not in CHECKPOINT_MODES:
+        raise ExportError(f"unknown checkpoint mode {mode!r}")
+    fmt = fmt or format_for(output)
+    if fmt not in WRITERS:
+        raise ExportError(f"unknown format {fmt!r}")
+    checkpoint = checkpoint or output.with_name(output.name + ".checkpoint")
+
+    state = Checkpoint(entry.kind, entry.key, fmt, mode)
+    saved = Checkpoint.load(checkpoint) if resume else None
+    if saved is not None:
+        if not saved.matches(state):
+            raise ExportError(f"{checkpoint} belongs to another export ({saved.kind}/{saved.format}/{saved.mode})")
+        state = saved
+        logger.info(f"Resuming export of {entry.kind}/{entry.name} at page {state.page} after {state.rows} rows")
+
+    if entry.kind == "alarms":
+        source = AlarmSource(client, entry, page_size, mode)
+    else:
+        source = EntitySource(entities_helper, entry, page_size, mode)
+    writer = WRITERS[fmt](output, source.columns, source.types, position=state.position)
+    stats = ExportStats(rows=state.rows, resumed_rows=state.rows)
+    convert = source.row if writer.tabular else source.document
+
+    def write(records: list) -> None:
+        writer.write([convert(record) for record in records])
+
+    started = time.perf_counter()
+    reported = started
+    try:
+        with request_priority(Priority.BULK):
+            async with aclosing(source.pages(state, prefetch)) as pages:
+                async for page, records in pages:
+                    records = source.skip(state, records)
+                    if records:
+                        await asyncio.to_thread(write, records)
+                    source.advance(state, page, records)
+                    state.rows += len(records)
+                    stats.rows, stats.pages = state.rows, stats.pages + 1
+                    position = writer.durable()
+                    if position is not None:
+                        state.position = position
+                        state.save(checkpoint)
+                    now = time.perf_counter()
+                    if progress is not None and now - reported >= progress_interval:
+                        stats.elapsed, reported = now - started, now
+                        progress(stats)
+        await asyncio.to_thread(writer.close)
+    except BaseException:
+        writer.abort()
+        raise
+    checkpoint.unlink(missing_ok=True)
+    stats.elapsed = time.perf_counter() - started
+    logger.info(
+        f"Exported {stats.rows} {entry.kind} from {entry.name} to {output} in {stats.elapsed:.1f}s "
+        f"({stats.rows_per_second:,.0f} rows/s)"
+    )
+    return stats
+
+
+def _resolve(catalog: FilterCatalog, kind: str, name: str) -> CatalogEntry:
+    entry = catalog.get(kind, name) or catalog.get(kind, f"{name}.json")
+    if entry is None:
+        available = ", ".join(entry.label for entry in catalog.entries(kind)) or "none"
+        raise ExportError(f"no {kind} filter named {name!r} in {catalog.root} (available: {available})")
+    return entry
+
+
+def _print_progress(stats: ExportStats) -> None:
+    print(f"{stats.rows:>12,} rows  {stats.pages:>8,} pages  {stats.rows_per_second:>10,.0f} rows/s", file=sys.stderr)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="opengate-export",
+        description="Export every alarm or entity matching a saved filter to NDJSON, CSV or Parquet.",
+    )
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("filter", help="filter file name under FILTERS/KIND, with or without .json")
+    parser.add_argument("-o", "--output", type=Path, required=True,
+                        help="output file (a directory of part files for Parquet)")
+    parser.add_argument("-f", "--format", choices=FORMATS, help="default: from the output extension")
+    parser.add_argument("--filters", type=Path, default=Path("filters"), help="filter directory (default: filters)")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--prefetch", type=int, default=1, help="pages downloaded ahead of the one being written")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint of an interrupted export")
+    parser.add_argument("--checkpoint", type=Path, help="checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument("--checkpoint-by", choices=CHECKPOINT_MODES, default="page",
+                        help="resume by page number, or by openingDate watermark (alarms only)")
+    parser.add_argument("--progress", type=float, default=5.0, metavar="SECONDS",
+                        help="print rows/s every SECONDS (0 to disable)")
+    return parser.parse_args(argv)
+
+
+async def _run(args: argparse.Namespace) -> ExportStats:
+    from .client import OpenGateAlarmClient
+    from .og_data import OpenGateDataHelper
+
+    catalog = FilterCatalog(args.filters)
+    catalog.refresh()
+    entry = _resolve(catalog, args.kind, args.filter)
+    checkpoint = args.checkpoint or args.output.with_name(args.output.name + ".checkpoint")
+    if checkpoint.exists() and not args.resume:
+        raise ExportError(f"an interrupted export left {checkpoint}: pass --resume, or delete it to start over")
+    # No cache or snapshots: every page is read once and would only fill memory and disk
+    async with OpenGateAlarmClient() as client:
+        helper = OpenGateDataHelper()
+        try:
+            return await export_filter(
+                entry,
+                args.output,
+                fmt=args.format,
+                mode=args.checkpoint_by,
+                resume=args.resume,
+                checkpoint=checkpoint,
+                client=client,
+                entities_helper=helper,
+                page_size=args.page_size,
+                prefetch=args.prefetch,
+                progress=_print_progress if args.progress > 0 else None,
+                progress_interval=args.progress,
+            )
+        finally:
+            await helper.aclose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    configure_logging(console=False)
+    try:
+        stats = asyncio.run(_run(args))
+    except ExportError as e:
+        print(f"opengate-export: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("opengate-export: interrupted, continue with --resume", file=sys.stderr)
+        return 130
+    except Exception as e:
+        logger.error(f"Export failed: {e}", exc_info=True)
+        print(f"opengate-export: {e} (continue with --resume)", file=sys.stderr)
+        return 1
+    print(f"{stats.rows:,} rows in {stats.elapsed:.1f}s ({stats.rows_per_second:,.0f} rows/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
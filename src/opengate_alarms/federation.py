@@ -0,0 +1,324 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+from contextlib import aclosing
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+from .client import OpenGateAlarmClient
+from .metrics import Instrumentation
+from .models import ALARM_FIELDS, Alarm, SearchRequest, SearchSort
+from .og_data import OpenGateDataHelper
+from .ratelimit import RequestScheduler
+from .resilience import Resilience
+
+logger = logging.getLogger("opengate_alarms.federation")
+
+# Path of a JSON file with the list of tenants
+TENANTS_ENV = "OPENGATE_TENANTS"
+
+
+@dataclass
+class TenantConfig:
+    """One OpenGate organization and endpoint of a federation.
+
+    ``api_key_env`` names the environment variable holding the API key, so
+    tenant files need not contain secrets; ``api_key`` takes precedence.
+    ``rate_limit`` (requests per second) gives the tenant its own
+    ``RequestScheduler``; without it ``OPENGATE_RATE_LIMIT`` applies.
+    """
+    name: str
+    base_url: str
+    api_key: Optional[str] = None
+    api_key_env: Optional[str] = None
+    organization: Optional[str] = None
+    rate_limit: Optional[float] = None
+    max_connections: int = 10
+    verify_ssl: bool = True
+
+    def resolve_api_key(self) -> Optional[str]:
+        return self.api_key or (os.getenv(self.api_key_env) if self.api_key_env else None)
+
+
+def load_tenants(path: Union[str, Path]) -> List[TenantConfig]:
+    """Tenants from a JSON file holding a list of objects with ``TenantConfig``'s fields."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of tenants")
+    names = {f.name for f in fields(TenantConfig)}
+    tenants = []
+    for item in data:
+        if not isinstance(item, dict) or not {"name", "base_url"} <= item.keys():
+            raise ValueError(f"{path}: every tenant needs a 'name' and a 'base_url'")
+        unknown = item.keys() - names
+        if unknown:
+            raise ValueError(f"{path}: unknown tenant fields {', '.join(sorted(unknown))}")
+        tenants.append(TenantConfig(**item))
+    duplicates = sorted({t.name for t in tenants if sum(u.name == t.name for u in tenants) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate tenant names {', '.join(duplicates)}")
+    return tenants
+
+
+class _SortKey:
+    """Orders alarms like the server does for a ``sort`` list; missing values go last."""
+    __slots__ = ("values", "descending")
+
+    def __init__(self, values: tuple, descending: Tuple[bool, ...]):
+        self.values = values
+        self.descending = descending
+
+    def __lt__(self, other: "_SortKey") -> bool:
+        for a, b, descending in zip(self.values, other.values, self.descending):
+            if a == b:
+                continue
+            if a is None or b is None:
+                return b is None
+            return a > b if descending else a < b
+        return False
+
+    def __eq__(self, other: object) -> bool:
+        # Heap entries are tuples: equal keys fall through to the tenant index
+        return isinstance(other, _SortKey) and self.values == other.values
+
+
+def alarm_sort_key(sort: Sequence[SearchSort]) -> Callable[[Alarm], _SortKey]:
+    """Key function merging per-tenant streams that the server sorted by ``sort``."""
+    attributes = []
+    for item in sort:
+        name = item.field[len("alarm."):] if item.field.startswith("alarm.") else item.field
+        if name not in ALARM_FIELDS:
+            raise ValueError(f"Cannot merge results sorted by '{item.field}'")
+        attributes.append(ALARM_FIELDS[name])
+    descending = tuple(item.order.upper().startswith("DESC") for item in sort)
+
+    def key(alarm: Alarm) -> _SortKey:
+        return _SortKey(tuple(getattr(alarm, attribute) for attribute in attributes), descending)
+    return key
+
+
+class FederatedClient:
+    """Runs the same search against several OpenGate tenants at once.
+
+    Every tenant gets its own ``OpenGateAlarmClient`` (and, on first entity
+    search, ``OpenGateDataHelper``): its own connection pool of
+    ``max_connections``, its own circuit breakers and, with ``rate_limit``,
+    its own request budget, so a slow or failing tenant does not hold up
+    the others. Results are yielded as ``(tenant name, item)`` pairs.
+    """
+
+    def __init__(
+        self,
+        tenants: Sequence[TenantConfig],
+        instrumentation: Optional[Instrumentation] = None,
+        buffer: int = 1000,
+    ):
+        if not tenants:
+            raise ValueError("a federation needs at least one tenant")
+        self.tenants = {tenant.name: tenant for tenant in tenants}
+        self.instrumentation = instrumentation or Instrumentation()
+        # Items read ahead of the consumer across all tenants in unsorted mode
+        self.buffer = buffer
+        self.clients: Dict[str, OpenGateAlarmClient] = {
+            tenant.name: self._alarm_client(tenant) for tenant in tenants
+        }
+        self._helpers: Dict[str, OpenGateDataHelper] = {}
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional["FederatedClient"]:
+        """Federation of the tenants in the file named by ``OPENGATE_TENANTS``, or None when unset."""
+        path = os.getenv(TENANTS_ENV)
+        if not path:
+            return None
+        return cls(load_tenants(path), **kwargs)
+
+    def _alarm_client(self, tenant: TenantConfig) -> OpenGateAlarmClient:
+        client = OpenGateAlarmClient(
+            api_key=tenant.resolve_api_key(),
+            base_url=tenant.base_url,
+            limits=httpx.Limits(max_connections=tenant.max_connections, max_keepalive_connections=tenant.max_connections),
+            resilience=Resilience(),
+            scheduler=RequestScheduler(rate=tenant.rate_limit) if tenant.rate_limit else None,
+            instrumentation=self.instrumentation,
+        )
+        # Read from OPENGATE_VERIFY_SSL otherwise; the pool is created on first use
+        client.verify_ssl = tenant.verify_ssl
+        return client
+
+    def helper(self, name: str) -> OpenGateDataHelper:
+        """Entity helper of tenant ``name``, created on first use."""
+        if name not in self._helpers:
+            tenant = self.tenants[name]
+            base_url = tenant.base_url.rstrip("/")
+            helper = OpenGateDataHelper(
+                api_key=tenant.resolve_api_key(),
+                base_url=base_url[:-len("/north/v80")] if base_url.endswith("/north/v80") else base_url,
+                organization=tenant.organization,
+                resilience=Resilience(),
+                scheduler=self.clients[name].scheduler,
+                instrumentation=self.instrumentation,
+            )
+            helper.verify_ssl = tenant.verify_ssl
+            self._helpers[name] = helper
+        return self._helpers[name]
+
+    async def aclose(self) -> None:
+        await asyncio.gather(
+            *(client.aclose() for client in self.clients.values()),
+            *(helper.aclose() for helper in self._helpers.values()),
+        )
+
+    async def __aenter__(self) -> "FederatedClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def iter_alarms(
+        self,
+        search_request: Optional[SearchRequest] = None,
+        prefetch: int = 1,
+        errors: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[Tuple[str, Alarm]]:
+        """Every alarm matching the request on every tenant, as ``(tenant, alarm)``.
+
+        All tenants are paged through concurrently (``iter_alarms`` with
+        ``prefetch``). Without ``search_request.sort`` alarms are yielded as
+        they arrive; with it, each tenant's server-sorted stream is merged so
+        the combined stream keeps that order. When ``errors`` is given, a
+        failing tenant is recorded there (name -> error) and the others go
+        on; otherwise the first failure is raised.
+        """
+        if search_request is None:
+            search_request = SearchRequest()
+        streams = {
+            name: (lambda client=client: client.iter_alarms(search_request, prefetch=prefetch))
+            for name, client in self.clients.items()
+        }
+        if search_request.sort:
+            merged = _merge_sorted(streams, alarm_sort_key(search_request.sort), errors)
+        else:
+            merged = _fan_in(streams, self.buffer, errors)
+        async with aclosing(merged) as items:
+            async for item in items:
+                yield item
+
+    async def iter_entities(
+        self,
+        search_request: Dict[str, Any],
+        prefetch: int = 1,
+        errors: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Every page of an entity search on every tenant, as ``(tenant, entity)`` in arrival order.
+
+        Each tenant's search is scoped to its ``organization``.
+        """
+        async def walk(helper: OpenGateDataHelper) -> AsyncIterator[Dict[str, Any]]:
+            async with aclosing(helper.iter_entity_pages(search_request, prefetch=prefetch)) as pages:
+                async for _, entities in pages:
+                    for entity in entities:
+                        yield entity
+
+        streams = {name: (lambda name=name: walk(self.helper(name))) for name in self.tenants}
+        async with aclosing(_fan_in(streams, self.buffer, errors)) as items:
+            async for item in items:
+                yield item
+
+
+def _record_failure(errors: Optional[Dict[str, str]], name: str, error: Exception) -> None:
+    if errors is None:
+        raise error
+    errors[name] = str(error) or type(error).__name__
+    logger.warning(f"Tenant {name} failed: {errors[name]}")
+
+
+_DONE = object()
+
+
+async def _fan_in(
+    streams: Dict[str, Callable[[], AsyncIterator[Any]]],
+    buffer: int,
+    errors: Optional[Dict[str, str]],
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Run every stream concurrently and yield their items tagged, in arrival order.
+
+    The queue is bounded, so a fast tenant waits for the consumer instead of
+    piling up results in memory.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+
+    async def pump(name: str, make: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async with aclosing(make()) as items:
+                async for item in items:
+                    await queue.put((name, item, None))
+        except Exception as e:
+            await queue.put((name, None, e))
+            return
+        await queue.put((name, _DONE, None))
+
+    tasks = [asyncio.create_task(pump(name, make)) for name, make in streams.items()]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            name, item, error = await queue.get()
+            if error is not None:
+                remaining -= 1
+                _record_failure(errors, name, error)
+            elif item is _DONE:
+                remaining -= 1
+            else:
+                yield name, item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _merge_sorted(
+    streams: Dict[str, Callable[[], AsyncIterator[Alarm]]],
+    key: Callable[[Alarm], _SortKey],
+    errors: Optional[Dict[str, str]],
+) -> AsyncIterator[Tuple[str, Alarm]]:
+    """K-way merge of streams that are each already sorted by ``key``.
+
+    Only the head of every stream is held; the streams keep fetching their
+    next pages in the background while the heads are compared.
+    """
+    names = list(streams)
+    iterators = [streams[name]() for name in names]
+    heads: List[Tuple[_SortKey, int, Alarm]] = []
+    failures: List[Tuple[int, Exception]] = []
+
+    async def advance(index: int) -> None:
+        try:
+            alarm = await anext(iterators[index])
+        except StopAsyncIteration:
+            return
+        except Exception as e:
+            failures.append((index, e))
+            return
+        heapq.heappush(heads, (key(alarm), index, alarm))
+
+    def settle() -> None:
+        # After the concurrent first fetch, so no stream is still running when one raises
+        while failures:
+            index, error = failures.pop(0)
+            _record_failure(errors, names[index], error)
+
+    try:
+        await asyncio.gather(*(advance(index) for index in range(len(iterators))))
+        settle()
+        while heads:
+            _, index, alarm = heapq.heappop(heads)
+            yield names[index], alarm
+            await advance(index)
+            settle()
+    finally:
+        await asyncio.gather(*(iterator.aclose() for iterator in iterators), return_exceptions=True)
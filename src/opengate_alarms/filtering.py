@@ -0,0 +1,211 @@
+import operator
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from .frame import CATEGORICAL_FIELDS, AlarmFrame, _to_us
+from .models import ALARM_FIELDS, Filter
+
+_COMPARISONS = {"gt": operator.gt, "lt": operator.lt, "gte": operator.ge, "lte": operator.le}
+_OPERATORS = ("eq", "neq", "like", "in", "nin", "exists", *_COMPARISONS)
+
+
+class UnsupportedFilter(ValueError):
+    """The filter uses a field or operator that can only be evaluated by the server."""
+
+
+def alarm_attribute(field: str) -> str:
+    name = field[len("alarm."):] if field.startswith("alarm.") else field
+    try:
+        return ALARM_FIELDS[name]
+    except KeyError:
+        raise UnsupportedFilter(f"Field '{field}' cannot be evaluated locally") from None
+
+
+def _as_datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        raise UnsupportedFilter(f"Not a date: {value!r}")
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class _Node:
+    def matches(self, alarm: Any) -> bool:
+        raise NotImplementedError
+
+    def mask(self, frame: AlarmFrame) -> np.ndarray:
+        raise NotImplementedError
+
+
+class _All(_Node):
+    def __init__(self, children: List[_Node]):
+        self.children = children
+
+    def matches(self, alarm: Any) -> bool:
+        return all(child.matches(alarm) for child in self.children)
+
+    def mask(self, frame: AlarmFrame) -> np.ndarray:
+        mask = np.ones(len(frame), dtype=bool)
+        for child in self.children:
+            mask &= child.mask(frame)
+        return mask
+
+
+class _Any(_Node):
+    def __init__(self, children: List[_Node]):
+        self.children = children
+
+    def matches(self, alarm: Any) -> bool:
+        return any(child.matches(alarm) for child in self.children)
+
+    def mask(self, frame: AlarmFrame) -> np.ndarray:
+        mask = np.zeros(len(frame), dtype=bool)
+        for child in self.children:
+            mask |= child.mask(frame)
+        return mask
+
+
+class _Condition(_Node):
+    """One ``operator: {field: value}`` test."""
+
+    def __init__(self, op: str, field: str, value: Any):
+        self.op = op
+        self.attribute = alarm_attribute(field)
+        self.is_date = self.attribute == "creation_date"
+        if op in ("in", "nin"):
+            if not isinstance(value, (list, tuple, set)):
+                raise UnsupportedFilter(f"'{op}' needs a list of values")
+            value = [_as_datetime(v) for v in value] if self.is_date else list(value)
+        elif op == "like":
+            if self.is_date:
+                raise UnsupportedFilter("'like' on dates cannot be evaluated locally")
+            value = re.compile(str(value))
+        elif op == "exists":
+            value = bool(value)
+        elif self.is_date:
+            value = _as_datetime(value)
+        self.value = value
+        self.test = self._scalar_test()
+
+    def _scalar_test(self) -> Callable[[Any], bool]:
+        op, value = self.op, self.value
+        if op == "eq":
+            return lambda v: v == value
+        if op == "neq":
+            return lambda v: v is not None and v != value
+        if op == "in":
+            wanted = set(value)
+            return lambda v: v in wanted
+        if op == "nin":
+            unwanted = set(value)
+            return lambda v: v is not None and v not in unwanted
+        if op == "like":
+            # OpenGate 'like' is a regular expression matched anywhere in the value
+            return lambda v: v is not None and value.search(str(v)) is not None
+        if op == "exists":
+            return lambda v: (v is not None) == value
+        compare = _COMPARISONS[op]
+
+        def test(v: Any) -> bool:
+            try:
+                return v is not None and compare(v, value)
+            except TypeError:
+                return False
+
+        return test
+
+    def matches(self, alarm: Any) -> bool:
+        value = getattr(alarm, self.attribute)
+        if self.is_date and value is not None:
+            value = _as_datetime(value)
+        return self.test(value)
+
+    def mask(self, frame: AlarmFrame) -> np.ndarray:
+        if self.attribute in CATEGORICAL_FIELDS:
+            # Evaluate once per distinct value, then select rows through the index
+            categories = frame.categories(self.attribute)
+            codes = [code for code, category in enumerate(categories) if self.test(category)]
+            return frame.index(self.attribute).mask(codes)
+        if self.is_date:
+            return self._date_mask(frame)
+        if self.op in ("eq", "in") and self.attribute == "id":
+            values = [self.value] if self.op == "eq" else self.value
+            return frame.index("id").mask_values(values)
+        column = frame.column(self.attribute)
+        return np.fromiter((self.test(v) for v in column), dtype=bool, count=len(column))
+
+    def _date_mask(self, frame: AlarmFrame) -> np.ndarray:
+        stamps = frame.creation_date.view(np.int64)
+        present = ~np.isnat(frame.creation_date)
+        op = self.op
+        if op == "exists":
+            return present if self.value else ~present
+        if op in ("in", "nin"):
+            hit = np.isin(stamps, [_to_us(v) for v in self.value]) & present
+            return hit if op == "in" else present & ~hit
+        target = _to_us(self.value)
+        if op == "eq":
+            return present & (stamps == target)
+        if op == "neq":
+            return present & (stamps != target)
+        return present & _COMPARISONS[op](stamps, target)
+
+
+class CompiledFilter:
+    """A filter compiled for local evaluation against alarms already in memory.
+
+    ``matches()`` tests one ``Alarm`` (or ``AlarmRecord``); ``mask()`` and
+    ``select()`` evaluate the whole filter over an ``AlarmFrame`` with array
+    operations. Categorical fields are tested once per distinct value and
+    ``eq``/``in`` on identifiers go through the frame's hash index.
+    """
+
+    def __init__(self, root: _Node, source: Dict[str, Any]):
+        self._root = root
+        self.source = source
+
+    def matches(self, alarm: Any) -> bool:
+        return self._root.matches(alarm)
+
+    def apply(self, alarms: Iterable[Any]) -> List[Any]:
+        return [alarm for alarm in alarms if self._root.matches(alarm)]
+
+    def mask(self, frame: AlarmFrame) -> np.ndarray:
+        return self._root.mask(frame)
+
+    def select(self, frame: AlarmFrame) -> AlarmFrame:
+        return frame.filter(self.mask(frame))
+
+
+def _compile_node(data: Dict[str, Any]) -> _Node:
+    if not isinstance(data, dict):
+        raise UnsupportedFilter(f"Unexpected filter element: {data!r}")
+    children: List[_Node] = []
+    for key, value in data.items():
+        if key in ("and", "or"):
+            nodes = [_compile_node(item) for item in value]
+            children.append(_All(nodes) if key == "and" else _Any(nodes))
+        elif key in _OPERATORS:
+            if not isinstance(value, dict):
+                raise UnsupportedFilter(f"'{key}' needs a {{field: value}} object")
+            children.extend(_Condition(key, field, operand) for field, operand in value.items())
+        else:
+            raise UnsupportedFilter(f"Operator '{key}' cannot be evaluated locally")
+    # Several operators or fields in one object must all hold
+    return children[0] if len(children) == 1 else _All(children)
+
+
+def compile_filter(filter_data: Optional[Union[Filter, Dict[str, Any]]]) -> CompiledFilter:
+    """Compile a ``Filter`` or filter-JSON dict into a local predicate.
+
+    Raises ``UnsupportedFilter`` when the filter references fields or
+    operators that only the server can evaluate; callers should then query
+    the server instead.
+    """
+    if isinstance(filter_data, Filter):
+        filter_data = filter_data.model_dump(by_alias=True, exclude_none=True)
+    filter_data = filter_data or {}
+    return CompiledFilter(_compile_node(filter_data), filter_data)
@@ -0,0 +1,311 @@
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .decoding import AlarmRecord
+from .models import Alarm, AlarmSummary, AlarmSummaryGroup, AlarmSummaryItem
+
+# Columns stored as integer codes into a small table of distinct values
+CATEGORICAL_FIELDS = ("entity_id", "name", "severity", "status", "rule")
+# Names the server summary uses for the groups of these columns
+SUMMARY_KEYS = {"entity_id": "entityIdentifier"}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+_NAT = np.iinfo(np.int64).min
+
+AlarmLike = Union[Alarm, AlarmRecord]
+
+
+def _to_us(value: Optional[datetime]) -> int:
+    if value is None:
+        return _NAT
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _US
+
+
+class SummaryMismatch(NamedTuple):
+    group: str
+    name: str
+    local: int
+    server: int
+
+
+class _Encoder:
+    """Assigns consecutive integer codes to the distinct values of one column."""
+
+    def __init__(self):
+        self.codes = array("i")
+        self.values: List[Optional[str]] = []
+        self._index: Dict[Optional[str], int] = {}
+
+    def append(self, value: Optional[str]) -> None:
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+
+class FieldIndex:
+    """Row positions grouped by value code for one column, built with a single sort.
+
+    ``mask(codes)`` marks the rows holding any of ``codes`` without scanning
+    the column; ``mask_values(values)`` does the same by value.
+    """
+
+    def __init__(self, codes: np.ndarray, lookup: Dict[Any, int]):
+        self._lookup = lookup
+        self._order = np.argsort(codes, kind="stable")
+        self._bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(lookup)))))
+        self._length = len(codes)
+
+    def positions(self, code: int) -> np.ndarray:
+        return self._order[self._bounds[code]:self._bounds[code + 1]]
+
+    def mask(self, codes: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self._length, dtype=bool)
+        for code in codes:
+            mask[self.positions(code)] = True
+        return mask
+
+    def mask_values(self, values: Iterable[Any]) -> np.ndarray:
+        return self.mask(self._lookup[value] for value in values if value in self._lookup)
+
+
+class AlarmFrame:
+    """Columnar, NumPy-backed view of a set of alarms for fast aggregation.
+
+    ``creation_date`` is a ``datetime64[us]`` array (UTC, ``NaT`` when
+    missing). ``entity_id``, ``name``, ``severity``, ``status`` and ``rule``
+    are stored as ``int32`` codes plus a table of their distinct values, so
+    counting and filtering are integer array operations. Identifiers and
+    descriptions are kept as object arrays to rebuild ``Alarm`` models.
+
+    Build one with ``from_alarms()`` or, without materialising the models of
+    every page, ``await AlarmFrame.from_client(client, request)``.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        creation_date: np.ndarray,
+        codes: Dict[str, np.ndarray],
+        categories: Dict[str, np.ndarray],
+        descriptions: np.ndarray,
+    ):
+        self.ids = ids
+        self.creation_date = creation_date
+        self._codes = codes
+        self._categories = categories
+        self.descriptions = descriptions
+        self._indexes: Dict[str, FieldIndex] = {}
+
+    @classmethod
+    def from_alarms(cls, alarms: Iterable[AlarmLike]) -> "AlarmFrame":
+        builder = _FrameBuilder()
+        for alarm in alarms:
+            builder.append(alarm)
+        return builder.build()
+
+    @classmethod
+    async def from_async(cls, alarms: AsyncIterable[AlarmLike]) -> "AlarmFrame":
+        builder = _FrameBuilder()
+        async for alarm in alarms:
+            builder.append(alarm)
+        return builder.build()
+
+    @classmethod
+    async def from_client(cls, client, search_request=None, prefetch: int = 1) -> "AlarmFrame":
+        """Walk every page of ``search_request`` with ``client.iter_alarms`` into a frame."""
+        return await cls.from_async(client.iter_alarms(search_request, prefetch=prefetch))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def codes(self, field: str) -> np.ndarray:
+        return self._codes[field]
+
+    def categories(self, field: str) -> np.ndarray:
+        return self._categories[field]
+
+    def column(self, field: str) -> np.ndarray:
+        """Decoded values of a column (object array for the categorical ones)."""
+        if field == "id":
+            return self.ids
+        if field == "creation_date":
+            return self.creation_date
+        if field == "description":
+            return self.descriptions
+        return self._categories[field][self._codes[field]]
+
+    def index(self, field: str) -> FieldIndex:
+        """Hash index of a categorical column or of ``id``, built on first use."""
+        index = self._indexes.get(field)
+        if index is None:
+            if field == "id":
+                lookup: Dict[Any, int] = {}
+                codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in self.ids), dtype=np.int64, count=len(self))
+            else:
+                lookup = {value: code for code, value in enumerate(self._categories[field])}
+                codes = self._codes[field]
+            index = self._indexes[field] = FieldIndex(codes, lookup)
+        return index
+
+    # Filtering
+
+    def _category_codes(self, field: str, values: Iterable[Any]) -> np.ndarray:
+        wanted = set(values)
+        categories = self._categories[field]
+        return np.fromiter((code for code, value in enumerate(categories) if value in wanted), dtype=np.int32)
+
+    def mask_eq(self, field: str, value: Any) -> np.ndarray:
+        return self.mask_in(field, (value,))
+
+    def mask_in(self, field: str, values: Iterable[Any]) -> np.ndarray:
+        if field in self._codes:
+            # Compare against the few matching codes, not every string
+            return np.isin(self._codes[field], self._category_codes(field, values))
+        return np.isin(self.column(field), np.array(list(values), dtype=object))
+
+    def mask_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+        """Alarms opened in ``[start, end)``; either bound may be omitted."""
+        stamps = self.creation_date.view(np.int64)
+        mask = stamps != _NAT
+        if start is not None:
+            mask &= stamps >= _to_us(start)
+        if end is not None:
+            mask &= stamps < _to_us(end)
+        return mask
+
+    def filter(self, mask: np.ndarray) -> "AlarmFrame":
+        """Rows where ``mask`` is true (or the given row indices). Categories are shared."""
+        return AlarmFrame(
+            self.ids[mask],
+            self.creation_date[mask],
+            {field: codes[mask] for field, codes in self._codes.items()},
+            self._categories,
+            self.descriptions[mask],
+        )
+
+    # Aggregation
+
+    def counts(self, field: str) -> Dict[Optional[str], int]:
+        """Number of alarms per value of a categorical column, most frequent first."""
+        categories = self._categories[field]
+        counts = np.bincount(self._codes[field], minlength=len(categories))
+        order = np.argsort(-counts, kind="stable")
+        return {categories[code]: int(counts[code]) for code in order if counts[code]}
+
+    def group_by(self, *fields: str) -> Dict[Tuple[Optional[str], ...], int]:
+        """Number of alarms per combination of categorical values, most frequent first."""
+        if not fields:
+            raise ValueError("group_by needs at least one field")
+        sizes = [len(self._categories[field]) for field in fields]
+        keys = np.zeros(len(self), dtype=np.int64)
+        for field, size in zip(fields, sizes):
+            keys = keys * size + self._codes[field]
+        unique, counts = np.unique(keys, return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        combos = np.unravel_index(unique[order], sizes) if len(unique) else [[] for _ in fields]
+        names = [self._categories[field][codes] for field, codes in zip(fields, combos)]
+        return {tuple(values): int(count) for *values, count in zip(*names, counts[order])}
+
+    def histogram(self, bucket: timedelta, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Alarms per ``bucket`` of ``creation_date``, aligned to the Unix epoch.
+
+        Returns the bucket start times (``datetime64[us]``) and the counts,
+        including empty buckets between the first and last alarm.
+        """
+        size = bucket // _US
+        if size <= 0:
+            raise ValueError("bucket must be positive")
+        stamps = self.creation_date.view(np.int64)
+        valid = stamps != _NAT
+        if mask is not None:
+            valid &= mask
+        slots = stamps[valid] // size
+        if not len(slots):
+            return np.array([], dtype="datetime64[us]"), np.array([], dtype=np.int64)
+        first = slots.min()
+        counts = np.bincount(slots - first)
+        starts = ((first + np.arange(len(counts))) * size).astype("datetime64[us]")
+        return starts, counts
+
+    # Comparison with the server
+
+    def summary(self, fields: Sequence[str] = ("severity", "status")) -> AlarmSummary:
+        """Local counterpart of ``client.get_summary()`` for the same alarms."""
+        groups = []
+        for field in fields:
+            items = [AlarmSummaryGroup(name=str(name), count=count) for name, count in self.counts(field).items() if name is not None]
+            groups.append({SUMMARY_KEYS.get(field, field): AlarmSummaryItem(count=len(self), list=items)})
+        return AlarmSummary(date=datetime.now(timezone.utc), count=len(self), summary_group=groups)
+
+    def summary_mismatches(self, server: AlarmSummary) -> List[SummaryMismatch]:
+        """Differences between this frame and a server summary of the same filter.
+
+        Compares the total and every group/name the server reports for the
+        categorical columns. An empty list means the local copy agrees.
+        """
+        mismatches = []
+        if server.count != len(self):
+            mismatches.append(SummaryMismatch("count", "", len(self), server.count))
+        fields = {SUMMARY_KEYS.get(field, field): field for field in CATEGORICAL_FIELDS}
+        for group in server.summary_group:
+            for key, item in group.items():
+                field = fields.get(key)
+                if field is None:
+                    continue
+                local = {str(name): count for name, count in self.counts(field).items()}
+                for entry in item.list:
+                    if local.get(entry.name, 0) != entry.count:
+                        mismatches.append(SummaryMismatch(key, entry.name, local.get(entry.name, 0), entry.count))
+        return mismatches
+
+    # Back to models
+
+    def alarm(self, index: int) -> Alarm:
+        stamp = int(self.creation_date.view(np.int64)[index])
+        values = {field: self._categories[field][self._codes[field][index]] for field in CATEGORICAL_FIELDS}
+        return Alarm(
+            id=self.ids[index],
+            creation_date=_EPOCH + timedelta(microseconds=stamp) if stamp != _NAT else None,
+            description=self.descriptions[index],
+            **values,
+        )
+
+    def to_alarms(self) -> List[Alarm]:
+        return [self.alarm(index) for index in range(len(self))]
+
+
+class _FrameBuilder:
+    def __init__(self):
+        self.ids: List[str] = []
+        self.dates = array("q")
+        self.descriptions: List[Optional[str]] = []
+        self.encoders = {field: _Encoder() for field in CATEGORICAL_FIELDS}
+
+    def append(self, alarm: AlarmLike) -> None:
+        self.ids.append(alarm.id)
+        self.dates.append(_to_us(alarm.creation_date))
+        self.descriptions.append(alarm.description)
+        for field, encoder in self.encoders.items():
+            encoder.append(getattr(alarm, field))
+
+    def build(self) -> AlarmFrame:
+        def objects(values: List[Any]) -> np.ndarray:
+            result = np.empty(len(values), dtype=object)
+            result[:] = values
+            return result
+
+        return AlarmFrame(
+            objects(self.ids),
+            np.frombuffer(self.dates, dtype=np.int64).view("datetime64[us]"),
+            {field: np.frombuffer(encoder.codes, dtype=np.int32) for field, encoder in self.encoders.items()},
+            {field: objects(encoder.values) for field, encoder in self.encoders.items()},
+            objects(self.descriptions),
+        )
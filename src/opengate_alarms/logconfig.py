@@ -0,0 +1,138 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_LOG_PATH = "opengate_alarms.log"
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Logger for lines written once per API call; these are rate limited
+REQUEST_LOGGER = "opengate_alarms.requests"
+# httpx logs one INFO line per HTTP request as well
+RATE_LIMITED_LOGGERS = (REQUEST_LOGGER, "httpx")
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through ``rate`` records per second of each message template, bursting to ``burst``.
+
+    Records are keyed by logger and unformatted message, so per-request lines
+    must use ``%s`` arguments rather than f-strings. The first record let
+    through after some were dropped says how many were suppressed.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 5, clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (tokens, last update, records dropped since the last one let through)
+        self._state: Dict[Tuple[str, str], Tuple[float, float, int]] = {}
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, str(record.msg))
+        now = self._clock()
+        with self._lock:
+            if key not in self._state and len(self._state) >= 1024:
+                # Many distinct templates: someone is logging f-strings here
+                self._state.clear()
+            tokens, updated, dropped = self._state.get(key, (float(self.burst), now, 0))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._state[key] = (tokens, now, dropped + 1)
+                self.suppressed += 1
+                return False
+            self._state[key] = (tokens - 1, now, 0)
+        if dropped:
+            record.msg = f"{record.msg} ({dropped} similar messages suppressed)"
+        return True
+
+
+class _ThreadQueueHandler(QueueHandler):
+    """Queues records as they are, so messages are formatted on the listener thread.
+
+    The stock ``prepare()`` formats every record in the logging thread to
+    make it picklable, which would put payload ``repr`` calls back on the
+    event loop. Arguments must therefore not be mutated after logging.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+_filters: List[Tuple[logging.Logger, RateLimitFilter]] = []
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    path: Optional[str] = None,
+    console: bool = True,
+    max_bytes: int = 5 * 1024 * 1024,
+    backup_count: int = 3,
+    request_rate: float = 1.0,
+    request_burst: int = 5,
+) -> QueueListener:
+    """Route log records through a queue to a rotating file (and stderr) on a background thread.
+
+    Call once at program start; the library itself never configures logging.
+    ``level`` and ``path`` default to ``OPENGATE_LOG_LEVEL`` (INFO) and
+    ``OPENGATE_LOG_FILE`` (``opengate_alarms.log``; ``off`` writes no file).
+    Per-request lines are limited to ``request_rate`` per second per message.
+    Calling it again replaces the previous setup.
+    """
+    global _listener, _handler
+    stop_logging()
+
+    level = level or os.getenv("OPENGATE_LOG_LEVEL", "INFO")
+    path = path if path is not None else os.getenv("OPENGATE_LOG_FILE", DEFAULT_LOG_PATH)
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = []
+    if path and path.strip().lower() not in ("off", "none", "0"):
+        file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        handlers.append(file_handler)
+    if console:
+        handlers.append(logging.StreamHandler(sys.stderr))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _handler = _ThreadQueueHandler(log_queue)
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    for name in RATE_LIMITED_LOGGERS:
+        limiter = RateLimitFilter(request_rate, request_burst)
+        logger = logging.getLogger(name)
+        logger.addFilter(limiter)
+        _filters.append((logger, limiter))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush queued records and remove the handlers added by ``configure_logging``."""
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    for logger, limiter in _filters:
+        logger.removeFilter(limiter)
+    _filters.clear()
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,320 @@
+import asyncio
+import bisect
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+logger = logging.getLogger("opengate_alarms.metrics")
+
+# Upper bounds in seconds of the phase histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Recent observations kept per histogram to report exact quantiles
+WINDOW = 1024
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative bucket counts (for Prometheus) plus a window of recent values (for quantiles)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = WINDOW):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantile ``q`` (0-1) of the recent window, or None before any observation."""
+        if not self.recent:
+            return None
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class MetricsRegistry:
+    """In-process store of labelled counters and histograms.
+
+    Export with ``to_prometheus()`` (text exposition format) or
+    ``to_json()``. ``quantiles(name)`` summarises a histogram per label set,
+    which is what the TUI diagnostics screen shows.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    @staticmethod
+    def _key(labels: Dict[str, Any]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, description: str = "", **labels: Any) -> None:
+        with self._lock:
+            self._help.setdefault(name, description)
+            series = self._counters.setdefault(name, {})
+            key = self._key(labels)
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, description: str = "", **labels: Any) -> None:
+        with self._lock:
+            self._help.setdefault(name, description)
+            series = self._histograms.setdefault(name, {})
+            key = self._key(labels)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def counter(self, name: str, **labels: Any) -> float:
+        return self._counters.get(name, {}).get(self._key(labels), 0.0)
+
+    def histogram(self, name: str, **labels: Any) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(self._key(labels))
+
+    def quantiles(self, name: str, qs: Sequence[float] = (0.5, 0.95)) -> List[Tuple[Dict[str, str], int, List[Optional[float]]]]:
+        """``(labels, count, [quantile per q])`` for every series of histogram ``name``."""
+        with self._lock:
+            return [
+                (dict(key), histogram.count, [histogram.quantile(q) for q in qs])
+                for key, histogram in sorted(self._histograms.get(name, {}).items())
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": h.count,
+                        "sum": h.sum,
+                        "buckets": dict(zip([*map(str, h.buckets), "+Inf"], _cumulative(h.counts))),
+                        "p50": h.quantile(0.5),
+                        "p95": h.quantile(0.95),
+                    }
+                    for key, h in sorted(series.items())
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines += [f"# HELP {name} {self._help.get(name, '')}", f"# TYPE {name} counter"]
+                lines += [f"{name}{_labels(key)} {_number(value)}" for key, value in sorted(series.items())]
+            for name, series in sorted(self._histograms.items()):
+                lines += [f"# HELP {name} {self._help.get(name, '')}", f"# TYPE {name} histogram"]
+                for key, h in sorted(series.items()):
+                    for bound, count in zip([*map(_number, h.buckets), "+Inf"], _cumulative(h.counts)):
+                        lines.append(f"{name}_bucket{_labels(key + (('le', bound),))} {count}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(h.sum)}")
+                    lines.append(f"{name}_count{_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def dumps(self) -> str:
+        return json.dumps(self.to_json(), indent=2)
+
+
+def _cumulative(counts: List[int]) -> List[int]:
+    total, result = 0, []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+def _labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# Process-wide registry used unless a client is given its own
+REGISTRY = MetricsRegistry()
+
+
+@dataclass
+class RequestMetrics:
+    """What one API call cost, phase by phase (seconds)."""
+    endpoint: str
+    status: Optional[int] = None
+    attempts: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)
+    bytes_out: int = 0
+    bytes_in: int = 0
+    items: int = 0
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class RequestTrace:
+    """Collects the phases of one API call while it runs.
+
+    Pass ``extensions()`` to each HTTP attempt so httpcore reports connect
+    (DNS resolution included), TLS and time-to-first-byte. ``chunks()`` and
+    ``decoded()`` wrap a streamed body to split download from JSON decoding,
+    and ``timed()`` measures a block such as model validation.
+    """
+
+    def __init__(self, endpoint: str):
+        self.metrics = RequestMetrics(endpoint)
+        self.started = time.perf_counter()
+        self._marks: Dict[str, float] = {}
+
+    async def _hook(self, name: str, info: Dict[str, Any]) -> None:
+        # e.g. "connection.connect_tcp.started" or "http11.receive_response_headers.complete"
+        self._marks[name.partition(".")[2]] = time.perf_counter()
+
+    def extensions(self) -> Dict[str, Any]:
+        """Request extensions for one attempt; a retried call keeps the last attempt's timings."""
+        self._marks.clear()
+        self.metrics.attempts += 1
+        return {"trace": self._hook}
+
+    def _span(self, phase: str, start: str, end: str) -> None:
+        if start in self._marks and end in self._marks:
+            self.metrics.phases[phase] = self._marks[end] - self._marks[start]
+
+    def response(self, request: httpx.Request, response: httpx.Response, body_read: bool = False) -> None:
+        """Record the status and network phases once ``response`` headers (or the whole body) are in."""
+        now = time.perf_counter()
+        self.metrics.status = response.status_code
+        self.metrics.bytes_out = len(request.content)
+        self._span("connect", "connect_tcp.started", "connect_tcp.complete")
+        self._span("tls", "start_tls.started", "start_tls.complete")
+        self._span("ttfb", "send_request_headers.started", "receive_response_headers.complete")
+        headers_at = self._marks.get("receive_response_headers.complete")
+        if body_read:
+            self.metrics.bytes_in = len(response.content)
+            if headers_at is not None:
+                self.metrics.phases["download"] = now - headers_at
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.metrics.phases[phase] = self.metrics.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def timed(self, phase: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    async def chunks(self, source: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        """Pass body chunks through, counting bytes and the time spent waiting for them."""
+        iterator = source.__aiter__()
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.add("download", time.perf_counter() - started)
+                return
+            self.add("download", time.perf_counter() - started)
+            self.metrics.bytes_in += len(chunk)
+            yield chunk
+
+    async def decoded(self, items: AsyncIterable[Any]) -> AsyncIterator[Any]:
+        """Pass parsed items through, charging the time not spent downloading to ``decode``."""
+        iterator = items.__aiter__()
+        while True:
+            started = time.perf_counter()
+            downloaded = self.metrics.phases.get("download", 0.0)
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                item = _END
+            waited = self.metrics.phases.get("download", 0.0) - downloaded
+            self.add("decode", max(0.0, time.perf_counter() - started - waited))
+            if item is _END:
+                return
+            self.metrics.items += 1
+            yield item
+
+
+_END = object()
+
+
+class Instrumentation:
+    """Publishes the ``RequestMetrics`` of every API call to a registry and to hooks.
+
+    Use ``with instrumentation.request("alarms") as trace:`` around one call;
+    on exit the total time (and the error, if any) is recorded, the metrics are
+    added to ``registry`` and each hook is called with them.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, hooks: Optional[List[Callable[[RequestMetrics], None]]] = None):
+        self.registry = registry if registry is not None else REGISTRY
+        self.hooks = list(hooks or [])
+
+    @contextmanager
+    def request(self, endpoint: str) -> Iterator[RequestTrace]:
+        trace = RequestTrace(endpoint)
+        try:
+            yield trace
+        except (GeneratorExit, asyncio.CancelledError):
+            # The caller stopped early (e.g. a stream that was not read to the end)
+            trace.metrics.error = "cancelled"
+            raise
+        except httpx.HTTPStatusError:
+            # The status code already says what went wrong
+            raise
+        except BaseException as e:
+            trace.metrics.error = type(e).__name__
+            raise
+        finally:
+            trace.metrics.phases["total"] = time.perf_counter() - trace.started
+            self.publish(trace.metrics)
+
+    def publish(self, metrics: RequestMetrics) -> None:
+        registry = self.registry
+        endpoint = metrics.endpoint
+        outcome = str(metrics.status) if metrics.error is None else metrics.error
+        registry.inc("opengate_requests_total", description="API calls by endpoint and status (or error)", endpoint=endpoint, status=outcome)
+        if metrics.attempts > 1:
+            registry.inc("opengate_request_retries_total", metrics.attempts - 1, description="Retried HTTP attempts", endpoint=endpoint)
+        for phase, seconds in metrics.phases.items():
+            registry.observe("opengate_request_phase_seconds", seconds, description="Time per phase of an API call", endpoint=endpoint, phase=phase)
+        registry.inc("opengate_request_bytes_total", metrics.bytes_out, description="Request and response body bytes", endpoint=endpoint, direction="out")
+        registry.inc("opengate_request_bytes_total", metrics.bytes_in, description="Request and response body bytes", endpoint=endpoint, direction="in")
+        registry.inc("opengate_response_items_total", metrics.items, description="Items decoded from responses", endpoint=endpoint)
+        for hook in self.hooks:
+            try:
+                hook(metrics)
+            except Exception as e:
+                logger.warning(f"Metrics hook failed: {e}")
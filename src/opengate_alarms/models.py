@@ -1,16 +1,33 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from typing import List, Optional, Any, Dict
 from datetime import datetime
 
+# Server-side alarm field names (with or without the "alarm." prefix) -> Alarm attribute
+ALARM_FIELDS = {
+    "identifier": "id",
+    "entityIdentifier": "entity_id",
+    "name": "name",
+    "severity": "severity",
+    "status": "status",
+    "openingDate": "creation_date",
+    "creationDate": "creation_date",
+    "rule": "rule",
+    "description": "description",
+}
+
+# Alarm fields can come plain ("identifier") or flattened ("alarm.identifier")
+def _alarm_field(*names: str) -> AliasChoices:
+    return AliasChoices(*names, *(f"alarm.{n}" for n in names))
+
 class Alarm(BaseModel):
-    id: str = Field(alias="identifier")
-    entity_id: str = Field(alias="entityIdentifier")
-    name: str
-    severity: str
-    status: str
-    creation_date: datetime = Field(alias="openingDate")
-    rule: Optional[str] = None
-    description: Optional[str] = None
+    id: str = Field(alias="identifier", validation_alias=_alarm_field("identifier"))
+    entity_id: str = Field(alias="entityIdentifier", validation_alias=_alarm_field("entityIdentifier"))
+    name: str = Field(validation_alias=_alarm_field("name"))
+    severity: str = Field(validation_alias=_alarm_field("severity"))
+    status: str = Field(validation_alias=_alarm_field("status"))
+    creation_date: datetime = Field(alias="openingDate", validation_alias=_alarm_field("openingDate", "creationDate"))
+    rule: Optional[str] = Field(None, validation_alias=_alarm_field("rule"))
+    description: Optional[str] = Field(None, validation_alias=_alarm_field("description"))
 
     
     class Config:
@@ -46,6 +63,16 @@ class Filter(BaseModel):
     nin: Optional[Dict[str, Any]] = Field(None, alias="nin")
     exists: Optional[Dict[str, Any]] = None
 
+class AlarmActionResult(BaseModel):
+    """Per-alarm outcome of a bulk state change: updated ids and the error for each failed one."""
+    action: str
+    succeeded: List[str] = Field(default_factory=list)
+    failed: Dict[str, str] = Field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
 class SearchSort(BaseModel):
     field: str
     order: str = "DESC"
@@ -1,19 +1,48 @@
-from opengate_data import OpenGateClient
+import asyncio
+import httpx
+import json
 import os
-from typing import Any, Dict, List, Optional
-from dotenv import load_dotenv
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
 import logging
 
-load_dotenv()
+from .cache import ResponseCache, cache_key
+from .logconfig import REQUEST_LOGGER
+from .metrics import Instrumentation
+from .ratelimit import RequestScheduler
+from .resilience import Resilience, is_unavailable
+from .snapshot import SnapshotStore, endpoint_scope
+from .streaming import iter_json_items
 
 logger = logging.getLogger("opengate_alarms.og_data")
+request_logger = logging.getLogger(REQUEST_LOGGER)
+
+# Keys the search endpoints use for their result list
+RESULT_KEYS = ["entities", "devices", "alarms", "datapoints", "operations"]
+DEFAULT_ENTITY_LIMIT = {"size": 25, "start": 1}
 
 class OpenGateDataHelper:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        organization: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        resilience: Optional[Resilience] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
+        self.cache = cache
+        self.snapshots = snapshots
+        # Retries, deadlines and circuit breaker for the native async path
+        self.resilience = resilience or Resilience()
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler.from_env()
+        self.instrumentation = instrumentation or Instrumentation()
         try:
             self.api_key = api_key or os.getenv("OPENGATE_API_KEY")
-            self.organization = os.getenv("OPENGATE_ORGANIZATION")
-            env_url = os.getenv("OPENGATE_BASE_URL")
+            self.organization = organization or os.getenv("OPENGATE_ORGANIZATION")
+            env_url = base_url or os.getenv("OPENGATE_BASE_URL")
             
             # The opengate-data client seems to append its own path (e.g., /north/v80)
             # so we should provide just the base host/URL as RESOURCE.
@@ -23,32 +52,59 @@ class OpenGateDataHelper:
                 self.base_url = "https://api.opengate.es"
                 
             self.verify_ssl = os.getenv("OPENGATE_VERIFY_SSL", "True").lower() == "true"
+            self.headers = {
+                "X-ApiKey": self.api_key,
+                "Content-Type": "application/json",
+                "Accept": "application/json"
+            }
+            self._http: Optional[httpx.AsyncClient] = None
+            # The opengate-data client (and its pandas dependency tree) is only
+            # imported for the first synchronous search
+            self._client = None
             
             logger.info(f"Initializing OpenGateDataHelper - Base URL: {self.base_url} - Org: {self.organization} - Verify SSL: {self.verify_ssl}")
-            
-            # The opengate-data client: url parameter is actually the 'resource' (base url)
-            self.client = OpenGateClient(api_key=self.api_key, url=self.base_url)
 
         except Exception as e:
-            logger.error(f"Error initializing OpenGateClient: {e}", exc_info=True)
+            logger.error(f"Error initializing OpenGateDataHelper: {e}", exc_info=True)
+
+    @property
+    def client(self):
+        """opengate-data ``OpenGateClient`` used by ``search_entities``, created on first use."""
+        if self._client is None:
+            from opengate_data import OpenGateClient
+
+            # The opengate-data client: url parameter is actually the 'resource' (base url)
+            self._client = OpenGateClient(api_key=self.api_key, url=self.base_url)
+        return self._client
 
     def search_entities(self, search_request: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Search entities using the opengate-data library builder pattern."""
-        logger.info(f"search_entities called with: {search_request}")
+        request_logger.info("search_entities called with: %s", search_request)
+        key = cache_key(self.build_entity_payload(search_request))
+        if self.cache is not None:
+            cached = self.cache.get("entities", key)
+            if cached is not None:
+                return list(cached)
+        results = self._search_entities_uncached(search_request)
+        if self.cache is not None and results:
+            self.cache.set("entities", key, results)
+        return results
+
+    def _search_entities_uncached(self, search_request: Dict[str, Any]) -> List[Dict[str, Any]]:
         try:
             # Call the method to get a new builder instance
             builder = self.client.new_entities_search_builder()
             
             if self.organization:
-                logger.debug(f"Adding organization: {self.organization}")
+                request_logger.debug("Adding organization: %s", self.organization)
                 builder.with_organization_name(self.organization)
             
             if "filter" in search_request:
-                logger.debug(f"Adding filter: {search_request['filter']}")
+                request_logger.debug("Adding filter: %s", search_request["filter"])
                 builder.with_filter(search_request["filter"])
             
             if "select" in search_request:
-                logger.debug(f"Adding select: {search_request['select']}")
+                request_logger.debug("Adding select: %s", search_request["select"])
                 builder.with_select(search_request["select"])
                 
             if "limit" in search_request:
@@ -57,26 +113,25 @@ class OpenGateDataHelper:
                     size = limit_data.get("size", 25)
                     start = limit_data.get("start", 1)
                     builder.with_limit(size, start)
-                    logger.debug(f"Applied limit size from request: {size}, start: {start}")
+                    request_logger.debug("Applied limit size from request: %s, start: %s", size, start)
             else:
                 # Enforce default limit to avoid loading too many entities
-                logger.info("No limit provided in request, applying default size of 25")
+                request_logger.info("No limit provided in request, applying default size of 25")
                 builder.with_limit(25, 1)
             
-            logger.info("Building and executing entity search...")
+            request_logger.info("Building and executing entity search...")
             # The library returns a JSON string when formatted as 'dict'
             results_raw = builder.with_format("dict").build_execute()
             
             if isinstance(results_raw, str):
-                import json
                 try:
                     data = json.loads(results_raw)
                     # The response key can be 'entities', 'devices', etc.
                     results = []
-                    for key in ["entities", "devices", "alarms", "datapoints", "operations"]:
+                    for key in RESULT_KEYS:
                         if key in data and isinstance(data[key], list):
                             results = data[key]
-                            logger.info(f"Search successful. Parsed {len(results)} items from '{key}' key.")
+                            request_logger.info("Search successful. Parsed %s items from '%s' key.", len(results), key)
                             break
                     return results
                 except Exception as e:
@@ -84,13 +139,199 @@ class OpenGateDataHelper:
                     return []
             
             # Fallback if it's already a list or other format
-            logger.info(f"Search completed. Found {len(results_raw) if results_raw else 0} results.")
+            request_logger.info("Search completed. Found %s results.", len(results_raw) if results_raw else 0)
             return results_raw if isinstance(results_raw, list) else []
         except Exception as e:
             logger.error(f"Error in search_entities: {e}", exc_info=True)
             return []
 
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Pooled async HTTP client for the native search path, created lazily."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(verify=self.verify_ssl, headers=self.headers, timeout=httpx.Timeout(30.0, connect=10.0))
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def build_entity_payload(self, search_request: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the /search/entities body from a filter file dict, scoped to the organization."""
+        payload = {k: v for k, v in search_request.items() if k not in ("filter", "limit")}
+        filter_data = search_request.get("filter") or {}
+        if self.organization:
+            org_filter = {"eq": {"provision.administration.organization": self.organization}}
+            filter_data = {"and": [filter_data, org_filter]} if filter_data else org_filter
+        if filter_data:
+            payload["filter"] = filter_data
+        limit_data = search_request.get("limit")
+        if isinstance(limit_data, dict):
+            payload["limit"] = {"size": limit_data.get("size", 25), "start": limit_data.get("start", 1)}
+        else:
+            payload["limit"] = dict(DEFAULT_ENTITY_LIMIT)
+        return payload
+
+    async def iter_entities(
+        self, search_request: Dict[str, Any], use_cache: bool = True, allow_stale: Optional[bool] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Search entities over the pooled async client, yielding items as the response streams in.
+
+        Takes the same filter/select/limit dict as ``search_entities``. Unlike the
+        synchronous path, HTTP errors are raised to the caller, after the retries
+        of ``resilience``. With a cache, a fresh cached result is replayed and a
+        fully streamed one is stored; while the API is unavailable the last
+        known result (expired cache entry or snapshot) is replayed instead.
+        ``allow_stale`` (default: ``use_cache``) controls that fallback on its
+        own, so a refetch that skips the cache can still use it.
+        """
+        api_root = self.base_url if self.base_url.endswith("/north/v80") else f"{self.base_url}/north/v80"
+        url = f"{api_root}/search/entities"
+        payload = self.build_entity_payload(search_request)
+        key = cache_key(payload)
+        if allow_stale is None:
+            allow_stale = use_cache
+        if self.cache is not None and use_cache:
+            cached = self.cache.get("entities", key)
+            if cached is not None:
+                for entity in cached:
+                    yield entity
+                return
+
+        generation = self.cache.generation if self.cache is not None else None
+        collected: Optional[List[Dict[str, Any]]] = [] if self.cache is not None or self.snapshots is not None else None
+        request_logger.info("Async entity search - URL: %s - Payload: %s", url, payload)
 
+        with self.instrumentation.request("entities") as trace:
+            async def attempt() -> httpx.Response:
+                if self.scheduler is not None:
+                    await self.scheduler.acquire()
+                request = self.http.build_request("POST", url, json=payload, extensions=trace.extensions())
+                response = await self.http.send(request, stream=True)
+                trace.response(request, response)
+                return response
 
+            try:
+                response = await self.resilience.send("entities", attempt)
+                if response.status_code not in (200, 204):
+                    await response.aread()
+                    logger.error(f"API Error {response.status_code}: {response.text}")
+                    response.raise_for_status()
+            except Exception as e:
+                stale = self._stale(payload) if allow_stale and is_unavailable(e) else None
+                if stale is None:
+                    raise
+                logger.warning(f"Entities unavailable ({e}), showing the last known result")
+                trace.metrics.error = type(e).__name__
+                for entity in stale:
+                    yield entity
+                return
+            try:
+                if response.status_code != 204:
+                    items = iter_json_items(trace.chunks(response.aiter_bytes()), keys=RESULT_KEYS)
+                    async for item in trace.decoded(items):
+                        if collected is not None:
+                            collected.append(item)
+                        yield item
+            finally:
+                await response.aclose()
+        if self.cache is not None:
+            self.cache.set("entities", key, collected, generation=generation)
+        if self.snapshots is not None:
+            try:
+                self.snapshots.save("entities", payload, collected, self._snapshot_scope)
+            except Exception as e:
+                logger.warning(f"Could not store entity snapshot: {e}")
 
+    async def iter_entity_pages(
+        self, search_request: Dict[str, Any], prefetch: int = 1, allow_stale: bool = True
+    ) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Walk every page of an entity search, yielding ``(start, entities)``.
 
+        Pages are requested from ``limit.start`` onwards with ``limit.size`` as
+        the page size, bypassing the cache, with up to ``prefetch`` following
+        pages in flight while one is consumed. Stops on the first short page.
+        With ``allow_stale``, a page that cannot be fetched while the API is
+        unavailable is replaced by its last known result.
+        """
+        if prefetch < 0:
+            raise ValueError("prefetch must be >= 0")
+        limit = self.build_entity_payload(search_request)["limit"]
+        size, next_start = limit["size"], limit["start"]
+        if size < 1:
+            raise ValueError("limit.size must be >= 1")
+        pending: Deque[Tuple[int, asyncio.Task]] = deque()
+
+        def schedule() -> None:
+            nonlocal next_start
+            page_request = {**search_request, "limit": {"size": size, "start": next_start}}
+            pending.append((next_start, asyncio.create_task(self.search_entities_async(page_request, use_cache=False, allow_stale=allow_stale))))
+            next_start += 1
+
+        try:
+            for _ in range(prefetch + 1):
+                schedule()
+            while pending:
+                start, task = pending.popleft()
+                entities = await task
+                yield start, entities
+                if len(entities) < size:
+                    return
+                schedule()
+        finally:
+            tasks = [task for _, task in pending]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @property
+    def _snapshot_scope(self) -> str:
+        return endpoint_scope(self.base_url, self.organization, self.api_key)
+
+    def _stale(self, payload: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        if self.cache is not None:
+            cached = self.cache.get_stale("entities", cache_key(payload))
+            if cached is not None:
+                return cached
+        if self.snapshots is not None:
+            snapshot = self.snapshots.load("entities", payload, self._snapshot_scope)
+            if snapshot is not None:
+                return json.loads(snapshot.body)
+        return None
+
+    def load_entity_snapshot(self, search_request: Dict[str, Any]) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        """Last stored result of this search as ``(saved_at, entities)``, without any network I/O."""
+        if self.snapshots is None:
+            return None
+        snapshot = self.snapshots.load("entities", self.build_entity_payload(search_request), self._snapshot_scope)
+        if snapshot is None:
+            return None
+        return snapshot.saved_at, json.loads(snapshot.body)
+
+    async def search_entities_async(
+        self, search_request: Dict[str, Any], use_cache: bool = True, allow_stale: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """Async counterpart of ``search_entities`` that runs on the event loop without a worker thread.
+
+        Identical concurrent searches share one request when a cache is configured.
+        ``allow_stale`` is as for ``iter_entities``.
+        """
+        if allow_stale is None:
+            allow_stale = use_cache
+        payload = self.build_entity_payload(search_request)
+
+        async def fetch() -> List[Dict[str, Any]]:
+            return [entity async for entity in self.iter_entities(search_request, use_cache=False, allow_stale=False)]
+
+        try:
+            if self.cache is None or not use_cache:
+                return await fetch()
+            return list(await self.cache.get_or_fetch("entities", cache_key(payload), fetch))
+        except Exception as e:
+            # Outside get_or_fetch, so a last known result is not stored as a fresh one
+            stale = self._stale(payload) if allow_stale and is_unavailable(e) else None
+            if stale is None:
+                raise
+            logger.warning(f"Entities unavailable ({e}), showing the last known result")
+            return list(stale)
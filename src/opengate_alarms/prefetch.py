@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from .catalog import CatalogEntry
+from .ratelimit import Priority, request_priority
+
+logger = logging.getLogger("opengate_alarms.prefetch")
+
+
+@dataclass
+class PrefetchResult:
+    fetched: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+class Prefetcher:
+    """Warms the response cache with the results of catalog filters.
+
+    ``prefetch(entries)`` runs the search of every valid entry, at most
+    ``concurrency`` at a time and at ``Priority.BULK``, so with a scheduler
+    they wait behind interactive refreshes and background polling. Results
+    land in the clients' shared ``ResponseCache``; entries still fresh there
+    cost no request. ``record_use()`` counts filter selections and
+    ``most_used()`` ranks entries by them for re-prefetching when idle.
+    """
+
+    def __init__(self, client, entities_helper, concurrency: int = 4):
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.client = client
+        self.entities_helper = entities_helper
+        self.concurrency = concurrency
+        self.uses: Counter = Counter()
+
+    def record_use(self, kind: str, name: Optional[str]) -> None:
+        if name:
+            self.uses[(kind, name)] += 1
+
+    def most_used(self, entries: Iterable[CatalogEntry], limit: Optional[int] = None) -> List[CatalogEntry]:
+        """``entries`` by selection count, most used first (ties by name)."""
+        ranked = sorted(entries, key=lambda entry: (-self.uses[(entry.kind, entry.name)], entry.kind, entry.name))
+        return ranked if limit is None else ranked[:limit]
+
+    async def prefetch(self, entries: Iterable[CatalogEntry]) -> PrefetchResult:
+        """Fetch every valid entry into the cache; failures are collected, not raised."""
+        result = PrefetchResult()
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(entry: CatalogEntry) -> None:
+            async with semaphore:
+                try:
+                    await self._fetch(entry)
+                    result.fetched.append(f"{entry.kind}/{entry.name}")
+                except Exception as e:
+                    result.failed[f"{entry.kind}/{entry.name}"] = str(e) or type(e).__name__
+
+        with request_priority(Priority.BULK):
+            await asyncio.gather(*(fetch(entry) for entry in entries if entry.error is None))
+        result.elapsed = time.perf_counter() - started
+        logger.info(f"Prefetched {len(result.fetched)} filters in {result.elapsed:.2f}s, {len(result.failed)} failed")
+        return result
+
+    async def _fetch(self, entry: CatalogEntry) -> None:
+        if entry.kind == "alarms":
+            await self.client.query_alarms(entry.request)
+        else:
+            async for _ in self.entities_helper.iter_entities(entry.request):
+                pass
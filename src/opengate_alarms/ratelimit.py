@@ -0,0 +1,278 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger("opengate_alarms.ratelimit")
+
+# Seconds before trying the shared budget again while another process holds its lock
+LOCK_RETRY_DELAY = 0.01
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursting up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` if available and return 0, else return the seconds until they are."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    def refund(self, tokens: float = 1.0) -> None:
+        self._tokens = min(self.capacity, self._tokens + tokens)
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until ``tokens`` are available and take them."""
+        async with self._lock:
+            while True:
+                delay = self.take(tokens)
+                if not delay:
+                    return
+                await asyncio.sleep(delay)
+
+
+class FileBudget:
+    """Token bucket whose state lives in a file, shared by every process on the host.
+
+    Each ``take()`` locks the file with ``flock``, refills the bucket from the
+    wall-clock time of the last update and writes it back, so several TUIs and
+    export scripts using the same API key stay within one request budget.
+    The lock is never waited for: while another process holds it, ``take()``
+    returns ``LOCK_RETRY_DELAY`` so callers on an event loop sleep instead of
+    blocking it.
+    """
+
+    def __init__(self, path: Union[str, Path], rate: float, capacity: Optional[float] = None):
+        if fcntl is None:
+            raise RuntimeError("FileBudget needs fcntl, which is not available on this platform")
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+
+    def take(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` from the shared budget and return 0, or the seconds to wait."""
+        with open(self.path, "a+") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return LOCK_RETRY_DELAY
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                now = time.time()
+                available = state.get("tokens", self.capacity)
+                available = min(self.capacity, available + max(0.0, now - state.get("updated", now)) * self.rate)
+                delay = 0.0
+                if available >= tokens:
+                    available -= tokens
+                else:
+                    delay = (tokens - available) / self.rate
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({"tokens": available, "updated": now}))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return delay
+
+
+class Priority(IntEnum):
+    """Request priority; lower values are served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    BULK = 2
+
+
+_priority: ContextVar[Priority] = ContextVar("opengate_request_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Run the requests made in this block (and tasks started from it) at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@dataclass
+class WaitStats:
+    granted: int = 0
+    queued: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.granted if self.granted else 0.0
+
+
+class RequestScheduler:
+    """Priority scheduler handing out request permits at a sustained rate.
+
+    ``acquire()`` is awaited before every HTTP attempt. Permits come from a
+    per-process ``TokenBucket`` (``rate`` requests per second) and, when given,
+    a host-wide ``FileBudget``. While permits are short, waiting requests are
+    served by ``Priority`` (FIFO within one), so interactive refreshes go
+    ahead of background polling and bulk exports already queued. The priority
+    is taken from ``request_priority()`` unless passed explicitly.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        capacity: Optional[float] = None,
+        budget: Optional[FileBudget] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate is None and budget is None:
+            raise ValueError("RequestScheduler needs a rate, a budget or both")
+        self.bucket = TokenBucket(rate, capacity) if rate is not None else None
+        self.budget = budget
+        self._clock = clock
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.stats: Dict[Priority, WaitStats] = {priority: WaitStats() for priority in Priority}
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestScheduler"]:
+        """Scheduler from ``OPENGATE_RATE_LIMIT`` (requests per second) and ``OPENGATE_RATE_BUDGET_FILE``.
+
+        Returns None when no rate limit is configured. With a budget file the
+        rate is shared by every process using that file.
+        """
+        rate = os.getenv("OPENGATE_RATE_LIMIT")
+        if not rate:
+            return None
+        try:
+            rate_value = float(rate)
+        except ValueError:
+            rate_value = 0.0
+        if rate_value <= 0:
+            logger.warning(f"Ignoring invalid OPENGATE_RATE_LIMIT={rate!r}")
+            return None
+        budget_file = os.getenv("OPENGATE_RATE_BUDGET_FILE")
+        if budget_file:
+            try:
+                return cls(budget=FileBudget(budget_file, rate_value))
+            except (OSError, RuntimeError) as e:
+                logger.warning(f"Shared rate budget unavailable ({e}), limiting this process only")
+        return cls(rate_value)
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Requests currently waiting for a permit, by priority name."""
+        depth = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                depth[Priority(priority).name.lower()] += 1
+        return depth
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Queue depth and wait times per priority."""
+        depth = self.queue_depth()
+        return {
+            priority.name.lower(): {
+                "queued": depth[priority.name.lower()],
+                "granted": stats.granted,
+                "delayed": stats.queued,
+                "mean_wait": stats.mean_wait,
+                "max_wait": stats.max_wait,
+            }
+            for priority, stats in self.stats.items()
+        }
+
+    async def acquire(self, priority: Optional[Priority] = None) -> float:
+        """Wait for a permit to send one request. Returns the time spent waiting."""
+        priority = current_priority() if priority is None else Priority(priority)
+        if not self._waiters and not self._take():
+            self._record(priority, 0.0)
+            return 0.0
+
+        enqueued_at = self._clock()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), enqueued_at, future))
+        self.stats[priority].queued += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        # A cancelled waiter is skipped by the dispatcher
+        await future
+        waited = self._clock() - enqueued_at
+        self._record(priority, waited)
+        return waited
+
+    def _record(self, priority: Priority, waited: float) -> None:
+        stats = self.stats[priority]
+        stats.granted += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+
+    def _take(self) -> float:
+        """Take one permit and return 0, or return the seconds until one may be free."""
+        if self.bucket is not None:
+            delay = self.bucket.take()
+            if delay:
+                return delay
+        if self.budget is not None:
+            try:
+                delay = self.budget.take()
+            except OSError as e:
+                logger.warning(f"Shared rate budget unavailable: {e}")
+                delay = 0.0
+            if delay and self.bucket is not None:
+                # Give the local token back; the shared budget said no
+                self.bucket.refund()
+            return delay
+        return 0.0
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            if self._waiters[0][3].done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._take()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+            heapq.heappop(self._waiters)[3].set_result(None)
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger("opengate_alarms.resilience")
+
+# Status codes the API uses to shed load or report a transient failure
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Total time budget in seconds per endpoint namespace, retries and waits included
+DEFAULT_DEADLINES = {
+    "alarms": 60.0,
+    "summary": 20.0,
+    "entities": 60.0,
+    "state": 60.0,
+}
+
+
+class CircuitOpenError(Exception):
+    """The endpoint's circuit breaker is open, so the call was not attempted."""
+
+    def __init__(self, namespace: str, retry_in: float):
+        super().__init__(f"OpenGate '{namespace}' endpoint is unavailable, retrying in {retry_in:.0f}s")
+        self.namespace = namespace
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """The endpoint's deadline ran out before a usable response arrived."""
+
+
+def retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header (delta-seconds or HTTP-date) on a 429/503 response."""
+    if response is None or response.status_code not in (429, 503):
+        return None
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_unavailable(error: BaseException) -> bool:
+    """Whether ``error`` means the API is unhealthy (as opposed to rejecting the request)."""
+    if isinstance(error, (CircuitOpenError, httpx.TransportError)):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code in RETRYABLE_STATUS
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter. A server ``Retry-After`` is waited at least."""
+    retries: int = 3
+    base: float = 0.5
+    maximum: float = 30.0
+
+    def delay(self, attempt: int, server_delay: Optional[float] = None) -> float:
+        backoff = random.uniform(0, min(self.maximum, self.base * 2 ** attempt))
+        return backoff if server_delay is None else max(backoff, server_delay)
+
+
+class CircuitBreaker:
+    """Fails calls fast after ``failure_threshold`` consecutive failures.
+
+    Once open, calls raise ``CircuitOpenError`` until ``reset_timeout`` has
+    passed; then a single trial call is let through (half-open) and its
+    outcome closes the circuit again or restarts the timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._trial or self._clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self, namespace: str) -> None:
+        if self.opened_at is None:
+            return
+        waited = self._clock() - self.opened_at
+        if waited < self.reset_timeout or self._trial:
+            raise CircuitOpenError(namespace, max(0.0, self.reset_timeout - waited))
+        self._trial = True
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Circuit closed, the API is answering again")
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial:
+                logger.warning(f"Circuit opened after {self.failures} failed calls")
+            self.opened_at = self._clock()
+        self._trial = False
+
+    def release(self) -> None:
+        """Give up a trial call that was cancelled without an outcome."""
+        self._trial = False
+
+
+class Resilience:
+    """Retries, deadlines and circuit breakers shared by the OpenGate clients.
+
+    Every request goes through ``send(namespace, request)``, where the
+    namespace is the endpoint ("alarms", "summary", "entities", "state") and
+    ``request`` performs one HTTP attempt. Transport errors and 429/5xx
+    responses are retried with ``policy``, the whole call is bounded by the
+    namespace's deadline, and each namespace has its own circuit breaker.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        deadlines: Optional[Dict[str, Optional[float]]] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.policy = policy or RetryPolicy()
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._sleep = sleep
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retried = 0
+
+    def breaker(self, namespace: str) -> CircuitBreaker:
+        breaker = self.breakers.get(namespace)
+        if breaker is None:
+            breaker = self.breakers[namespace] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self._clock)
+        return breaker
+
+    def unhealthy(self) -> List[str]:
+        """Namespaces whose circuit is currently not closed."""
+        return [namespace for namespace, breaker in self.breakers.items() if breaker.opened_at is not None]
+
+    async def send(
+        self,
+        namespace: str,
+        request: Callable[[], Awaitable[httpx.Response]],
+        retries: Optional[int] = None,
+    ) -> httpx.Response:
+        """Run ``request`` until it returns a non-retryable response or the budget is spent.
+
+        Returns the last response, which may still carry a 429/5xx status once
+        retries are exhausted; raises the last transport error, a
+        ``DeadlineExceeded`` or a ``CircuitOpenError``. Streamed responses that
+        are retried are closed here; the returned one is the caller's to close.
+        """
+        breaker = self.breaker(namespace)
+        breaker.before_call(namespace)
+        deadline = self.deadlines.get(namespace)
+        outcome: Optional[bool] = None
+        try:
+            async with asyncio.timeout(deadline):
+                response = await self._attempts(namespace, request, retries, deadline)
+            outcome = response.status_code not in RETRYABLE_STATUS
+            return response
+        except TimeoutError:
+            outcome = False
+            raise DeadlineExceeded(f"OpenGate '{namespace}' request exceeded its {deadline:.0f}s deadline") from None
+        except httpx.TransportError:
+            outcome = False
+            raise
+        finally:
+            if outcome is None:
+                breaker.release()
+            elif outcome:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+
+    async def _attempts(
+        self,
+        namespace: str,
+        request: Callable[[], Awaitable[httpx.Response]],
+        retries: Optional[int],
+        deadline: Optional[float],
+    ) -> httpx.Response:
+        retries = self.policy.retries if retries is None else retries
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline if deadline is not None else None
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            error: Optional[httpx.TransportError] = None
+            try:
+                response = await request()
+            except httpx.TransportError as e:
+                if attempt >= retries:
+                    raise
+                error = e
+                reason = str(e) or type(e).__name__
+            else:
+                if response.status_code not in RETRYABLE_STATUS or attempt >= retries:
+                    return response
+                reason = f"HTTP {response.status_code}"
+
+            delay = self.policy.delay(attempt, retry_after(response))
+            if expires_at is not None and loop.time() + delay >= expires_at:
+                # Waiting would run past the deadline: report this failure now
+                logger.warning(f"{namespace} request failed ({reason}), no time left to retry")
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                await response.aclose()
+            attempt += 1
+            self.retried += 1
+            logger.warning(f"{namespace} request failed ({reason}), retry {attempt}/{retries} in {delay:.1f}s")
+            await self._sleep(delay)
@@ -0,0 +1,72 @@
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Column map entry produced from a filter's ``select``: (header, path parts)
+Column = Tuple[str, List[str]]
+
+
+def parse_complex_select(select_list: List[Any]) -> List[Column]:
+    """Parse complex select structure into (Header, DataPath) pairs."""
+    columns = []
+    for item in select_list:
+        if isinstance(item, str):
+            columns.append((item, item.split(".")))
+        elif isinstance(item, dict):
+            base_name = item.get("name", "")
+            base_path = base_name.replace("[]", "").split(".")
+            fields = item.get("fields", [])
+            if not fields:
+                columns.append((base_name, base_path))
+            else:
+                for f in fields:
+                    field_path = f.get("field", "").split(".")
+                    alias = f.get("alias", f.get("field", base_name))
+                    columns.append((alias, base_path + field_path))
+    return columns
+
+
+def get_nested_value(data: Any, path: Sequence[str]) -> Any:
+    """Navigate nested dictionary/list using path, handling OpenGate structures."""
+    current = data
+    for i, part in enumerate(path):
+        if current is None:
+            return None
+        if isinstance(current, dict):
+            if part not in current and i == 0 and part == "provision":
+                # Skip 'provision' at start if missing
+                continue
+        elif isinstance(current, list) and current:
+            # Take the first element and look the part up in it
+            current = current[0]
+            if not isinstance(current, dict):
+                continue
+        else:
+            return None
+        # Direct match first, then the 'current' / '_current' value wrappers
+        if part in current:
+            current = current[part]
+        elif "current" in current and isinstance(current["current"], dict) and part in current["current"]:
+            current = current["current"][part]
+        elif "_current" in current and isinstance(current["_current"], dict) and part in current["_current"]:
+            current = current["_current"][part]
+        else:
+            return None
+    return current
+
+
+class ColumnPlan:
+    """Extracts the display row of a filter's ``select`` columns from an entity.
+
+    The select is parsed once per filter; ``row(entity)`` only walks the
+    precomputed path of every column.
+    """
+
+    def __init__(self, columns: Sequence[Column]):
+        self.columns = [(header, list(path)) for header, path in columns]
+        self.headers = [header for header, _ in self.columns]
+        self._paths = [tuple(path) for _, path in self.columns]
+
+    def matches(self, columns: Sequence[Column]) -> bool:
+        return self.columns == [(header, list(path)) for header, path in columns]
+
+    def row(self, entity: Any) -> List[str]:
+        return ["N/A" if (value := get_nested_value(entity, path)) is None else str(value) for path in self._paths]
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, NamedTuple, Optional, Union
+
+from .cache import cache_key
+
+logger = logging.getLogger("opengate_alarms.snapshot")
+
+DEFAULT_SNAPSHOT_PATH = Path.home() / ".cache" / "opengate-alarms" / "snapshots.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+def endpoint_scope(base_url: str, organization: Optional[str] = None, api_key: Optional[str] = None) -> str:
+    """Identity of an OpenGate endpoint for snapshot keys; the API key is only kept as a hash."""
+    url = base_url.rstrip("/")
+    if url.endswith("/north/v80"):
+        url = url[:-len("/north/v80")]
+    key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16] if api_key else ""
+    return f"{url}|{organization or ''}|{key_hash}"
+
+
+class Snapshot(NamedTuple):
+    saved_at: float
+    body: bytes
+
+
+class SnapshotStore:
+    """On-disk copy of the last result returned for each search request.
+
+    Results are stored in SQLite (WAL journal, memory-mapped reads) keyed by
+    ``(namespace, cache_key(payload))`` like ``ResponseCache``, so a new
+    process can show the last known rows before any network I/O. The body is
+    the JSON array of items; decoding is left to the caller. The file is
+    shared by every endpoint, so clients pass their ``endpoint_scope()`` as
+    ``scope`` and never read another server's, organization's or API key's rows.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, mmap_size: int = 256 * 1024 * 1024):
+        self.path = Path(path) if path else DEFAULT_SNAPSHOT_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        # WAL lets a reader (another TUI instance) proceed while we write
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self._conn.execute(_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional["SnapshotStore"]:
+        """Store at ``OPENGATE_SNAPSHOT_PATH`` (default under ``~/.cache``); ``off`` disables it."""
+        location = os.getenv("OPENGATE_SNAPSHOT_PATH")
+        if location is not None and location.strip().lower() in ("", "off", "none", "0"):
+            return None
+        try:
+            return cls(location)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Snapshot store unavailable: {e}")
+            return None
+
+    @staticmethod
+    def _key(payload: Any, scope: str) -> str:
+        return cache_key([scope, payload]) if scope else cache_key(payload)
+
+    def save(self, namespace: str, payload: Any, items: List[Any], scope: str = "") -> None:
+        body = json.dumps(items, separators=(",", ":"), default=str).encode()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (namespace, key, saved_at, body) VALUES (?, ?, ?, ?)",
+                (namespace, self._key(payload, scope), time.time(), body),
+            )
+
+    def load(self, namespace: str, payload: Any, scope: str = "") -> Optional[Snapshot]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT saved_at, body FROM snapshots WHERE namespace = ? AND key = ?",
+                (namespace, self._key(payload, scope)),
+            ).fetchone()
+        return Snapshot(row[0], bytes(row[1])) if row else None
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM snapshots")
+            else:
+                self._conn.execute("DELETE FROM snapshots WHERE namespace = ?", (namespace,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
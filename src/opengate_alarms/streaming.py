@@ -0,0 +1,140 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+_WHITESPACE = " \t\n\r"
+
+# Parser states
+_START = "start"
+_IN_OBJECT = "object"
+_COLON = "colon"
+_AFTER_KEY = "after_key"
+_IN_ARRAY = "array"
+_DONE = "done"
+
+
+class _NeedMoreData(Exception):
+    pass
+
+
+class JsonItemStream:
+    """Incremental parser yielding the items of one JSON array as bytes arrive.
+
+    The array is either the whole document (``[...]``) or the value of the first
+    top-level key in ``keys`` (for example ``{"alarms": [...]}``). Feed chunks
+    with ``feed()``; each call returns the items completed so far. Only the
+    current unfinished item is buffered, so memory stays at the size of one
+    item plus one chunk regardless of the response size.
+    """
+
+    def __init__(self, keys: Optional[Sequence[str]] = None):
+        self.keys = set(keys or ())
+        self.key: Optional[str] = None
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._state = _START
+        self._pending_key: Optional[str] = None
+        self._eof = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        self._buf += self._text.decode(chunk)
+        return self._drain()
+
+    def close(self) -> List[Any]:
+        """Signal the end of the stream and return any remaining items."""
+        self._buf += self._text.decode(b"", final=True)
+        self._eof = True
+        items = self._drain()
+        if self._state not in (_DONE, _START) or (self._state == _START and self._buf.strip()):
+            raise ValueError("Truncated JSON document")
+        return items
+
+    def _skip_ws(self, pos: int) -> int:
+        buf = self._buf
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buf):
+            raise _NeedMoreData
+        return pos
+
+    def _decode(self, pos: int):
+        try:
+            value, end = self._decoder.raw_decode(self._buf, pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            raise _NeedMoreData
+        # A number touching the end of the buffer may still be growing
+        if end == len(self._buf) and not self._eof:
+            raise _NeedMoreData
+        return value, end
+
+    def _drain(self) -> List[Any]:
+        items: List[Any] = []
+        pos = 0
+        try:
+            while self._state != _DONE:
+                pos = self._skip_ws(pos)
+                char = self._buf[pos]
+                if self._state == _START:
+                    if char == "[":
+                        self._state = _IN_ARRAY
+                    elif char == "{":
+                        self._state = _IN_OBJECT
+                    else:
+                        raise ValueError(f"Unexpected JSON document start: {char!r}")
+                    pos += 1
+                elif self._state == _IN_OBJECT:
+                    if char == ",":
+                        pos += 1
+                    elif char == "}":
+                        self._state = _DONE
+                    else:
+                        self._pending_key, pos = self._decode(pos)
+                        self._state = _COLON
+                elif self._state == _COLON:
+                    if char != ":":
+                        raise ValueError("Expected ':' after object key")
+                    self._state = _AFTER_KEY
+                    pos += 1
+                elif self._state == _AFTER_KEY:
+                    if self._pending_key in self.keys and char == "[":
+                        self.key = self._pending_key
+                        self._state = _IN_ARRAY
+                        pos += 1
+                    else:
+                        # Not the array we are after: skip the whole value
+                        _, pos = self._decode(pos)
+                        self._state = _IN_OBJECT
+                elif self._state == _IN_ARRAY:
+                    if char == ",":
+                        pos += 1
+                    elif char == "]":
+                        self._state = _DONE
+                    else:
+                        item, pos = self._decode(pos)
+                        items.append(item)
+        except _NeedMoreData:
+            pass
+        if self._state == _DONE:
+            self._buf = ""
+        else:
+            self._buf = self._buf[pos:]
+        return items
+
+
+async def iter_json_items(chunks: AsyncIterator[bytes], keys: Optional[Sequence[str]] = None) -> AsyncIterator[Any]:
+    """Yield the items of a JSON array from an async byte stream (e.g. ``response.aiter_bytes()``)."""
+    parser = JsonItemStream(keys)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+        if parser.done:
+            return
+    for item in parser.close():
+        yield item
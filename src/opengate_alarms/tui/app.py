@@ -4,21 +4,64 @@ from textual.containers import Container, Horizontal, Vertical
 
 from textual.screen import Screen
 from textual import on
-from typing import Any, List, Optional
+from rich.text import Text
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
 import asyncio
+import hashlib
+import heapq
+import time
+from collections import Counter
+from contextlib import aclosing
 from datetime import datetime
 
+from ..cache import ResponseCache
+from ..catalog import DEFAULT_ENTITY_COLUMNS, DEFAULT_ENTITY_REQUEST, CatalogEntry, FilterCatalog
 from ..client import OpenGateAlarmClient
+from ..delta import AlarmDeltaSync
+from ..federation import FederatedClient
+from ..logconfig import configure_logging
+from ..metrics import Instrumentation, MetricsRegistry
 from ..og_data import OpenGateDataHelper
-from ..models import Alarm, SearchRequest
-import json
+from ..prefetch import Prefetcher
+from ..models import Alarm, Pagination, SearchRequest, SearchSort
+from ..ratelimit import Priority, RequestScheduler, request_priority
+from ..resilience import Resilience
+from ..snapshot import SnapshotStore
+from ..select_paths import ColumnPlan, get_nested_value, parse_complex_select
+from .scheduler import AdaptiveInterval, RefreshStats
+from .table_sync import KeyedTableUpdate
+from .virtual_table import VirtualTable
 import os
 import logging
-from pathlib import Path
 
 
 logger = logging.getLogger("opengate_alarms.tui")
 
+ALARM_COLUMNS = ("ID", "Entity", "Name", "Severity", "Status", "Date")
+ALARM_DATE_COLUMN = 5
+# Seconds between checks of the filters directory for edited files
+FILTER_POLL_INTERVAL = 2.0
+# Re-prefetch the most used filters after this many seconds without user activity
+IDLE_AFTER = 30.0
+IDLE_PREFETCH_TOP = 4
+# Rows shown by the combined view of all tenants (the newest ones, unless the filter sorts)
+TENANT_VIEW_LIMIT = 2000
+# Delta-synced alarm filters are walked in full after this many refreshes
+DELTA_RECONCILE_EVERY = 10
+
+
+
+class FilterItem(ListItem):
+    """Sidebar entry of one filter file.
+
+    The widget id is derived from a hash, since file names may contain
+    characters (spaces, dots, leading digits) that are not valid ids.
+    """
+
+    def __init__(self, entry: CatalogEntry):
+        label = f"{entry.label} (invalid)" if entry.error else entry.label
+        super().__init__(Label(label), id=f"filter-{hashlib.sha1(entry.name.encode()).hexdigest()[:12]}")
+        self.filename = entry.name
 
 
 class AlarmDetailScreen(Screen):
@@ -43,6 +86,102 @@ class AlarmDetailScreen(Screen):
         )
         yield Footer()
 
+class DiagnosticsScreen(Screen):
+    """Latency per endpoint and phase (p50/p95 of recent calls), refreshed every second."""
+    BINDINGS = [("escape", "app.pop_screen", "Back")]
+
+    def __init__(self, registry: MetricsRegistry):
+        super().__init__()
+        self.registry = registry
+
+    def compose(self) -> ComposeResult:
+        yield Header()
+        yield DataTable(id="diagnostics-table")
+        yield Static("", id="diagnostics-totals")
+        yield Footer()
+
+    def on_mount(self) -> None:
+        table = self.query_one("#diagnostics-table", DataTable)
+        table.add_columns("Endpoint", "Phase", "Calls", "p50 (ms)", "p95 (ms)")
+        self.update_table()
+        self.set_interval(1.0, self.update_table)
+
+    def update_table(self) -> None:
+        table = self.query_one("#diagnostics-table", DataTable)
+        table.clear()
+        for labels, count, (p50, p95) in self.registry.quantiles("opengate_request_phase_seconds"):
+            table.add_row(
+                labels.get("endpoint", ""),
+                labels.get("phase", ""),
+                str(count),
+                f"{p50 * 1000:.1f}" if p50 is not None else "-",
+                f"{p95 * 1000:.1f}" if p95 is not None else "-",
+            )
+
+        totals = self.registry.to_json()["counters"]
+        parts = []
+        for entry in totals.get("opengate_requests_total", []):
+            labels = entry["labels"]
+            parts.append(f"{labels['endpoint']} {labels['status']}: {entry['value']:.0f}")
+        received = sum(e["value"] for e in totals.get("opengate_request_bytes_total", []) if e["labels"]["direction"] == "in")
+        items = sum(e["value"] for e in totals.get("opengate_response_items_total", []))
+        parts.append(f"{received / 1024:.0f} KiB received, {items:.0f} items")
+        self.query_one("#diagnostics-totals", Static).update(" | ".join(parts))
+
+class TenantAlarmsScreen(Screen):
+    """The selected alarm filter run on every tenant, merged into one table with a tenant column."""
+    BINDINGS = [("escape", "app.pop_screen", "Back"), ("r", "reload", "Refresh")]
+
+    def __init__(self, federation: FederatedClient, search_request: SearchRequest, limit: int = TENANT_VIEW_LIMIT):
+        super().__init__()
+        self.federation = federation
+        # Newest first across tenants unless the filter asks for another order
+        self.sorted_by_date = not search_request.sort
+        if self.sorted_by_date:
+            search_request = search_request.model_copy(update={"sort": [SearchSort(field="alarm.openingDate", order="DESC")]})
+        self.search_request = search_request
+        self.limit = limit
+
+    def compose(self) -> ComposeResult:
+        yield Header()
+        yield DataTable(id="tenant-alarms-table")
+        yield Static("", id="tenant-alarms-status")
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.query_one("#tenant-alarms-table", DataTable).cursor_type = "row"
+        self.action_reload()
+
+    def action_reload(self) -> None:
+        self.run_worker(self.load(), group="tenant-alarms", exclusive=True)
+
+    async def load(self) -> None:
+        status = self.query_one("#tenant-alarms-status", Static)
+        status.update(f"Querying {len(self.federation.tenants)} tenants...")
+        update = KeyedTableUpdate(self.query_one("#tenant-alarms-table", DataTable), ("Tenant",) + ALARM_COLUMNS)
+        counts: Counter = Counter()
+        errors: Dict[str, str] = {}
+        started = time.perf_counter()
+        async with aclosing(self.federation.iter_alarms(self.search_request, errors=errors)) as alarms:
+            async for tenant, alarm in alarms:
+                update.upsert(
+                    f"{tenant}/{alarm.id}",
+                    (tenant, alarm.id, alarm.entity_id, alarm.name, alarm.severity, alarm.status, str(alarm.creation_date)),
+                )
+                counts[tenant] += 1
+                if sum(counts.values()) >= self.limit:
+                    break
+        if self.sorted_by_date:
+            update.finish(sort_column=ALARM_DATE_COLUMN + 1, reverse=True)
+        else:
+            update.finish()
+
+        parts = [f"{name}: {counts[name]}" for name in self.federation.tenants if name not in errors]
+        parts += [f"{name}: failed ({error})" for name, error in errors.items()]
+        shown = sum(counts.values())
+        limited = f" (first {self.limit})" if shown >= self.limit else ""
+        status.update(f"{shown} alarms{limited} in {time.perf_counter() - started:.1f}s | " + " | ".join(parts))
+
 class OpenGateApp(App):
     CSS = """
     .detail-container {
@@ -68,19 +207,71 @@ class OpenGateApp(App):
     TabbedContent {
         height: 1fr;
     }
+    #status-bar {
+        height: 1;
+        padding: 0 1;
+        background: $panel;
+    }
     """
 
     BINDINGS = [
         ("q", "quit", "Quit"),
         ("r", "refresh", "Refresh"),
+        ("a", "toggle_auto_refresh", "Auto-refresh"),
+        ("v", "toggle_virtual_mode", "Virtual table"),
+        ("space", "toggle_mark", "Mark"),
+        ("t", "alarm_action('ATTEND')", "Attend"),
+        ("x", "alarm_action('CLOSE')", "Close"),
+        ("d", "diagnostics", "Diagnostics"),
+        ("f", "all_tenants", "All tenants"),
     ]
 
+    TABS = ("alarms-tab", "entities-tab")
+
     def __init__(self):
         super().__init__()
-        self.client = OpenGateAlarmClient()
-        self.entities_helper = OpenGateDataHelper()
+        # One response cache shared by both tabs so switching filters is instant
+        self.cache = ResponseCache()
+        # Last results on disk, shown on startup before the API answers
+        self.snapshots = SnapshotStore.from_env()
+        self.snapshot_times: Dict[str, float] = {}
+        # Retries, circuit breakers and the request budget shared by both clients
+        self.resilience = Resilience()
+        self.scheduler = RequestScheduler.from_env()
+        # Phase timings of every API call, shown on the diagnostics screen
+        self.instrumentation = Instrumentation()
+        shared = dict(
+            cache=self.cache,
+            snapshots=self.snapshots,
+            resilience=self.resilience,
+            scheduler=self.scheduler,
+            instrumentation=self.instrumentation,
+        )
+        self.client = OpenGateAlarmClient(**shared)
+        self.entities_helper = OpenGateDataHelper(**shared)
+        # Per-filter local alarm stores kept up to date by delta polling
+        self.alarm_syncs: Dict[str, AlarmDeltaSync] = {}
         # Mock mode if no API key
         self.mock_mode = not self.client.api_key
+        # Background polling: one adaptive interval and one in-flight lock per tab
+        self.auto_refresh_enabled = not self.mock_mode
+        self.refresh_intervals = {tab: AdaptiveInterval() for tab in self.TABS}
+        self.refresh_locks = {tab: asyncio.Lock() for tab in self.TABS}
+        self.last_refresh: Dict[str, RefreshStats] = {}
+        # Virtual mode keeps only a window of server pages in each table
+        self.virtual_mode = False
+        self.virtual_tables: Dict[str, Tuple[Optional[str], VirtualTable]] = {}
+        # Filter files parsed once and reloaded when they change on disk
+        self.catalog = FilterCatalog("filters")
+        self.default_column_plan = ColumnPlan(DEFAULT_ENTITY_COLUMNS)
+        # Warms the shared cache with every filter's results, so switching filters is instant
+        self.prefetcher = Prefetcher(self.client, self.entities_helper)
+        self.last_activity = time.monotonic()
+        # Alarm ids marked for a bulk ATTEND/CLOSE, and the progress of one running
+        self.marked_alarms: Set[str] = set()
+        self.action_progress: Optional[str] = None
+        # Clients of every tenant in OPENGATE_TENANTS, created when the combined view is first opened
+        self.federation: Optional[FederatedClient] = None
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -97,6 +288,7 @@ class OpenGateApp(App):
                         yield Label("ENTITY FILTERS", classes="sidebar-title")
                         yield ListView(id="entity-filter-list")
                     yield DataTable(id="entities-table")
+        yield Static("", id="status-bar")
         yield Footer()
 
 
@@ -104,42 +296,136 @@ class OpenGateApp(App):
     async def on_mount(self) -> None:
         # Initialize Alarm table
         alarm_table = self.query_one("#alarms-table", DataTable)
-        alarm_table.add_columns("ID", "Entity", "Name", "Severity", "Status", "Date")
+        alarm_table.add_columns(*ALARM_COLUMNS)
         alarm_table.cursor_type = "row"
         
         # Initialize Entity table
         entity_table = self.query_one("#entities-table", DataTable)
         entity_table.cursor_type = "row"
 
+        self.catalog.refresh()
+        self.report_filter_errors(self.catalog.errors())
         await self.load_all_filters()
-        await self.refresh_alarms()
-        await self.refresh_entities()
+        self.set_interval(FILTER_POLL_INTERVAL, self.reload_filters)
+        if not self.mock_mode:
+            self.render_snapshots()
+        # The API is queried in the background so the first frame is not held up
+        self.run_worker(self.initial_load(), group="initial-load")
+
+    async def initial_load(self) -> None:
+        await asyncio.gather(self.refresh_alarms(), self.refresh_entities())
+        if self.auto_refresh_enabled:
+            self.start_auto_refresh()
+        if not self.mock_mode:
+            self.run_worker(self.prefetch_filters(self.all_filters()), group="prefetch", exclusive=True)
+            self.set_interval(IDLE_AFTER, self.prefetch_when_idle)
+
+    def all_filters(self) -> List[CatalogEntry]:
+        return self.catalog.entries("alarms") + self.catalog.entries("entities")
+
+    async def prefetch_filters(self, entries: List[CatalogEntry]) -> None:
+        result = await self.prefetcher.prefetch(entries)
+        for name, error in result.failed.items():
+            logger.warning(f"Prefetch of {name} failed: {error}")
+
+    def prefetch_when_idle(self) -> None:
+        """Keep the most used filters warm while the user is not doing anything."""
+        if time.monotonic() - self.last_activity < IDLE_AFTER:
+            return
+        entries = self.prefetcher.most_used(self.all_filters(), IDLE_PREFETCH_TOP)
+        self.run_worker(self.prefetch_filters(entries), group="prefetch", exclusive=True)
+
+    def render_snapshots(self) -> None:
+        """Fill the tables from the snapshot store without any network I/O."""
+        alarms = self.client.load_alarm_snapshot(self.alarm_request(None))
+        if alarms is not None:
+            saved_at, items = alarms
+            update = KeyedTableUpdate(self.query_one("#alarms-table", DataTable), ALARM_COLUMNS)
+            for alarm in items:
+                update.upsert(alarm.id, self._alarm_row(alarm))
+            update.finish(sort_column=ALARM_DATE_COLUMN, reverse=True)
+            self.snapshot_times["alarms-tab"] = saved_at
+            self.last_refresh["alarms-tab"] = RefreshStats(count=len(items))
+
+        search_req, plan = self.entity_request(None)
+        entities = self.entities_helper.load_entity_snapshot(search_req)
+        if entities is not None:
+            saved_at, items = entities
+            update = KeyedTableUpdate(self.query_one("#entities-table", DataTable), [header.upper() for header in plan.headers])
+            keys: Dict[str, int] = {}
+            for entity in items:
+                row = plan.row(entity)
+                update.upsert(self._entity_key(entity, row, keys), row)
+            update.finish()
+            self.snapshot_times["entities-tab"] = saved_at
+            self.last_refresh["entities-tab"] = RefreshStats(count=len(items))
+        self.update_status_bar()
+
+    async def on_unmount(self) -> None:
+        # Release the shared connection pools
+        await self.client.aclose()
+        await self.entities_helper.aclose()
+        if self.federation is not None:
+            await self.federation.aclose()
+        if self.snapshots is not None:
+            self.snapshots.close()
 
     async def load_all_filters(self) -> None:
-        await self.load_filters_into_list("#alarm-filter-list", "filters/alarms")
-        await self.load_filters_into_list("#entity-filter-list", "filters/entities")
+        await self.load_filters_into_list("#alarm-filter-list", "alarms")
+        await self.load_filters_into_list("#entity-filter-list", "entities")
 
-    async def load_filters_into_list(self, list_id: str, directory: str) -> None:
+    async def load_filters_into_list(self, list_id: str, kind: str) -> None:
         filter_list = self.query_one(list_id, ListView)
-        filter_dir = Path(directory)
-        if not filter_dir.exists():
-            filter_dir.mkdir(parents=True, exist_ok=True)
-            
+        selected = self.selected_filter(list_id)
+
         await filter_list.clear()
-        filters = sorted(list(filter_dir.glob("*.json")))
-        for f in filters:
-            item = ListItem(Label(f.stem), id=f.stem.replace(".", "_"))
-            await filter_list.append(item)
-        
-        if filters:
-            filter_list.index = 0
+        entries = self.catalog.entries(kind)
+        for entry in entries:
+            await filter_list.append(FilterItem(entry))
+
+        if entries:
+            names = [entry.name for entry in entries]
+            # Keep the selection across reloads
+            filter_list.index = names.index(selected) if selected in names else 0
+
+    async def reload_filters(self) -> None:
+        """Pick up filter files added, edited or removed since the last check."""
+        # Files are read in a thread; the catalog is only swapped here, on the loop that reads it
+        entries, changed = await asyncio.to_thread(self.catalog.scan)
+        self.catalog.apply(entries)
+        if not changed:
+            return
+        self.report_filter_errors([entry for kind, name in changed if (entry := self.catalog.get(kind, name)) and entry.error])
+        selected = {
+            "alarms-tab": ("alarms", self.selected_filter("#alarm-filter-list")),
+            "entities-tab": ("entities", self.selected_filter("#entity-filter-list")),
+        }
+        await self.load_all_filters()
+        for tab, (kind, name) in selected.items():
+            if (kind, name) in changed:
+                self.virtual_tables.pop(tab, None)
+                self.run_worker(self.refresh_tab(tab, force=True), group="filter-reload")
+        if not self.mock_mode:
+            entries = [entry for kind, name in changed if (entry := self.catalog.get(kind, name))]
+            self.run_worker(self.prefetch_filters(entries), group="prefetch")
+
+    def report_filter_errors(self, entries: List[CatalogEntry]) -> None:
+        for entry in entries:
+            self.notify(f"Invalid {entry.kind} filter {entry.name}: {entry.error}", severity="error")
 
     @on(ListView.Selected)
     async def on_filter_selected(self, event: ListView.Selected) -> None:
-        if not event.item or not event.item.id:
+        if not isinstance(event.item, FilterItem):
+            return
+
+        filename = event.item.filename
+        kind = "alarms" if event.list_view.id == "alarm-filter-list" else "entities"
+        self.last_activity = time.monotonic()
+        self.prefetcher.record_use(kind, filename)
+        entry = self.catalog.get(kind, filename)
+        if entry is not None and entry.error:
+            self.report_filter_errors([entry])
             return
-            
-        filename = f"{event.item.id}.json"
         # Determine which list triggered the event
         if event.list_view.id == "alarm-filter-list":
             await self.refresh_alarms(filter_file=filename)
@@ -147,152 +433,417 @@ class OpenGateApp(App):
             await self.refresh_entities(filter_file=filename)
 
     async def action_refresh(self) -> None:
+        self.last_activity = time.monotonic()
         # Determine active tab
         tabbed_content = self.query_one(TabbedContent)
-        active_tab = tabbed_content.active
-        
-        if active_tab == "alarms-tab":
-            filter_list = self.query_one("#alarm-filter-list", ListView)
-            if filter_list.index is not None:
-                filename = f"{filter_list.children[filter_list.index].id}.json"
-                await self.refresh_alarms(filter_file=filename)
-            else:
-                await self.refresh_alarms()
-        elif active_tab == "entities-tab":
-            filter_list = self.query_one("#entity-filter-list", ListView)
-            if filter_list.index is not None:
-                filename = f"{filter_list.children[filter_list.index].id}.json"
-                await self.refresh_entities(filter_file=filename)
-            else:
-                await self.refresh_entities()
+        await self.refresh_tab(tabbed_content.active, force=True)
 
-    async def refresh_alarms(self, filter_file: Optional[str] = None) -> None:
-        table = self.query_one("#alarms-table", DataTable)
-        table.clear()
-        
-        search_req = SearchRequest()
-        if filter_file:
+    def action_toggle_auto_refresh(self) -> None:
+        self.auto_refresh_enabled = not self.auto_refresh_enabled
+        if self.auto_refresh_enabled:
+            self.start_auto_refresh()
+        else:
+            self.workers.cancel_group(self, "auto-refresh")
+        self.update_status_bar()
+
+    async def action_toggle_virtual_mode(self) -> None:
+        self.virtual_mode = not self.virtual_mode
+        self.virtual_tables.clear()
+        self.notify(f"Virtual table mode {'on' if self.virtual_mode else 'off'}")
+        for tab in self.TABS:
+            await self.refresh_tab(tab)
+
+    def action_diagnostics(self) -> None:
+        self.push_screen(DiagnosticsScreen(self.instrumentation.registry))
+
+    def action_all_tenants(self) -> None:
+        if self.federation is None:
             try:
-                with open(Path("filters/alarms") / filter_file, "r") as f:
-                    filter_data = json.load(f)
-                    logger.info(f"Loaded alarm filter from {filter_file}: {filter_data}")
-                    if "filter" in filter_data:
-                        search_req.filter = filter_data["filter"]
-                    elif filter_data:
-                        search_req.filter = filter_data
-            except Exception as e:
-                logger.error(f"Error loading alarm filter {filter_file}: {e}")
-                self.notify(f"Error loading alarm filter {filter_file}: {e}", severity="error")
+                self.federation = FederatedClient.from_env(instrumentation=self.instrumentation)
+            except (OSError, ValueError) as e:
+                self.notify(f"Invalid tenants file: {e}", severity="error")
+                return
+            if self.federation is None:
+                self.notify("No tenants configured: set OPENGATE_TENANTS to a tenants JSON file", severity="warning")
+                return
+        search_req = self.alarm_request(self.selected_filter("#alarm-filter-list"))
+        self.push_screen(TenantAlarmsScreen(self.federation, search_req))
 
+    def action_toggle_mark(self) -> None:
+        if self.query_one(TabbedContent).active != "alarms-tab":
+            return
+        table = self.query_one("#alarms-table", DataTable)
+        if not table.row_count:
+            return
+        row_key = table.coordinate_to_cell_key(table.cursor_coordinate).row_key
+        alarm_id = row_key.value
+        if alarm_id in self.marked_alarms:
+            self.marked_alarms.discard(alarm_id)
+        else:
+            self.marked_alarms.add(alarm_id)
+        # Virtual mode prepends a row-number column
+        id_column = list(table.columns)[-len(ALARM_COLUMNS)]
+        table.update_cell(row_key, id_column, self._alarm_id_cell(alarm_id))
+        table.move_cursor(row=table.cursor_row + 1)
+        self.update_status_bar()
+
+    def action_alarm_action(self, action: str) -> None:
+        """Run ``action`` on the marked alarms (or the highlighted one) in the background."""
+        if self.query_one(TabbedContent).active != "alarms-tab":
+            return
+        alarm_ids = sorted(self.marked_alarms)
+        table = self.query_one("#alarms-table", DataTable)
+        if not alarm_ids and table.row_count:
+            alarm_ids = [table.coordinate_to_cell_key(table.cursor_coordinate).row_key.value]
+        if not alarm_ids:
+            return
+        if self.mock_mode:
+            self.notify(f"{action} is not available in mock mode", severity="warning")
+            return
+        self.run_worker(self.apply_alarm_action(action, alarm_ids), group="alarm-action")
+
+    async def apply_alarm_action(self, action: str, alarm_ids: List[str]) -> None:
+        def progress(done: int, total: int) -> None:
+            self.action_progress = f"{action}: {done}/{total}"
+            self.update_status_bar()
+
+        progress(0, len(alarm_ids))
+        try:
+            result = await self.client.change_state_bulk(action, alarm_ids, progress=progress)
+        except Exception as e:
+            logger.error(f"Error running {action}: {e}")
+            self.notify(f"Error running {action}: {e}", severity="error")
+            return
+        finally:
+            self.action_progress = None
+            self.update_status_bar()
+
+        self.marked_alarms.difference_update(result.succeeded)
+        if result.failed:
+            first_id, error = next(iter(result.failed.items()))
+            self.notify(
+                f"{action}: {len(result.succeeded)} updated, {len(result.failed)} failed ({first_id}: {error})",
+                severity="warning",
+            )
+        else:
+            self.notify(f"{action}: {len(result.succeeded)} alarms updated")
+        if result.succeeded:
+            # Delta polls would miss status changes on alarms already held
+            for sync in self.alarm_syncs.values():
+                sync.invalidate()
+            await self.refresh_tab("alarms-tab", force=True)
+
+    def selected_filter(self, list_id: str) -> Optional[str]:
+        filter_list = self.query_one(list_id, ListView)
+        item = filter_list.highlighted_child
+        return item.filename if isinstance(item, FilterItem) else None
+
+    async def refresh_tab(self, tab: str, force: bool = False, background: bool = False) -> RefreshStats:
+        if tab == "alarms-tab":
+            return await self.refresh_alarms(self.selected_filter("#alarm-filter-list"), force=force, background=background)
+        return await self.refresh_entities(self.selected_filter("#entity-filter-list"), force=force, background=background)
+
+    def start_auto_refresh(self) -> None:
+        for tab in self.TABS:
+            self.refresh_intervals[tab].reset()
+            self.run_worker(self.auto_refresh_loop(tab), group="auto-refresh", name=f"auto-refresh-{tab}")
+
+    async def auto_refresh_loop(self, tab: str) -> None:
+        """Poll one tab in the background, adapting the interval to changes and errors."""
+        interval = self.refresh_intervals[tab]
+        while True:
+            await asyncio.sleep(interval.interval)
+            if self.refresh_locks[tab].locked():
+                # Never overlap a refresh that is still in flight
+                continue
+            # Polling waits behind anything the user asked for
+            with request_priority(Priority.BACKGROUND):
+                stats = await self.refresh_tab(tab, force=True, background=True)
+            interval.record(stats)
+            self.update_status_bar()
+
+    def update_status_bar(self) -> None:
+        parts = []
+        for tab, label in (("alarms-tab", "Alarms"), ("entities-tab", "Entities")):
+            stats = self.last_refresh.get(tab)
+            if stats is None:
+                continue
+            text = f"{label}: {stats.count} items in {stats.latency * 1000:.0f} ms"
+            if self.virtual_mode and tab in self.virtual_tables:
+                text += f" ({self.virtual_tables[tab][1].describe()})"
+            if stats.error is not None:
+                text += " (error)"
+            if tab in self.snapshot_times:
+                text += f" (snapshot from {datetime.fromtimestamp(self.snapshot_times[tab]):%H:%M:%S})"
+            if self.auto_refresh_enabled:
+                text += f", next in {self.refresh_intervals[tab].interval:.0f}s"
+            parts.append(text)
+        if not self.auto_refresh_enabled:
+            parts.append("auto-refresh off")
+        if self.scheduler is not None:
+            queued = sum(self.scheduler.queue_depth().values())
+            if queued:
+                parts.append(f"{queued} requests queued")
+        unhealthy = self.resilience.unhealthy()
+        if unhealthy:
+            parts.append(f"API unavailable ({', '.join(unhealthy)}), showing last known data")
+        if self.marked_alarms:
+            parts.append(f"{len(self.marked_alarms)} marked")
+        if self.action_progress is not None:
+            parts.append(self.action_progress)
+        self.query_one("#status-bar", Static).update("  |  ".join(parts))
+
+    async def refresh_alarms(self, filter_file: Optional[str] = None, force: bool = False, background: bool = False) -> RefreshStats:
+        async with self.refresh_locks["alarms-tab"]:
+            started = time.perf_counter()
+            stats = await self._load_alarms(filter_file, force, background)
+            stats.latency = time.perf_counter() - started
+        self.last_refresh["alarms-tab"] = stats
+        if stats.error is None:
+            self.snapshot_times.pop("alarms-tab", None)
+        self.update_status_bar()
+        return stats
+
+    async def refresh_entities(self, filter_file: Optional[str] = None, force: bool = False, background: bool = False) -> RefreshStats:
+        async with self.refresh_locks["entities-tab"]:
+            started = time.perf_counter()
+            stats = await self._load_entities(filter_file, force, background)
+            stats.latency = time.perf_counter() - started
+        self.last_refresh["entities-tab"] = stats
+        if stats.error is None:
+            self.snapshot_times.pop("entities-tab", None)
+        self.update_status_bar()
+        return stats
+
+    def alarm_request(self, filter_file: Optional[str]) -> SearchRequest:
+        """Validated search of an alarm filter file; every alarm without a (valid) one."""
+        entry = self.catalog.get("alarms", filter_file)
+        if entry is None or entry.error:
+            return SearchRequest()
+        return entry.request
+
+    def entity_request(self, filter_file: Optional[str]) -> Tuple[Dict[str, Any], ColumnPlan]:
+        """Search dict and compiled column plan of an entity filter file."""
+        entry = self.catalog.get("entities", filter_file)
+        if entry is None or entry.error:
+            return DEFAULT_ENTITY_REQUEST, self.default_column_plan
+        return entry.request, entry.plan
+
+    async def _load_alarms(self, filter_file: Optional[str], force: bool, background: bool) -> RefreshStats:
+        table = self.query_one("#alarms-table", DataTable)
+        search_req = self.alarm_request(filter_file)
+
+        if self.virtual_mode and not self.mock_mode:
+            return await self._load_virtual(
+                "alarms-tab", filter_file, force, background,
+                create=lambda: self._virtual_alarms(table, search_req),
+                count=lambda: self._alarm_count(search_req.filter),
+            )
+
+        update = KeyedTableUpdate(table, ALARM_COLUMNS)
         if self.mock_mode:
             alarms = [
                 Alarm(id="AL-001", entity_id="DEV-01", name="Mock Alarm", severity="CRITICAL", status="OPEN", creation_date=datetime.now())
             ]
-        else:
-            try:
-                alarms = await self.client.query_alarms(search_req)
-            except Exception as e:
-                logger.error(f"Error loading alarms: {e}")
+            for alarm in alarms:
+                update.upsert(alarm.id, self._alarm_row(alarm))
+            return RefreshStats(count=len(alarms), changed=update.finish().changed)
+
+        # Keyed by the search itself, so an edited filter file starts a new store
+        entry = self.catalog.get("alarms", filter_file)
+        sync_key = entry.key if entry is not None else ""
+        sync = self.alarm_syncs.get(sync_key)
+        try:
+            if force and sync is None:
+                sync = self.alarm_syncs[sync_key] = AlarmDeltaSync(self.client, search_req.filter, reconcile_every=DELTA_RECONCILE_EVERY)
+            if sync is not None:
+                # Refresh only fetches alarms newer than the watermark
+                delta = await sync.refresh()
+                logger.info(f"Alarm delta for '{filter_file or ''}': +{len(delta.added)} ~{len(delta.updated)} -{len(delta.removed)}")
+                shown = self._newest(sync.alarms.values(), search_req.limit.size)
+                for alarm in shown:
+                    update.upsert(alarm.id, self._alarm_row(alarm))
+                diff = update.finish(sort_column=ALARM_DATE_COLUMN, reverse=True)
+                return RefreshStats(count=len(shown), changed=diff.changed)
+
+            narrowed = None if force else self._narrow_locally(search_req.filter)
+            if narrowed is not None:
+                shown = self._newest(narrowed, search_req.limit.size)
+                for alarm in shown:
+                    update.upsert(alarm.id, self._alarm_row(alarm))
+                diff = update.finish(sort_column=ALARM_DATE_COLUMN, reverse=True)
+                return RefreshStats(count=len(shown), changed=diff.changed)
+
+            count = 0
+            # Rows are added (or updated in place) as the response streams in
+            async for alarm in self.client.stream_alarms(search_req):
+                update.upsert(alarm.id, self._alarm_row(alarm))
+                count += 1
+            diff = update.finish(sort_column=ALARM_DATE_COLUMN, reverse=True)
+            return RefreshStats(count=count, changed=diff.changed)
+        except Exception as e:
+            logger.error(f"Error loading alarms: {e}")
+            if not background:
                 self.notify(f"Error loading alarms: {e}", severity="error")
-                return
+            return RefreshStats(count=table.row_count, error=e)
 
-        for alarm in alarms:
-            table.add_row(alarm.id, alarm.entity_id, alarm.name, alarm.severity, alarm.status, str(alarm.creation_date))
-
-    async def refresh_entities(self, filter_file: Optional[str] = None) -> None:
+    async def _load_entities(self, filter_file: Optional[str], force: bool, background: bool) -> RefreshStats:
         table = self.query_one("#entities-table", DataTable)
-        table.clear()
-        
-        search_req = {
-            "limit": {"size": 25, "start": 1}
-        }
-        # Default column mapping: list of (Header, DataPath)
-        column_map = [("ID", ["id"]), ("NAME", ["name"]), ("TYPE", ["resourceType"])]
-        
-        if filter_file:
-            try:
-                with open(Path("filters/entities") / filter_file, "r") as f:
-                    filter_data = json.load(f)
-                    logger.info(f"Loaded entity filter from {filter_file}: {filter_data}")
-                    search_req = filter_data
-                    if "select" in filter_data:
-                        column_map = self.parse_complex_select(filter_data["select"])
-            except Exception as e:
-                logger.error(f"Error loading entity filter {filter_file}: {e}")
-                self.notify(f"Error loading entity filter {filter_file}: {e}", severity="error")
-
-        # Update columns dynamically
-        table.clear(columns=True)
-        table.add_columns(*[col[0].upper() for col in column_map])
-
+        search_req, plan = self.entity_request(filter_file)
+        if self.virtual_mode:
+            # Entity searches have no count endpoint; the total comes from the last short page
+            return await self._load_virtual(
+                "entities-tab", filter_file, force, background,
+                create=lambda: self._virtual_entities(table, search_req, plan),
+            )
+
+        # Columns are only rebuilt when the filter's column set changes
+        update = KeyedTableUpdate(table, [header.upper() for header in plan.headers])
         try:
-            entities = await asyncio.to_thread(self.entities_helper.search_entities, search_req)
-            for entity in entities:
-                row = []
-                for header, path in column_map:
-                    val = self.get_nested_value(entity, path)
-                    row.append(str(val) if val is not None else "N/A")
-                table.add_row(*row)
+            count = 0
+            keys: Dict[str, int] = {}
+            # Native async search: rows are added (or updated in place) as the response streams in
+            async for entity in self.entities_helper.iter_entities(search_req, use_cache=not (force or background)):
+                row = plan.row(entity)
+                update.upsert(self._entity_key(entity, row, keys), row)
+                count += 1
+            diff = update.finish()
+            return RefreshStats(count=count, changed=diff.changed)
         except Exception as e:
             logger.error(f"Error loading entities: {e}")
-            self.notify(f"Error loading entities: {e}", severity="error")
+            if not background:
+                self.notify(f"Error loading entities: {e}", severity="error")
+            return RefreshStats(count=table.row_count, error=e)
+
+    async def _load_virtual(
+        self,
+        tab: str,
+        filter_file: Optional[str],
+        force: bool,
+        background: bool,
+        create: Callable[[], VirtualTable],
+        count: Optional[Callable[[], Awaitable[int]]] = None,
+    ) -> RefreshStats:
+        """Show (or refresh) the paged window for ``tab``; ``create`` builds a new ``VirtualTable``."""
+        entry = self.virtual_tables.get(tab)
+        try:
+            if entry is None or entry[0] != filter_file:
+                virtual = create()
+                self.virtual_tables[tab] = (filter_file, virtual)
+                diff = await virtual.load(await count() if count else None)
+            elif force or background:
+                virtual = entry[1]
+                diff = await virtual.reload(await count() if count else None)
+            else:
+                virtual = entry[1]
+                diff = await virtual.load(virtual.total, virtual.first_page)
+            return RefreshStats(count=virtual.total or virtual.table.row_count, changed=diff.changed)
+        except Exception as e:
+            logger.error(f"Error loading {tab} page: {e}")
+            if not background:
+                self.notify(f"Error loading page: {e}", severity="error")
+            return RefreshStats(error=e)
+
+    async def _alarm_count(self, filter_data: Dict[str, Any]) -> int:
+        summary = await self.client.get_summary(filter_data, use_cache=False)
+        return summary.count
+
+    def _virtual_alarms(self, table: DataTable, search_req: SearchRequest) -> VirtualTable:
+        async def fetch_page(page: int, size: int) -> List[Tuple[str, tuple]]:
+            request = search_req.model_copy(update={"limit": Pagination(size=size, start=page)})
+            # The virtual table keeps its own page LRU
+            alarms = await self.client.query_alarms(request, use_cache=False)
+            return [(alarm.id, self._alarm_row(alarm)) for alarm in alarms]
+
+        return VirtualTable(table, ALARM_COLUMNS, fetch_page, namespace="alarms")
+
+    def _virtual_entities(self, table: DataTable, search_req: Dict[str, Any], plan: ColumnPlan) -> VirtualTable:
+        async def fetch_page(page: int, size: int) -> List[Tuple[str, List[str]]]:
+            request = {**search_req, "limit": {"size": size, "start": page}}
+            entities = await self.entities_helper.search_entities_async(request, use_cache=False, allow_stale=True)
+            keys: Dict[str, int] = {}
+            rows = []
+            for entity in entities:
+                row = plan.row(entity)
+                rows.append((self._entity_key(entity, row, keys), row))
+            return rows
+
+        return VirtualTable(table, [header.upper() for header in plan.headers], fetch_page, namespace="entities")
+
+    @on(DataTable.RowHighlighted)
+    def on_row_highlighted(self, event: DataTable.RowHighlighted) -> None:
+        if not self.virtual_mode:
+            return
+        tab = "alarms-tab" if event.data_table.id == "alarms-table" else "entities-tab"
+        entry = self.virtual_tables.get(tab)
+        if entry is not None:
+            self.run_worker(self._follow_cursor(entry[1], event.cursor_row), group=f"virtual-{tab}")
+
+    async def _follow_cursor(self, virtual: VirtualTable, row: int) -> None:
+        try:
+            if await virtual.follow_cursor(row) is not None:
+                self.update_status_bar()
+        except Exception as e:
+            logger.error(f"Error loading page: {e}")
+            self.notify(f"Error loading page: {e}", severity="error")
+
+    def _narrow_locally(self, filter_data: Dict[str, Any]) -> Optional[List[Alarm]]:
+        """Evaluate ``filter_data`` over an unfiltered alarm store already held, if any.
+
+        Only a store refreshed within the alarm cache TTL is used, so a store
+        left behind while auto-refresh is off does not answer with old data.
+        """
+        max_age = self.cache.ttls.get("alarms", self.cache.default_ttl)
+        source = next(
+            (sync for sync in self.alarm_syncs.values() if sync.initialized and not sync.filter_data and sync.age() < max_age),
+            None,
+        )
+        if source is None:
+            return None
+        # Local evaluation needs NumPy, which is kept out of startup
+        from ..filtering import UnsupportedFilter, compile_filter
+
+        try:
+            compiled = compile_filter(filter_data)
+        except UnsupportedFilter as e:
+            logger.info(f"Filter needs the server: {e}")
+            return None
+        frame = source.frame()
+        ids = frame.ids[compiled.mask(frame)]
+        logger.info(f"Filter evaluated locally: {len(ids)} of {len(frame)} alarms")
+        return [source.alarms[alarm_id] for alarm_id in ids]
+
+    @staticmethod
+    def _newest(alarms: Iterable[Alarm], limit: int) -> List[Alarm]:
+        """The ``limit`` most recent alarms of a local store.
+
+        The plain table shows at most one page of the filter (``limit.size``),
+        however the rows were loaded; the full set is for virtual mode (**v**).
+        """
+        return heapq.nlargest(limit, alarms, key=lambda alarm: alarm.creation_date.timestamp())
+
+    def _alarm_id_cell(self, alarm_id: str) -> Any:
+        return Text(f"* {alarm_id}", style="bold reverse") if alarm_id in self.marked_alarms else alarm_id
+
+    def _alarm_row(self, alarm: Alarm) -> tuple:
+        return (self._alarm_id_cell(alarm.id), alarm.entity_id, alarm.name, alarm.severity, alarm.status, str(alarm.creation_date))
+
+    def _entity_key(self, entity: Dict[str, Any], row: List[str], seen: Dict[str, int]) -> str:
+        """Stable row key: the entity identifier (or first column), suffixed if repeated."""
+        key = entity.get("id") if isinstance(entity.get("id"), str) else None
+        if key is None:
+            key = get_nested_value(entity, ["provision", "device", "identifier", "value"])
+        key = str(key) if key is not None else (row[0] if row else "")
+        seen[key] = seen.get(key, 0) + 1
+        return key if seen[key] == 1 else f"{key}#{seen[key]}"
 
     def parse_complex_select(self, select_list: List[Any]) -> List[tuple]:
         """Parse complex select structure into (Header, DataPath) pairs."""
-        columns = []
-        for item in select_list:
-            if isinstance(item, str):
-                columns.append((item, item.split(".")))
-            elif isinstance(item, dict):
-                base_name = item.get("name", "")
-                base_path = base_name.replace("[]", "").split(".")
-                fields = item.get("fields", [])
-                if not fields:
-                    columns.append((base_name, base_path))
-                else:
-                    for f in fields:
-                        field_path = f.get("field", "").split(".")
-                        alias = f.get("alias", f.get("field", base_name))
-                        columns.append((alias, base_path + field_path))
-        return columns
+        return parse_complex_select(select_list)
 
     def get_nested_value(self, data: Any, path: List[str]) -> Any:
         """Navigate nested dictionary/list using path, handling OpenGate structures."""
-        current = data
-        for i, part in enumerate(path):
-            if current is None:
-                return None
-            
-            if isinstance(current, dict):
-                # 1. Try direct match
-                if part in current:
-                    current = current[part]
-                # 2. Skip 'provision' at start if missing
-                elif i == 0 and part == "provision":
-                    continue
-                # 3. Handle 'current' or '_current' wrapper
-                elif "current" in current and isinstance(current["current"], dict) and part in current["current"]:
-                    current = current["current"][part]
-                elif "_current" in current and isinstance(current["_current"], dict) and part in current["_current"]:
-                    current = current["_current"][part]
-                else:
-                    return None
-            elif isinstance(current, list) and current:
-                # Take first element and re-try the same part if it's the root or continue
-                current = current[0]
-                # If after taking first element we are in a dict, we still need to find 'part'
-                if isinstance(current, dict):
-                    if part in current:
-                        current = current[part]
-                    elif "current" in current and isinstance(current["current"], dict) and part in current["current"]:
-                        current = current["current"][part]
-                    elif "_current" in current and isinstance(current["_current"], dict) and part in current["_current"]:
-                        current = current["_current"][part]
-                    else:
-                        return None
-            else:
-                return None
-        return current
+        return get_nested_value(data, path)
 
 
     @on(DataTable.RowSelected)
@@ -301,10 +852,11 @@ class OpenGateApp(App):
             return
             
         row_key = event.row_key
-        row_values = self.query_one("#alarms-table", DataTable).get_row(row_key)
+        # Virtual mode prepends a row-number column
+        row_values = self.query_one("#alarms-table", DataTable).get_row(row_key)[-len(ALARM_COLUMNS):]
         
         alarm = Alarm(
-            id=row_values[0],
+            id=row_key.value,
             entity_id=row_values[1],
             name=row_values[2],
             severity=row_values[3],
@@ -316,6 +868,12 @@ class OpenGateApp(App):
 
 
 def run():
+    from dotenv import load_dotenv
+
+    # Settings are read when the clients are created, not when modules are imported
+    load_dotenv()
+    # Log to the file only: a console handler would draw over the TUI
+    configure_logging(console=False)
     app = OpenGateApp()
     app.run()
 
@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from ..resilience import CircuitOpenError, retry_after
+
+
+@dataclass
+class RefreshStats:
+    """Outcome of one table refresh, used to adapt the polling interval."""
+    count: int = 0
+    changed: bool = False
+    latency: float = 0.0
+    error: Optional[BaseException] = None
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Seconds the server (``Retry-After`` on 429/503) or an open circuit breaker asks us to wait."""
+    if isinstance(error, CircuitOpenError):
+        return error.retry_in
+    return retry_after(getattr(error, "response", None))
+
+
+class AdaptiveInterval:
+    """Polling interval that speeds up while data changes and backs off when idle or failing.
+
+    A refresh that changed something halves the interval (down to ``minimum``),
+    an unchanged one grows it by ``idle_factor``, and an error doubles it (or
+    jumps to the server's ``Retry-After``), capped at ``maximum``.
+    """
+
+    def __init__(self, initial: float = 10.0, minimum: float = 2.0, maximum: float = 120.0, idle_factor: float = 1.5):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.idle_factor = idle_factor
+        self.interval = initial
+
+    def record(self, stats: RefreshStats) -> float:
+        ceiling = self.maximum
+        if stats.error is not None:
+            retry_after = retry_after_seconds(stats.error) or 0.0
+            # The server's Retry-After wins even over our own ceiling
+            ceiling = max(ceiling, retry_after)
+            self.interval = max(self.interval * 2, retry_after)
+        elif stats.changed:
+            self.interval = self.interval / 2
+        else:
+            self.interval = self.interval * self.idle_factor
+        self.interval = min(ceiling, max(self.minimum, self.interval))
+        return self.interval
+
+    def reset(self) -> None:
+        self.interval = self.initial
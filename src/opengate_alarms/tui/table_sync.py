@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence, Set
+
+from textual.widgets import DataTable
+from textual.widgets.data_table import RowKey
+
+
+@dataclass
+class TableDiff:
+    added: int = 0
+    removed: int = 0
+    updated_cells: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.updated_cells)
+
+
+class KeyedTableUpdate:
+    """Applies a refresh to a ``DataTable`` as keyed row changes instead of clear-and-rebuild.
+
+    Call ``upsert()`` for every row of the new result (rows can stream in), then
+    ``finish()`` to drop the rows that were not seen. Only rows and cells that
+    actually changed are touched, and the cursor stays on the same row key.
+    Columns are rebuilt only when the column labels differ.
+    """
+
+    def __init__(self, table: DataTable, columns: Sequence[str]):
+        self.table = table
+        self.diff = TableDiff()
+        self._seen: Set[str] = set()
+        self._cursor_key: Optional[RowKey] = None
+
+        labels = [str(column.label) for column in table.columns.values()]
+        if labels != list(columns):
+            table.clear(columns=True)
+            table.add_columns(*columns)
+        elif table.row_count:
+            self._cursor_key = table.coordinate_to_cell_key(table.cursor_coordinate).row_key
+        self._column_keys = list(table.columns.keys())
+
+    def upsert(self, key: str, values: Sequence[str]) -> None:
+        self._seen.add(key)
+        table = self.table
+        if key not in table.rows:
+            table.add_row(*values, key=key)
+            self.diff.added += 1
+            return
+        current = table.get_row(key)
+        for column_key, old, new in zip(self._column_keys, current, values):
+            if old != new:
+                table.update_cell(key, column_key, new)
+                self.diff.updated_cells += 1
+
+    def finish(self, sort_column: Optional[int] = None, reverse: bool = False) -> TableDiff:
+        table = self.table
+        stale = [row_key for row_key in table.rows if row_key.value not in self._seen]
+        for row_key in stale:
+            table.remove_row(row_key)
+        self.diff.removed = len(stale)
+
+        if sort_column is not None and self.diff.added:
+            table.sort(self._column_keys[sort_column], reverse=reverse)
+        if self._cursor_key is not None and self._cursor_key in table.rows:
+            table.move_cursor(row=table.get_row_index(self._cursor_key), scroll=False)
+        return self.diff
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from textual.widgets import DataTable
+
+from ..cache import ResponseCache
+from .table_sync import KeyedTableUpdate, TableDiff
+
+logger = logging.getLogger("opengate_alarms.tui.virtual")
+
+# One table row: (row key, cell values)
+Row = Tuple[str, Sequence]
+# Fetches one page of rows; pages are numbered from 1 like ``limit.start``
+PageFetcher = Callable[[int, int], Awaitable[List[Row]]]
+
+
+class VirtualTable:
+    """Shows a window of a large, server-paged result set in a ``DataTable``.
+
+    Only ``window_pages`` consecutive pages are in the table at any time. When
+    the cursor gets within half a page of either edge the window slides by one
+    page, and the page beyond it is prefetched. Fetched pages live in a small
+    LRU (``cache_pages``) so scrolling back and forth does not hit the API.
+
+    The first column is the absolute row number, which keeps the rows ordered
+    as the window slides. ``total`` is the size of the whole result set when
+    known (e.g. from ``get_summary``); otherwise it is inferred from the first
+    short page.
+    """
+
+    def __init__(
+        self,
+        table: DataTable,
+        columns: Sequence[str],
+        fetch_page: PageFetcher,
+        page_size: int = 100,
+        window_pages: int = 3,
+        cache_pages: int = 8,
+        namespace: str = "pages",
+    ):
+        if page_size < 1 or window_pages < 1:
+            raise ValueError("page_size and window_pages must be at least 1")
+        self.table = table
+        self.columns = ["#", *columns]
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.window_pages = window_pages
+        self.namespace = namespace
+        self.pages = ResponseCache(max_entries=max(cache_pages, window_pages + 2))
+        self.total: Optional[int] = None
+        self.first_page = 1
+        self._last_page: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._prefetch: Optional[asyncio.Task] = None
+
+    @property
+    def last_page(self) -> Optional[int]:
+        if self.total is not None:
+            return max(1, -(-self.total // self.page_size))
+        return self._last_page
+
+    @property
+    def window(self) -> Tuple[int, int]:
+        """1-based (first, last) absolute row numbers currently in the table."""
+        first = (self.first_page - 1) * self.page_size + 1
+        return first, first + self.table.row_count - 1
+
+    async def page(self, number: int) -> List[Row]:
+        rows = await self.pages.get_or_fetch(self.namespace, str(number), lambda: self.fetch_page(number, self.page_size))
+        if len(rows) < self.page_size and (self._last_page is None or number < self._last_page):
+            self._last_page = number
+            if self.total is None:
+                self.total = (number - 1) * self.page_size + len(rows)
+        return rows
+
+    async def load(self, total: Optional[int] = None, first_page: int = 1) -> TableDiff:
+        """Show the window starting at ``first_page``; pages already cached are reused."""
+        if total is not None:
+            self.total = total
+        async with self._lock:
+            return await self._render(max(1, first_page))
+
+    async def reload(self, total: Optional[int] = None) -> TableDiff:
+        """Drop the cached pages and re-fetch the current window (for refreshes)."""
+        self.pages.invalidate()
+        self._last_page = None
+        self.total = total
+        return await self.load(total, self.first_page)
+
+    async def follow_cursor(self, row: int) -> Optional[TableDiff]:
+        """Slide the window if the cursor (table row index) is close to one of its edges."""
+        if self._lock.locked():
+            return None
+        margin = self.page_size // 2
+        last_page = self.last_page
+        window_end = self.first_page + self.window_pages - 1
+        if row < margin and self.first_page > 1:
+            forward = False
+        elif row >= self.table.row_count - margin and (last_page is None or window_end < last_page):
+            forward = True
+        else:
+            return None
+        async with self._lock:
+            diff = await self._render(self.first_page + (1 if forward else -1))
+        self._prefetch_beyond(forward)
+        return diff
+
+    def _prefetch_beyond(self, forward: bool) -> None:
+        number = self.first_page + self.window_pages if forward else self.first_page - 1
+        last_page = self.last_page
+        if number < 1 or (last_page is not None and number > last_page):
+            return
+        if self._prefetch is not None and not self._prefetch.done():
+            return
+        self._prefetch = asyncio.create_task(self._quiet_page(number))
+
+    async def _quiet_page(self, number: int) -> None:
+        try:
+            await self.page(number)
+        except Exception as e:
+            logger.debug(f"Prefetch of page {number} failed: {e}")
+
+    def _clamp(self, first_page: int) -> int:
+        last_page = self.last_page
+        if last_page is not None:
+            first_page = min(first_page, last_page - self.window_pages + 1)
+        return max(1, first_page)
+
+    async def _render(self, first_page: int) -> TableDiff:
+        first_page = self._clamp(first_page)
+        numbers = range(first_page, first_page + self.window_pages)
+        pages = await asyncio.gather(*(self.page(number) for number in numbers))
+        if self._clamp(first_page) != first_page:
+            # A short page revealed that the window ran past the end; the
+            # pages of the shifted window are all cached now.
+            first_page = self._clamp(first_page)
+            numbers = range(first_page, first_page + self.window_pages)
+            pages = await asyncio.gather(*(self.page(number) for number in numbers))
+
+        last_page = self.last_page
+        update = KeyedTableUpdate(self.table, self.columns)
+        for number, rows in zip(numbers, pages):
+            if last_page is not None and number > last_page:
+                break
+            offset = (number - 1) * self.page_size
+            for position, (key, values) in enumerate(rows, start=offset + 1):
+                update.upsert(key, (position, *values))
+        self.first_page = first_page
+        return update.finish(sort_column=0)
+
+    def describe(self) -> str:
+        """Window indicator for the status bar, e.g. ``rows 101-400 of 48213``."""
+        first, last = self.window
+        if last < first:
+            return "no rows"
+        total = f"{self.total}" if self.total is not None else f"{last}+"
+        return f"rows {first}-{last} of {total}"
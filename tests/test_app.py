@@ -0,0 +1,110 @@
+import json
+
+import httpx
+import pytest
+import respx
+from textual.widgets import DataTable
+
+from opengate_alarms.tui.app import OpenGateApp
+
+BASE_URL = "https://api.example.test"
+
+def _alarm(i, status="OPEN"):
+    return {
+        "identifier": f"AL-{i:03d}",
+        "entityIdentifier": "DEV-01",
+        "name": "Test Alarm",
+        "severity": "CRITICAL",
+        "status": status,
+        "openingDate": f"2024-01-01T{i // 60:02d}:{i % 60:02d}:00Z",
+    }
+
+class FakeApi:
+    """Pages through a fixed alarm list; entity searches are empty."""
+
+    def __init__(self, alarms):
+        self.alarms = alarms
+
+    def search(self, request):
+        limit = json.loads(request.content or b"{}").get("limit", {"size": 50, "start": 1})
+        first = (limit["start"] - 1) * limit["size"]
+        return httpx.Response(200, json={"alarms": self.alarms[first:first + limit["size"]]})
+
+    def summary(self, request):
+        return httpx.Response(200, json={"summary": {"date": "2024-01-01T00:00:00Z", "count": len(self.alarms), "summaryGroup": []}})
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENGATE_API_KEY", "fake-key")
+    monkeypatch.setenv("OPENGATE_BASE_URL", BASE_URL)
+    monkeypatch.setenv("OPENGATE_SNAPSHOT_PATH", "off")
+    (tmp_path / "filters" / "alarms").mkdir(parents=True)
+    (tmp_path / "filters" / "entities").mkdir()
+    monkeypatch.chdir(tmp_path)
+    api = FakeApi([_alarm(i) for i in range(120)])
+    with respx.mock:
+        respx.post(f"{BASE_URL}/north/v80/search/entities/alarms").mock(side_effect=api.search)
+        respx.post(f"{BASE_URL}/north/v80/search/entities/alarms/summary").mock(side_effect=api.summary)
+        respx.post(f"{BASE_URL}/north/v80/search/entities").mock(return_value=httpx.Response(200, json={"entities": []}))
+        yield api
+
+async def _started(app, pilot):
+    """Wait for the initial load, then stop the prefetch it leaves running."""
+    load = next((worker for worker in app.workers if worker.group == "initial-load"), None)
+    if load is not None:
+        await load.wait()
+    await pilot.pause()
+    app.workers.cancel_all()
+
+@pytest.mark.asyncio
+async def test_delta_synced_filter_shows_one_page_like_a_click(api):
+    app = OpenGateApp()
+    app.auto_refresh_enabled = False
+    async with app.run_test() as pilot:
+        await _started(app, pilot)
+        table = app.query_one("#alarms-table", DataTable)
+        assert table.row_count == 50
+
+        # r: the whole result set is synced, but the table keeps one page, newest first
+        stats = await app._load_alarms(None, force=True, background=False)
+        assert len(app.alarm_syncs[""].alarms) == 120
+        assert stats.count == table.row_count == 50
+        assert str(table.get_row_at(0)[0]) == "AL-119"
+
+@pytest.mark.asyncio
+async def test_filter_files_with_any_name_can_be_hot_reloaded(api, tmp_path):
+    app = OpenGateApp()
+    app.auto_refresh_enabled = False
+    async with app.run_test() as pilot:
+        await _started(app, pilot)
+        for name in ("2024 alarms.json", "open.v2.json"):
+            (tmp_path / "filters" / "alarms" / name).write_text(json.dumps({"eq": {"alarm.status": "OPEN"}}))
+        await app.reload_filters()
+        await pilot.pause()
+
+        items = app.query_one("#alarm-filter-list").children
+        assert [item.filename for item in items] == ["2024 alarms.json", "open.v2.json"]
+        app.query_one("#alarm-filter-list").index = 1
+        assert app.selected_filter("#alarm-filter-list") == "open.v2.json"
+
+@pytest.mark.asyncio
+async def test_filters_are_narrowed_locally_only_from_a_recent_store(api, tmp_path):
+    (tmp_path / "filters" / "alarms" / "open.json").write_text(json.dumps({"eq": {"alarm.status": "OPEN"}}))
+    app = OpenGateApp()
+    app.auto_refresh_enabled = False
+    async with app.run_test() as pilot:
+        await _started(app, pilot)
+        await app._load_alarms(None, force=True, background=False)
+        # Nothing cached, so only the store can answer without a request
+        app.cache.invalidate()
+        route = respx.routes[0]
+        calls = route.call_count
+
+        # The unfiltered store was just synced: the filter is answered without a request
+        stats = await app._load_alarms("open.json", force=False, background=False)
+        assert stats.count == 50 and route.call_count == calls
+
+        # Older than the alarm cache TTL: the server is asked again
+        app.alarm_syncs[""].synced_at -= app.cache.ttls["alarms"] + 1
+        stats = await app._load_alarms("open.json", force=False, background=False)
+        assert stats.count == 50 and route.call_count == calls + 1
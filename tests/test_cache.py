@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.cache import ResponseCache, cache_key
+from opengate_alarms.client import OpenGateAlarmClient
+from opengate_alarms.models import SearchRequest
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_key_is_canonical():
+    assert cache_key({"a": 1, "b": {"c": [1, 2]}}) == cache_key({"b": {"c": [1, 2]}, "a": 1})
+    assert cache_key({"a": 1}) != cache_key({"a": 2})
+
+def test_ttl_and_lru_eviction():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=2, ttls={"alarms": 10}, clock=clock)
+    cache.set("alarms", "a", 1)
+    cache.set("alarms", "b", 2)
+    cache.get("alarms", "a")
+    cache.set("alarms", "c", 3)
+
+    assert cache.get("alarms", "b") is None  # least recently used
+    assert cache.get("alarms", "a") == 1
+    clock.now = 11
+    assert cache.get("alarms", "a") is None
+
+@pytest.mark.asyncio
+async def test_get_or_fetch_coalesces_concurrent_requests():
+    cache = ResponseCache()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [1, 2, 3]
+
+    results = await asyncio.gather(*(cache.get_or_fetch("alarms", "k", fetch) for _ in range(5)))
+
+    assert calls == 1
+    assert results == [[1, 2, 3]] * 5
+    assert cache.coalesced == 4
+    assert await cache.get_or_fetch("alarms", "k", fetch) == [1, 2, 3]
+    assert cache.hits == 1
+
+@pytest.mark.asyncio
+async def test_cancelling_the_first_caller_does_not_cancel_the_shared_fetch():
+    cache = ResponseCache()
+    release = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return [1, 2, 3]
+
+    first = asyncio.create_task(cache.get_or_fetch("alarms", "k", fetch))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(cache.get_or_fetch("alarms", "k", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == [1, 2, 3]
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert calls == 1
+    assert cache.get("alarms", "k") == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_get_or_fetch_does_not_cache_errors():
+    cache = ResponseCache()
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_fetch("alarms", "k", fail)
+    assert len(cache) == 0
+
+@pytest.mark.asyncio
+async def test_client_cache_and_change_state_invalidation():
+    client = OpenGateAlarmClient(api_key="fake-key", cache=ResponseCache())
+    url = f"{client.base_url}/search/entities/alarms"
+    alarm = {
+        "identifier": "AL-001",
+        "entityIdentifier": "DEV-01",
+        "name": "Test Alarm",
+        "severity": "CRITICAL",
+        "status": "OPEN",
+        "openingDate": "2023-10-27T10:00:00Z",
+    }
+    request = SearchRequest(filter={"eq": {"alarm.status": "OPEN"}})
+
+    async with respx.mock:
+        route = respx.post(url).mock(return_value=httpx.Response(200, json=[alarm]))
+        respx.post(f"{client.base_url}/alarms").mock(return_value=httpx.Response(200))
+
+        await client.query_alarms(request)
+        streamed = [a async for a in client.stream_alarms(request)]
+        assert route.call_count == 1
+        assert [a.id for a in streamed] == ["AL-001"]
+
+        await client.query_alarms(request, use_cache=False)
+        assert route.call_count == 2
+
+        assert await client.change_state("ATTEND", ["AL-001"])
+        await client.query_alarms(request)
+        assert route.call_count == 3
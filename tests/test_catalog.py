@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+from opengate_alarms.catalog import FilterCatalog
+from opengate_alarms.models import SearchRequest
+
+FILTERS = Path(__file__).parent.parent / "filters"
+
+def write(path, data, mtime=None):
+    path.write_text(data if isinstance(data, str) else json.dumps(data))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+def test_catalog_validates_every_filter_once(tmp_path):
+    shutil.copytree(FILTERS, tmp_path / "filters")
+    catalog = FilterCatalog(tmp_path / "filters")
+    changed = catalog.refresh()
+
+    assert ("alarms", "open_alarms.json") in changed and ("entities", "device_status.json") in changed
+    assert [entry.label for entry in catalog.entries("alarms")] == ["all_alarms", "critical_alarms", "open_alarms"]
+    assert catalog.get("alarms", "open_alarms.json").request == SearchRequest(filter={"eq": {"alarm.status": "OPEN"}})
+    devices = catalog.get("entities", "device_status.json")
+    assert devices.plan.headers[:2] == ["ID", "NAME"] and devices.request["limit"] == {"size": 25, "start": 1}
+    assert not catalog.errors()
+    assert catalog.refresh() == []
+
+def test_refresh_reloads_only_changed_files_and_reports_errors(tmp_path):
+    alarms = tmp_path / "alarms"
+    alarms.mkdir()
+    write(alarms / "open.json", {"filter": {"eq": {"alarm.status": "OPEN"}}}, mtime=1000)
+    write(alarms / "critical.json", {"eq": {"alarm.severity": "CRITICAL"}}, mtime=1000)
+    catalog = FilterCatalog(tmp_path)
+    catalog.refresh()
+    critical = catalog.get("alarms", "critical.json")
+    old_key = catalog.get("alarms", "open.json").key
+
+    # Saved again without changes: re-parsed, but not reported
+    write(alarms / "open.json", {"filter": {"eq": {"alarm.status": "OPEN"}}}, mtime=2000)
+    assert catalog.refresh() == []
+
+    write(alarms / "open.json", {"filter": {"eq": {"alarm.status": "CLOSED"}}}, mtime=3000)
+    write(alarms / "broken.json", "{not json")
+    (alarms / "critical.json").unlink()
+    changed = catalog.refresh()
+
+    assert sorted(changed) == [("alarms", "broken.json"), ("alarms", "critical.json"), ("alarms", "open.json")]
+    assert catalog.get("alarms", "open.json").key != old_key
+    assert catalog.get("alarms", "critical.json") is None and critical.request.filter
+    [broken] = catalog.errors()
+    assert broken.name == "broken.json" and broken.request is None and "Expecting" in broken.error
+
+def test_invalid_entity_select_is_an_error_at_load(tmp_path):
+    entities = tmp_path / "entities"
+    entities.mkdir()
+    write(entities / "bad.json", {"select": [{"name": "provision.device.name", "fields": ["value"]}]})
+    write(entities / "plain.json", {"filter": {"eq": {"resourceType": "entity.device"}}})
+    catalog = FilterCatalog(tmp_path)
+    catalog.refresh()
+
+    assert "invalid select" in catalog.get("entities", "bad.json").error
+    assert catalog.get("entities", "plain.json").plan.headers == ["ID", "NAME", "TYPE"]
+
+def test_scan_leaves_the_catalog_untouched_until_applied(tmp_path):
+    alarms = tmp_path / "alarms"
+    alarms.mkdir()
+    write(alarms / "open.json", {"filter": {"eq": {"alarm.status": "OPEN"}}})
+    catalog = FilterCatalog(tmp_path)
+    catalog.refresh()
+    before = catalog.entries("alarms")
+
+    write(alarms / "critical.json", {"eq": {"alarm.severity": "CRITICAL"}})
+    (alarms / "open.json").unlink()
+    entries, changed = catalog.scan()
+
+    assert catalog.entries("alarms") == before
+    catalog.apply(entries)
+    assert sorted(changed) == [("alarms", "critical.json"), ("alarms", "open.json")]
+    assert [entry.name for entry in catalog.entries("alarms")] == ["critical.json"]
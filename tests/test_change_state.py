@@ -0,0 +1,63 @@
+import json
+import pytest
+import respx
+import httpx
+from opengate_alarms.client import OpenGateAlarmClient
+
+def state_server(rejected=(), flaky=0):
+    """Reject batches containing any id in ``rejected``; fail the first ``flaky`` calls with 503."""
+    calls = []
+
+    def handler(request):
+        ids = json.loads(request.content)["alarms"]
+        calls.append(ids)
+        if len(calls) <= flaky:
+            return httpx.Response(503)
+        if any(alarm_id in rejected for alarm_id in ids):
+            return httpx.Response(400)
+        return httpx.Response(200)
+
+    return handler, calls
+
+@pytest.mark.asyncio
+async def test_bulk_change_state_batches_and_reports_progress():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    handler, calls = state_server()
+    ids = [f"AL-{i}" for i in range(25)]
+    seen = []
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/alarms").mock(side_effect=handler)
+        result = await client.change_state_bulk("ATTEND", ids + ids[:5], batch_size=10, progress=lambda done, total: seen.append((done, total)))
+
+    assert result.ok and result.succeeded == ids
+    assert sorted(len(batch) for batch in calls) == [5, 10, 10]
+    assert seen[-1] == (25, 25)
+
+@pytest.mark.asyncio
+async def test_bulk_change_state_isolates_rejected_ids_and_retries():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    client.retry_backoff = 0
+    handler, calls = state_server(rejected={"AL-3"}, flaky=1)
+    ids = [f"AL-{i}" for i in range(8)]
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/alarms").mock(side_effect=handler)
+        result = await client.change_state_bulk("CLOSE", ids, batch_size=8)
+
+    assert result.failed == {"AL-3": "HTTP 400"}
+    assert result.succeeded == [i for i in ids if i != "AL-3"]
+    # 503 retry, then the rejected batch is split down to the bad id
+    assert calls[0] == calls[1] == ids
+    assert ["AL-3"] in calls
+
+@pytest.mark.asyncio
+async def test_bulk_change_state_does_not_split_auth_errors():
+    client = OpenGateAlarmClient(api_key="fake-key")
+
+    async with respx.mock:
+        route = respx.post(f"{client.base_url}/alarms").mock(return_value=httpx.Response(401))
+        result = await client.change_state_bulk("ATTEND", ["AL-1", "AL-2"])
+
+    assert route.call_count == 1
+    assert result.failed == {"AL-1": "HTTP 401", "AL-2": "HTTP 401"}
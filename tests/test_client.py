@@ -1,8 +1,9 @@
+import json
 import pytest
 import respx
 import httpx
 from opengate_alarms.client import OpenGateAlarmClient
-from opengate_alarms.models import Alarm, SearchRequest
+from opengate_alarms.models import Alarm, Pagination, SearchRequest
 from datetime import datetime
 
 @pytest.mark.asyncio
@@ -30,6 +31,20 @@ async def test_query_alarms_mock():
         assert alarms[0].id == "AL-001"
         assert alarms[0].severity == "CRITICAL"
 
+@pytest.mark.asyncio
+async def test_query_alarms_logs_each_request_once(caplog):
+    client = OpenGateAlarmClient(api_key="fake-key")
+    url = f"{client.base_url}/search/entities/alarms"
+
+    async with respx.mock:
+        respx.post(url).mock(return_value=httpx.Response(200, json=[]))
+        with caplog.at_level("INFO", logger="opengate_alarms.requests"):
+            await client.query_alarms()
+
+    assert [r.getMessage() for r in caplog.records if r.name == "opengate_alarms.requests"] == [
+        f"Querying alarms - URL: {url} - Payload: {{}}"
+    ]
+
 @pytest.mark.asyncio
 async def test_get_summary_mock():
     client = OpenGateAlarmClient(api_key="fake-key")
@@ -57,3 +72,120 @@ async def test_get_summary_mock():
         
         assert summary.count == 1
         assert len(summary.summary_group) == 1
+
+@pytest.mark.asyncio
+async def test_client_reuses_connection_pool():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    url = f"{client.base_url}/search/entities/alarms/summary"
+
+    mock_response = {"summary": {"date": "2023-10-27T10:00:00Z", "count": 0, "summaryGroup": []}}
+
+    async with respx.mock:
+        respx.post(url).mock(return_value=httpx.Response(200, json=mock_response))
+
+        async with client:
+            await client.get_summary()
+            pool = client.http
+            await client.get_summary()
+            assert client.http is pool
+            assert not pool.is_closed
+
+        assert pool.is_closed
+        assert client._http is None
+
+def _paged_alarms(total: int):
+    """respx side effect serving `total` alarms split by limit.start/size."""
+    requested = []
+
+    def handler(request):
+        limit = json.loads(request.content)["limit"]
+        requested.append(limit["start"])
+        first = (limit["start"] - 1) * limit["size"]
+        items = [
+            {
+                "identifier": f"AL-{i:03d}",
+                "entityIdentifier": "DEV-01",
+                "name": "Test Alarm",
+                "severity": "CRITICAL",
+                "status": "OPEN",
+                "openingDate": "2023-10-27T10:00:00Z",
+            }
+            for i in range(first, min(first + limit["size"], total))
+        ]
+        return httpx.Response(200, json={"alarms": items})
+
+    return handler, requested
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+async def test_iter_alarms_walks_all_pages(prefetch):
+    client = OpenGateAlarmClient(api_key="fake-key")
+    url = f"{client.base_url}/search/entities/alarms"
+    handler, requested = _paged_alarms(total=23)
+
+    async with respx.mock:
+        respx.post(url).mock(side_effect=handler)
+
+        request = SearchRequest(limit=Pagination(size=10, start=1))
+        ids = [alarm.id async for alarm in client.iter_alarms(request, prefetch=prefetch)]
+
+    assert ids == [f"AL-{i:03d}" for i in range(23)]
+    # Pages past the short page may have been prefetched, but never consumed
+    assert sorted(requested)[:3] == [1, 2, 3]
+    assert max(requested) <= 3 + prefetch
+
+@pytest.mark.asyncio
+async def test_iter_alarms_stops_on_empty_page():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    url = f"{client.base_url}/search/entities/alarms"
+    handler, requested = _paged_alarms(total=20)
+
+    async with respx.mock:
+        respx.post(url).mock(side_effect=handler)
+
+        request = SearchRequest(limit=Pagination(size=10, start=1))
+        alarms = [alarm async for alarm in client.iter_alarms(request, prefetch=0)]
+
+    assert len(alarms) == 20
+    assert requested == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_fetch_all_alarms_parallel_in_order_with_retry():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    client.retry_backoff = 0
+    url = f"{client.base_url}/search/entities/alarms"
+    summary_url = f"{client.base_url}/search/entities/alarms/summary"
+    handler, requested = _paged_alarms(total=45)
+    failures = {3: 1}
+
+    def flaky(request):
+        start = json.loads(request.content)["limit"]["start"]
+        if failures.get(start):
+            failures[start] -= 1
+            return httpx.Response(503)
+        return handler(request)
+
+    summary = {"summary": {"date": "2023-10-27T10:00:00Z", "count": 45, "summaryGroup": []}}
+
+    async with respx.mock:
+        respx.post(summary_url).mock(return_value=httpx.Response(200, json=summary))
+        respx.post(url).mock(side_effect=flaky)
+
+        request = SearchRequest(limit=Pagination(size=10, start=1))
+        alarms = await client.fetch_all_alarms(request, concurrency=3, retries=2)
+
+    assert [a.id for a in alarms] == [f"AL-{i:03d}" for i in range(45)]
+    assert sorted(requested) == [1, 2, 3, 4, 5]
+
+@pytest.mark.asyncio
+async def test_fetch_all_alarms_gives_up_after_retries():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    client.retry_backoff = 0
+    url = f"{client.base_url}/search/entities/alarms"
+
+    async with respx.mock:
+        route = respx.post(url).mock(return_value=httpx.Response(503))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.fetch_all_alarms(SearchRequest(), total=10, retries=2)
+        assert route.call_count == 3
@@ -0,0 +1,45 @@
+import json
+from datetime import datetime, timezone
+
+from opengate_alarms.decoding import AlarmRecord, decode_alarm_records, decode_alarms
+from opengate_alarms.models import Alarm
+
+PLAIN = {
+    "identifier": "AL-001",
+    "entityIdentifier": "DEV-01",
+    "name": "Test Alarm",
+    "severity": "CRITICAL",
+    "status": "OPEN",
+    "openingDate": "2023-10-27T10:00:00Z",
+    "rule": "rule-1",
+}
+
+FLATTENED = {
+    "alarm.identifier": "AL-002",
+    "alarm.entityIdentifier": "DEV-02",
+    "alarm.name": "Test Alarm",
+    "alarm.severity": "URGENT",
+    "alarm.status": "OPEN",
+    "alarm.creationDate": "2023-10-27T10:00:00Z",
+}
+
+def test_decode_alarms_list_and_envelope():
+    from_list = decode_alarms(json.dumps([PLAIN, FLATTENED]).encode())
+    from_envelope = decode_alarms(json.dumps({"alarms": [PLAIN, FLATTENED]}).encode())
+
+    assert from_list == from_envelope
+    assert [a.id for a in from_list] == ["AL-001", "AL-002"]
+    assert from_list[1].creation_date == datetime(2023, 10, 27, 10, tzinfo=timezone.utc)
+    assert decode_alarms(b"") == []
+
+def test_decode_alarm_records_matches_validated_path():
+    for item in (PLAIN, FLATTENED):
+        raw = json.dumps({"alarms": [item]}).encode()
+        record = decode_alarm_records(raw)[0]
+        assert isinstance(record, AlarmRecord)
+        assert record.to_alarm() == decode_alarms(raw)[0]
+
+def test_alarm_record_is_slotted():
+    record = decode_alarm_records(json.dumps([PLAIN]).encode())[0]
+    assert not hasattr(record, "__dict__")
+    assert isinstance(record.to_alarm(), Alarm)
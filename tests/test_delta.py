@@ -0,0 +1,123 @@
+import json
+from collections import Counter
+from datetime import datetime
+
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.client import OpenGateAlarmClient
+from opengate_alarms.delta import AlarmDeltaSync
+
+def _alarm(i, status="OPEN"):
+    return {
+        "identifier": f"AL-{i:03d}",
+        "entityIdentifier": "DEV-01",
+        "name": "Test Alarm",
+        "severity": "CRITICAL",
+        "status": status,
+        "openingDate": f"2024-01-01T00:{i:02d}:00Z",
+    }
+
+class FakeAlarmApi:
+    """Serves a mutable alarm list, honouring the gte watermark filter and paging."""
+
+    def __init__(self, alarms):
+        self.alarms = alarms
+        self.returned = 0
+
+    def _since(self, filter_data):
+        for clause in filter_data.get("and", [filter_data]):
+            if "gte" in clause:
+                return datetime.fromisoformat(clause["gte"]["alarm.openingDate"])
+        return None
+
+    def search(self, request):
+        body = json.loads(request.content)
+        since = self._since(body.get("filter", {}))
+        matching = [a for a in self.alarms if since is None or datetime.fromisoformat(a["openingDate"]) >= since]
+        limit = body["limit"]
+        first = (limit["start"] - 1) * limit["size"]
+        page = matching[first:first + limit["size"]]
+        self.returned += len(page)
+        return httpx.Response(200, json={"alarms": page})
+
+    def summary(self, request):
+        statuses = Counter(a["status"] for a in self.alarms)
+        group = {"status": {"count": len(self.alarms), "list": [{"name": name, "count": count} for name, count in statuses.items()]}}
+        return httpx.Response(200, json={"summary": {"date": "2024-01-01T00:00:00Z", "count": len(self.alarms), "summaryGroup": [group]}})
+
+@pytest.mark.asyncio
+async def test_delta_sync_fetches_only_new_alarms_and_detects_closures():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    api = FakeAlarmApi([_alarm(i) for i in range(10)])
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=api.search)
+        respx.post(f"{client.base_url}/search/entities/alarms/summary").mock(side_effect=api.summary)
+
+        sync = AlarmDeltaSync(client, {"eq": {"alarm.status": "OPEN"}}, page_size=4)
+        first = await sync.refresh()
+        assert first.full_sync and len(first.added) == 10
+        assert sync.watermark.minute == 9
+
+        # Two new alarms: only the watermark alarm and the new ones come back
+        api.alarms += [_alarm(10), _alarm(11)]
+        api.returned = 0
+        delta = await sync.refresh()
+        assert delta.added == ["AL-010", "AL-011"]
+        assert not delta.full_sync
+        assert api.returned == 3
+
+        # A closed alarm drops out of the filter: the count check triggers reconciliation
+        api.alarms = [a for a in api.alarms if a["identifier"] != "AL-003"]
+        delta = await sync.refresh()
+        assert delta.full_sync
+        assert delta.removed == ["AL-003"]
+        assert len(sync.alarms) == 11
+
+@pytest.mark.asyncio
+async def test_delta_sync_frame_is_rebuilt_only_after_changes():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    api = FakeAlarmApi([_alarm(i) for i in range(5)])
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=api.search)
+        respx.post(f"{client.base_url}/search/entities/alarms/summary").mock(side_effect=api.summary)
+
+        sync = AlarmDeltaSync(client, page_size=10)
+        await sync.refresh()
+        frame = sync.frame()
+        assert len(frame) == 5
+
+        await sync.refresh()
+        assert sync.frame() is frame
+
+        api.alarms.append(_alarm(5))
+        await sync.refresh()
+        assert len(sync.frame()) == 6
+
+@pytest.mark.asyncio
+async def test_delta_sync_reconciles_status_changes_the_count_misses():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    api = FakeAlarmApi([_alarm(i) for i in range(5)])
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=api.search)
+        respx.post(f"{client.base_url}/search/entities/alarms/summary").mock(side_effect=api.summary)
+
+        sync = AlarmDeltaSync(client, page_size=10)
+        await sync.refresh()
+
+        # Same count, but the per-status summary no longer matches
+        api.alarms[2] = _alarm(2, status="ACKNOWLEDGED")
+        delta = await sync.refresh()
+        assert delta.full_sync and delta.updated == ["AL-002"]
+        assert sync.alarms["AL-002"].status == "ACKNOWLEDGED"
+
+        # Swapped statuses leave every summary count equal: the periodic walk catches them
+        api.alarms[1], api.alarms[2] = _alarm(1, status="ACKNOWLEDGED"), _alarm(2)
+        for _ in range(8):
+            assert not (await sync.refresh()).full_sync
+        delta = await sync.refresh()
+        assert delta.full_sync and delta.updated == ["AL-001", "AL-002"]
@@ -0,0 +1,135 @@
+import csv
+import json
+
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.catalog import FilterCatalog
+from opengate_alarms.client import OpenGateAlarmClient
+from opengate_alarms.export import Checkpoint, export_filter
+from opengate_alarms.og_data import OpenGateDataHelper
+
+BASE_URL = "https://api.example.test"
+
+def make_alarm(i):
+    return {
+        "identifier": f"AL-{i:03d}",
+        "entityIdentifier": "DEV-01",
+        "name": "Test Alarm",
+        "severity": "CRITICAL",
+        "status": "OPEN",
+        "openingDate": f"2023-10-27T10:00:{i // 2:02d}Z"
+    }
+
+def paged(items, key, fail_on=None):
+    def respond(request):
+        limit = json.loads(request.content)["limit"]
+        if limit["start"] == fail_on:
+            return httpx.Response(400, json={"error": "bad page"})
+        first = (limit["start"] - 1) * limit["size"]
+        return httpx.Response(200, json={key: items[first:first + limit["size"]]})
+    return respond
+
+def make_catalog(tmp_path):
+    (tmp_path / "filters" / "alarms").mkdir(parents=True)
+    (tmp_path / "filters" / "entities").mkdir()
+    (tmp_path / "filters" / "alarms" / "open.json").write_text(json.dumps({"filter": {"eq": {"alarm.status": "OPEN"}}}))
+    (tmp_path / "filters" / "entities" / "devices.json").write_text(json.dumps({
+        "select": [{"name": "provision.device.identifier", "fields": [{"field": "value", "alias": "ID"}]}],
+        "limit": {"size": 25, "start": 1},
+    }))
+    catalog = FilterCatalog(tmp_path / "filters")
+    catalog.refresh()
+    return catalog
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("OPENGATE_BASE_URL", BASE_URL)
+    return OpenGateAlarmClient(api_key="fake-key")
+
+@pytest.mark.asyncio
+async def test_export_streams_every_page_to_each_format(tmp_path, client):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    catalog = make_catalog(tmp_path)
+    alarms = [make_alarm(i) for i in range(25)]
+    async with respx.mock:
+        route = respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=paged(alarms, "alarms"))
+        for name in ("out.ndjson", "out.csv", "out.parquet"):
+            stats = await export_filter(catalog.get("alarms", "open.json"), tmp_path / name, client=client, page_size=10)
+            assert stats.rows == 25 and stats.pages == 3
+
+    # Three pages per export, plus the prefetched one past the end
+    assert route.call_count == 12
+    lines = (tmp_path / "out.ndjson").read_text().splitlines()
+    assert [json.loads(line)["identifier"] for line in lines] == [alarm["identifier"] for alarm in alarms]
+    rows = list(csv.reader((tmp_path / "out.csv").open()))
+    assert rows[0][:2] == ["identifier", "entityIdentifier"] and len(rows) == 26
+    assert rows[1][5] == "2023-10-27T10:00:00+00:00"
+    table = pq.read_table(tmp_path / "out.parquet")
+    assert table.num_rows == 25 and str(table.schema.field("openingDate").type) == "timestamp[us, tz=UTC]"
+    assert not list(tmp_path.glob("*.checkpoint"))
+
+@pytest.mark.asyncio
+async def test_interrupted_export_resumes_from_the_checkpointed_page(tmp_path, client):
+    catalog = make_catalog(tmp_path)
+    entry = catalog.get("alarms", "open.json")
+    output = tmp_path / "out.csv"
+    alarms = [make_alarm(i) for i in range(25)]
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=paged(alarms, "alarms", fail_on=2))
+        with pytest.raises(httpx.HTTPStatusError):
+            await export_filter(entry, output, client=client, page_size=10)
+
+    checkpoint = Checkpoint.load(tmp_path / "out.csv.checkpoint")
+    assert (checkpoint.page, checkpoint.rows, checkpoint.position) == (2, 10, output.stat().st_size)
+    # A partial page written after the checkpoint is dropped on resume
+    with output.open("a") as f:
+        f.write("AL-999,partial\n")
+
+    async with respx.mock:
+        route = respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=paged(alarms, "alarms"))
+        stats = await export_filter(entry, output, resume=True, client=client, page_size=10, prefetch=0)
+
+    assert [json.loads(call.request.content)["limit"]["start"] for call in route.calls] == [2, 3]
+    assert stats.rows == 25 and stats.resumed_rows == 10
+    ids = [row[0] for row in csv.reader(output.open())][1:]
+    assert ids == [alarm["identifier"] for alarm in alarms]
+
+@pytest.mark.asyncio
+async def test_watermark_resume_asks_from_the_last_opening_date(tmp_path, client):
+    catalog = make_catalog(tmp_path)
+    entry = catalog.get("alarms", "open.json")
+    output = tmp_path / "out.ndjson"
+    output.write_text("")
+    # AL-004 and AL-005 share the watermark; only AL-004 was written
+    Checkpoint("alarms", entry.key, "ndjson", "watermark", page=3, rows=5,
+               watermark="2023-10-27T10:00:02Z", seen=["AL-004"]).save(tmp_path / "out.ndjson.checkpoint")
+    remaining = [make_alarm(i) for i in range(4, 9)]
+
+    async with respx.mock:
+        route = respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=paged(remaining, "alarms"))
+        stats = await export_filter(entry, output, mode="watermark", resume=True, client=client, page_size=10)
+
+    body = json.loads(route.calls[0].request.content)
+    assert body["filter"] == {"and": [{"eq": {"alarm.status": "OPEN"}}, {"gte": {"alarm.openingDate": "2023-10-27T10:00:02Z"}}]}
+    assert body["sort"] == [{"field": "alarm.openingDate", "order": "ASC"}] and body["limit"]["start"] == 1
+    assert [json.loads(line)["identifier"] for line in output.read_text().splitlines()] == ["AL-005", "AL-006", "AL-007", "AL-008"]
+    assert stats.rows == 9
+
+@pytest.mark.asyncio
+async def test_entity_export_writes_select_columns(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENGATE_BASE_URL", BASE_URL)
+    catalog = make_catalog(tmp_path)
+    helper = OpenGateDataHelper(api_key="fake-key")
+    devices = [{"provision": {"device": {"identifier": {"_current": {"value": f"DEV-{i}"}}}}} for i in range(7)]
+
+    async with respx.mock:
+        route = respx.post(f"{BASE_URL}/north/v80/search/entities").mock(side_effect=paged(devices, "entities"))
+        stats = await export_filter(catalog.get("entities", "devices.json"), tmp_path / "devices.csv",
+                                    entities_helper=helper, page_size=5, prefetch=0)
+
+    assert stats.rows == 7 and route.call_count == 2
+    assert list(csv.reader((tmp_path / "devices.csv").open())) == [["ID"]] + [[f"DEV-{i}"] for i in range(7)]
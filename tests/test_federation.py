@@ -0,0 +1,106 @@
+import json
+
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.federation import FederatedClient, TenantConfig, alarm_sort_key, load_tenants
+from opengate_alarms.models import Pagination, SearchRequest, SearchSort
+
+def make_alarm(alarm_id, opened):
+    return {
+        "identifier": alarm_id,
+        "entityIdentifier": "DEV-01",
+        "name": "Test Alarm",
+        "severity": "CRITICAL",
+        "status": "OPEN",
+        "openingDate": opened
+    }
+
+def paged(items):
+    def respond(request):
+        limit = json.loads(request.content)["limit"]
+        first = (limit["start"] - 1) * limit["size"]
+        return httpx.Response(200, json={"alarms": items[first:first + limit["size"]]})
+    return respond
+
+TENANTS = [
+    TenantConfig("north", "https://north.example.test", api_key="key-north", rate_limit=5, max_connections=2),
+    TenantConfig("south", "https://south.example.test/north/v80", api_key_env="SOUTH_KEY", organization="south-org"),
+]
+
+@pytest.mark.asyncio
+async def test_fan_out_tags_each_tenant_and_isolates_failures(monkeypatch):
+    monkeypatch.setenv("OPENGATE_BASE_URL", "https://ignored.example.test")
+    monkeypatch.setenv("SOUTH_KEY", "key-south")
+    federation = FederatedClient(TENANTS + [TenantConfig("down", "https://down.example.test", api_key="k")])
+    north = federation.clients["north"]
+    assert north.base_url == "https://north.example.test/north/v80" and north.limits.max_connections == 2
+    assert north.scheduler.bucket.rate == 5 and north.resilience is not federation.clients["south"].resilience
+
+    request = SearchRequest(limit=Pagination(size=2))
+    async with respx.mock:
+        north_route = respx.post("https://north.example.test/north/v80/search/entities/alarms").mock(
+            side_effect=paged([make_alarm(f"N-{i}", "2023-10-27T10:00:00Z") for i in range(3)]))
+        respx.post("https://south.example.test/north/v80/search/entities/alarms").mock(
+            side_effect=paged([make_alarm("S-0", "2023-10-27T10:00:00Z")]))
+        respx.post("https://down.example.test/north/v80/search/entities/alarms").mock(return_value=httpx.Response(403))
+
+        errors = {}
+        results = [(tenant, alarm.id) async for tenant, alarm in federation.iter_alarms(request, errors=errors)]
+        with pytest.raises(httpx.HTTPStatusError):
+            [item async for item in federation.iter_alarms(request)]
+    await federation.aclose()
+
+    assert sorted(results) == [("north", "N-0"), ("north", "N-1"), ("north", "N-2"), ("south", "S-0")]
+    assert list(errors) == ["down"] and "403" in errors["down"]
+    assert north_route.calls[0].request.headers["X-ApiKey"] == "key-north"
+
+@pytest.mark.asyncio
+async def test_sorted_request_is_merge_sorted_across_tenants(monkeypatch):
+    monkeypatch.setenv("SOUTH_KEY", "key-south")
+    federation = FederatedClient(TENANTS)
+    north = [make_alarm(f"N-{i}", f"2023-10-27T10:00:{s:02d}Z") for i, s in enumerate((50, 30, 30, 5))]
+    south = [make_alarm(f"S-{i}", f"2023-10-27T10:00:{s:02d}Z") for i, s in enumerate((40, 30, 10))]
+    request = SearchRequest(limit=Pagination(size=2), sort=[SearchSort(field="alarm.openingDate", order="DESC")])
+
+    async with respx.mock:
+        respx.post("https://north.example.test/north/v80/search/entities/alarms").mock(side_effect=paged(north))
+        respx.post("https://south.example.test/north/v80/search/entities/alarms").mock(side_effect=paged(south))
+        merged = [(tenant, alarm.id) async for tenant, alarm in federation.iter_alarms(request)]
+    await federation.aclose()
+
+    assert merged == [
+        ("north", "N-0"), ("south", "S-0"), ("north", "N-1"), ("north", "N-2"),
+        ("south", "S-1"), ("south", "S-2"), ("north", "N-3"),
+    ]
+    with pytest.raises(ValueError, match="Cannot merge"):
+        alarm_sort_key([SearchSort(field="alarm.priority")])
+
+@pytest.mark.asyncio
+async def test_entity_searches_are_scoped_to_each_tenant_organization(monkeypatch):
+    monkeypatch.setenv("SOUTH_KEY", "key-south")
+    federation = FederatedClient(TENANTS)
+
+    async with respx.mock:
+        south = respx.post("https://south.example.test/north/v80/search/entities").mock(
+            return_value=httpx.Response(200, json={"entities": [{"id": "DEV-S"}]}))
+        respx.post("https://north.example.test/north/v80/search/entities").mock(
+            return_value=httpx.Response(200, json={"entities": [{"id": "DEV-N"}]}))
+        entities = sorted([(tenant, e["id"]) async for tenant, e in federation.iter_entities({"limit": {"size": 10}})])
+    await federation.aclose()
+
+    assert entities == [("north", "DEV-N"), ("south", "DEV-S")]
+    assert json.loads(south.calls[0].request.content)["filter"] == {"eq": {"provision.administration.organization": "south-org"}}
+
+def test_load_tenants_validates_the_file(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps([{"name": "a", "base_url": "https://a"}, {"name": "b", "base_url": "https://b", "rate_limit": 2}]))
+    assert [t.rate_limit for t in load_tenants(path)] == [None, 2]
+
+    path.write_text(json.dumps([{"name": "a", "base_url": "https://a"}, {"name": "a", "base_url": "https://b"}]))
+    with pytest.raises(ValueError, match="duplicate"):
+        load_tenants(path)
+    path.write_text(json.dumps([{"name": "a", "base_url": "https://a", "apikey": "x"}]))
+    with pytest.raises(ValueError, match="unknown tenant fields apikey"):
+        load_tenants(path)
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from opengate_alarms.filtering import UnsupportedFilter, compile_filter
+from opengate_alarms.frame import AlarmFrame
+from opengate_alarms.models import Alarm, Filter
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SEVERITIES = ["CRITICAL", "URGENT", "WARNING"]
+STATUSES = ["OPEN", "ATTENDED", "CLOSED"]
+
+ALARMS = [
+    Alarm(
+        id=f"AL-{i}",
+        entity_id=f"DEV-{i % 4}",
+        name=f"Alarm {i % 5}",
+        severity=SEVERITIES[i % 3],
+        status=STATUSES[i % 2],
+        creation_date=START + timedelta(minutes=i),
+        rule="temperature" if i % 3 == 0 else None,
+    )
+    for i in range(60)
+]
+
+FILTERS = [
+    {},
+    {"eq": {"alarm.severity": "CRITICAL"}},
+    {"neq": {"alarm.status": "OPEN"}, "in": {"alarm.entityIdentifier": ["DEV-1", "DEV-2"]}},
+    {"or": [{"eq": {"severity": "URGENT"}}, {"and": [{"like": {"alarm.name": "Alarm [34]"}}, {"nin": {"alarm.status": ["CLOSED"]}}]}]},
+    {"gte": {"alarm.openingDate": "2024-01-01T00:30:00Z"}, "lt": {"alarm.openingDate": "2024-01-01T00:45:00+00:00"}},
+    {"exists": {"alarm.rule": True}, "gt": {"alarm.name": "Alarm 2"}},
+    {"in": {"alarm.identifier": ["AL-7", "AL-8", "missing"]}},
+    {"eq": {"alarm.identifier": "AL-59"}, "lte": {"alarm.openingDate": START + timedelta(hours=1)}},
+]
+
+@pytest.mark.parametrize("filter_data", FILTERS)
+def test_frame_mask_agrees_with_row_evaluation(filter_data):
+    frame = AlarmFrame.from_alarms(ALARMS)
+    compiled = compile_filter(filter_data)
+
+    expected = [alarm.id for alarm in compiled.apply(ALARMS)]
+
+    assert list(compiled.select(frame).ids) == expected
+
+def test_known_results():
+    frame = AlarmFrame.from_alarms(ALARMS)
+
+    assert len(compile_filter({}).select(frame)) == 60
+    assert len(compile_filter({"eq": {"alarm.severity": "CRITICAL"}}).select(frame)) == 20
+    assert list(compile_filter(FILTERS[6]).select(frame).ids) == ["AL-7", "AL-8"]
+    assert len(compile_filter(FILTERS[4]).select(frame)) == 15
+    # Filter models compile the same as their JSON
+    model = Filter(**{"in": {"alarm.status": ["ATTENDED"]}, "eq": {"alarm.severity": "WARNING"}})
+    assert compile_filter(model).source == {"eq": {"alarm.severity": "WARNING"}, "in": {"alarm.status": ["ATTENDED"]}}
+    assert len(compile_filter(model).select(frame)) == 10
+
+@pytest.mark.parametrize("filter_data", [
+    {"eq": {"provision.device.identifier": "x"}},
+    {"regex": {"alarm.name": "x"}},
+    {"in": {"alarm.status": "OPEN"}},
+])
+def test_filters_the_client_cannot_evaluate_are_rejected(filter_data):
+    with pytest.raises(UnsupportedFilter):
+        compile_filter(filter_data)
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from opengate_alarms.decoding import AlarmRecord
+from opengate_alarms.frame import AlarmFrame, SummaryMismatch
+from opengate_alarms.models import Alarm, AlarmSummary
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+def make_alarms():
+    rows = [
+        ("AL-1", "DEV-1", "CRITICAL", "OPEN", 0),
+        ("AL-2", "DEV-1", "CRITICAL", "CLOSED", 10),
+        ("AL-3", "DEV-2", "WARNING", "OPEN", 70),
+        ("AL-4", "DEV-3", "CRITICAL", "OPEN", 190),
+    ]
+    return [
+        Alarm(id=i, entity_id=e, name="Temp", severity=s, status=st, creation_date=START + timedelta(minutes=m))
+        for i, e, s, st, m in rows
+    ]
+
+def test_counts_group_by_and_filters():
+    frame = AlarmFrame.from_alarms(make_alarms())
+
+    assert len(frame) == 4
+    assert frame.counts("severity") == {"CRITICAL": 3, "WARNING": 1}
+    assert frame.group_by("severity", "status") == {("CRITICAL", "OPEN"): 2, ("CRITICAL", "CLOSED"): 1, ("WARNING", "OPEN"): 1}
+    assert frame.counts("rule") == {None: 4}
+
+    open_critical = frame.filter(frame.mask_eq("severity", "CRITICAL") & frame.mask_eq("status", "OPEN"))
+    assert list(open_critical.ids) == ["AL-1", "AL-4"]
+    assert open_critical.counts("entity_id") == {"DEV-1": 1, "DEV-3": 1}
+    assert frame.mask_in("severity", ["MISSING"]).sum() == 0
+    assert list(frame.filter(frame.mask_between(START + timedelta(minutes=5), START + timedelta(hours=2))).ids) == ["AL-2", "AL-3"]
+    # Row models survive the round trip
+    assert frame.alarm(2) == make_alarms()[2]
+
+def test_histogram_includes_empty_buckets():
+    frame = AlarmFrame.from_alarms(make_alarms())
+
+    starts, counts = frame.histogram(timedelta(hours=1))
+
+    assert list(counts) == [2, 1, 0, 1]
+    assert starts[0] == np.datetime64("2024-01-01T00:00:00", "us")
+    assert starts[-1] == np.datetime64("2024-01-01T03:00:00", "us")
+
+def test_summary_matches_server_shape():
+    frame = AlarmFrame.from_alarms(make_alarms())
+    server = AlarmSummary(**{
+        "date": "2024-01-01T00:00:00Z",
+        "count": 5,
+        "summaryGroup": [
+            {"severity": {"count": 5, "list": [{"name": "CRITICAL", "count": 4}, {"name": "WARNING", "count": 1}]}},
+            {"unknownGroup": {"count": 5, "list": [{"name": "x", "count": 5}]}},
+        ],
+    })
+
+    local = frame.summary()
+    assert local.count == 4
+    assert local.summary_group[0]["severity"].list[0].model_dump() == {"name": "CRITICAL", "count": 3}
+    assert frame.summary_mismatches(local) == []
+    assert frame.summary_mismatches(server) == [
+        SummaryMismatch("count", "", 4, 5),
+        SummaryMismatch("severity", "CRITICAL", 3, 4),
+    ]
+
+@pytest.mark.asyncio
+async def test_from_async_accepts_trusted_records():
+    async def records():
+        yield AlarmRecord("AL-9", "DEV-9", "Temp", "URGENT", "OPEN", None)
+
+    frame = await AlarmFrame.from_async(records())
+
+    assert frame.counts("severity") == {"URGENT": 1}
+    assert np.isnat(frame.creation_date[0])
+    assert frame.histogram(timedelta(hours=1))[1].size == 0
@@ -0,0 +1,56 @@
+import logging
+import threading
+
+from opengate_alarms.logconfig import REQUEST_LOGGER, RateLimitFilter, configure_logging, stop_logging
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def record(msg, *args, name=REQUEST_LOGGER):
+    return logging.LogRecord(name, logging.INFO, __file__, 1, msg, args, None)
+
+def test_rate_limit_is_per_template_and_reports_suppressed_records():
+    clock = FakeClock()
+    limiter = RateLimitFilter(rate=1.0, burst=2, clock=clock)
+
+    passed = [limiter.filter(record("Querying alarms - Payload: %s", i)) for i in range(5)]
+    assert passed == [True, True, False, False, False]
+    # Another message template has its own budget
+    assert limiter.filter(record("Async entity search - Payload: %s", 0))
+
+    clock.now = 1.0
+    allowed = record("Querying alarms - Payload: %s", 5)
+    assert limiter.filter(allowed)
+    assert allowed.getMessage() == "Querying alarms - Payload: 5 (3 similar messages suppressed)"
+    assert limiter.suppressed == 3
+
+def test_configured_logging_formats_and_writes_off_the_calling_thread(tmp_path):
+    path = tmp_path / "opengate.log"
+    formatted_on = []
+
+    class Payload:
+        def __repr__(self):
+            formatted_on.append(threading.current_thread())
+            return "{'filter': {}}"
+
+    configure_logging(path=str(path), console=False, request_burst=1)
+    try:
+        logger = logging.getLogger(REQUEST_LOGGER)
+        logger.info("Querying alarms - Payload: %r", Payload())
+        logger.info("Querying alarms - Payload: %r", Payload())
+        logging.getLogger("opengate_alarms.client").warning("Circuit opened")
+    finally:
+        stop_logging()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith("opengate_alarms.requests - INFO - Querying alarms - Payload: {'filter': {}}")
+    assert lines[1].endswith("Circuit opened")
+    # The file handler formats on the listener thread (pytest's own capture handler
+    # formats on this one)
+    assert any(thread is not threading.main_thread() for thread in formatted_on)
+    assert not logging.getLogger(REQUEST_LOGGER).filters
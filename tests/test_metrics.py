@@ -0,0 +1,84 @@
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.client import OpenGateAlarmClient
+from opengate_alarms.metrics import Instrumentation, MetricsRegistry
+from opengate_alarms.resilience import Resilience, RetryPolicy
+
+ALARM = {
+    "identifier": "AL-001",
+    "entityIdentifier": "DEV-01",
+    "name": "Test Alarm",
+    "severity": "CRITICAL",
+    "status": "OPEN",
+    "openingDate": "2023-10-27T10:00:00Z"
+}
+
+def test_registry_exports_prometheus_text_and_json():
+    registry = MetricsRegistry()
+    registry.inc("opengate_requests_total", description="Calls", endpoint="alarms", status="200")
+    registry.inc("opengate_requests_total", endpoint="alarms", status="200")
+    for value in (0.002, 0.02, 0.2):
+        registry.observe("opengate_request_phase_seconds", value, endpoint="alarms", phase="ttfb")
+
+    text = registry.to_prometheus()
+    assert "# TYPE opengate_requests_total counter" in text
+    assert 'opengate_requests_total{endpoint="alarms",status="200"} 2' in text
+    assert 'opengate_request_phase_seconds_bucket{endpoint="alarms",phase="ttfb",le="0.0025"} 1' in text
+    assert 'opengate_request_phase_seconds_bucket{endpoint="alarms",phase="ttfb",le="+Inf"} 3' in text
+    assert 'opengate_request_phase_seconds_count{endpoint="alarms",phase="ttfb"} 3' in text
+
+    [series] = registry.to_json()["histograms"]["opengate_request_phase_seconds"]
+    assert series["count"] == 3 and series["p50"] == 0.02
+    assert registry.quantiles("opengate_request_phase_seconds") == [({"endpoint": "alarms", "phase": "ttfb"}, 3, [0.02, 0.2])]
+
+@pytest.mark.asyncio
+async def test_client_calls_publish_phases_bytes_and_items():
+    registry = MetricsRegistry()
+    seen = []
+    instrumentation = Instrumentation(registry, hooks=[seen.append])
+    resilience = Resilience(policy=RetryPolicy(retries=2, base=0), sleep=lambda delay: _noop())
+    client = OpenGateAlarmClient(api_key="fake-key", resilience=resilience, instrumentation=instrumentation)
+
+    async with respx.mock:
+        page = {"alarms": [ALARM, {**ALARM, "identifier": "AL-002"}]}
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=[
+            httpx.Response(503),
+            httpx.Response(200, json=page),
+            httpx.Response(200, json=page),
+        ])
+        await client.query_alarms()
+        streamed = [alarm async for alarm in client.stream_alarms()]
+
+    assert len(streamed) == 2
+    [paged, stream] = seen
+    assert paged.status == 200 and paged.attempts == 2 and paged.items == 2
+    assert paged.bytes_in > 0 and {"decode", "total"} <= set(paged.phases)
+    assert stream.items == 2 and stream.bytes_in == paged.bytes_in
+    assert {"download", "decode", "validate", "total"} <= set(stream.phases)
+
+    assert registry.counter("opengate_requests_total", endpoint="alarms", status="200") == 2
+    assert registry.counter("opengate_request_retries_total", endpoint="alarms") == 1
+    assert registry.counter("opengate_response_items_total", endpoint="alarms") == 4
+    assert registry.histogram("opengate_request_phase_seconds", endpoint="alarms", phase="total").count == 2
+
+@pytest.mark.asyncio
+async def test_failed_calls_are_counted_by_error():
+    registry = MetricsRegistry()
+    resilience = Resilience(policy=RetryPolicy(retries=0))
+    client = OpenGateAlarmClient(api_key="fake-key", resilience=resilience, instrumentation=Instrumentation(registry))
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=httpx.ConnectError("down"))
+        respx.post(f"{client.base_url}/search/entities/alarms/summary").mock(return_value=httpx.Response(400))
+        with pytest.raises(httpx.ConnectError):
+            await client.query_alarms()
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_summary(use_cache=False)
+
+    assert registry.counter("opengate_requests_total", endpoint="alarms", status="ConnectError") == 1
+    assert registry.counter("opengate_requests_total", endpoint="summary", status="400") == 1
+
+async def _noop():
+    pass
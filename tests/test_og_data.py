@@ -0,0 +1,70 @@
+import asyncio
+import json
+import subprocess
+import sys
+
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.og_data import OpenGateDataHelper
+
+@pytest.fixture
+def helper(monkeypatch):
+    monkeypatch.setenv("OPENGATE_BASE_URL", "https://api.example.test")
+    monkeypatch.setenv("OPENGATE_ORGANIZATION", "acme")
+    return OpenGateDataHelper(api_key="fake-key")
+
+def test_build_entity_payload_scopes_organization(helper):
+    request = {"filter": {"eq": {"resourceType": "entity.device"}}, "select": ["provision.device.identifier"]}
+
+    payload = helper.build_entity_payload(request)
+
+    assert payload["filter"] == {
+        "and": [
+            {"eq": {"resourceType": "entity.device"}},
+            {"eq": {"provision.administration.organization": "acme"}},
+        ]
+    }
+    assert payload["select"] == ["provision.device.identifier"]
+    assert payload["limit"] == {"size": 25, "start": 1}
+    # The caller's filter file dict is left untouched
+    assert "limit" not in request
+
+@pytest.mark.asyncio
+async def test_search_entities_async_runs_concurrently(helper):
+    url = "https://api.example.test/north/v80/search/entities"
+
+    def handler(request):
+        size = json.loads(request.content)["limit"]["size"]
+        return httpx.Response(200, json={"entities": [{"id": f"DEV-{i}"} for i in range(size)]})
+
+    async with respx.mock:
+        route = respx.post(url).mock(side_effect=handler)
+
+        results = await asyncio.gather(
+            helper.search_entities_async({"limit": {"size": 2, "start": 1}}),
+            helper.search_entities_async({"limit": {"size": 3, "start": 1}}),
+        )
+        await helper.aclose()
+
+    assert [len(r) for r in results] == [2, 3]
+    assert route.call_count == 2
+
+@pytest.mark.asyncio
+async def test_search_entities_async_no_content(helper):
+    async with respx.mock:
+        respx.post("https://api.example.test/north/v80/search/entities").mock(return_value=httpx.Response(204))
+
+        assert await helper.search_entities_async({}) == []
+
+def test_heavy_dependencies_load_on_first_use():
+    check = (
+        "import sys; from opengate_alarms.tui.app import OpenGateApp; "
+        "from opengate_alarms.og_data import OpenGateDataHelper; helper = OpenGateDataHelper(api_key='k'); "
+        "print(sorted(m for m in ('numpy', 'pandas', 'opengate_data', 'dotenv') if m in sys.modules)); "
+        "helper.client; print('opengate_data' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+
+    assert result.stdout.split("\n")[:2] == ["[]", "True"]
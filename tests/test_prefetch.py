@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.cache import ResponseCache
+from opengate_alarms.catalog import FilterCatalog
+from opengate_alarms.client import OpenGateAlarmClient
+from opengate_alarms.og_data import OpenGateDataHelper
+from opengate_alarms.prefetch import Prefetcher
+from opengate_alarms.ratelimit import Priority, current_priority
+
+ALARM = {
+    "identifier": "AL-001",
+    "entityIdentifier": "DEV-01",
+    "name": "Test Alarm",
+    "severity": "CRITICAL",
+    "status": "OPEN",
+    "openingDate": "2023-10-27T10:00:00Z"
+}
+
+def make_catalog(tmp_path, alarms=(), entities=()):
+    for kind, names in (("alarms", alarms), ("entities", entities)):
+        (tmp_path / kind).mkdir()
+        for name in names:
+            (tmp_path / kind / f"{name}.json").write_text(json.dumps({"filter": {"eq": {"name": name}}}))
+    catalog = FilterCatalog(tmp_path)
+    catalog.refresh()
+    return catalog
+
+@pytest.mark.asyncio
+async def test_prefetch_fills_the_shared_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENGATE_BASE_URL", "https://api.example.test")
+    catalog = make_catalog(tmp_path, alarms=["open", "critical"], entities=["devices"])
+    cache = ResponseCache()
+    client = OpenGateAlarmClient(api_key="fake-key", cache=cache)
+    helper = OpenGateDataHelper(api_key="fake-key", cache=cache)
+    prefetcher = Prefetcher(client, helper)
+
+    async with respx.mock:
+        alarms = respx.post(f"{client.base_url}/search/entities/alarms").mock(return_value=httpx.Response(200, json={"alarms": [ALARM]}))
+        entities = respx.post(f"{client.base_url}/search/entities").mock(return_value=httpx.Response(200, json={"entities": [{"id": "DEV-01"}]}))
+        result = await prefetcher.prefetch(catalog.entries("alarms") + catalog.entries("entities"))
+
+        assert sorted(result.fetched) == ["alarms/critical.json", "alarms/open.json", "entities/devices.json"]
+        # Selecting any of them is now served from the cache
+        assert [alarm.id async for alarm in client.stream_alarms(catalog.get("alarms", "open.json").request)] == ["AL-001"]
+        assert [entity async for entity in helper.iter_entities(catalog.get("entities", "devices.json").request)] == [{"id": "DEV-01"}]
+        await prefetcher.prefetch(catalog.entries("alarms"))
+
+    assert alarms.call_count == 2 and entities.call_count == 1
+
+class FakeClient:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.priorities = set()
+
+    async def query_alarms(self, request):
+        self.priorities.add(current_priority())
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if request.filter == {"eq": {"name": "broken"}}:
+            raise httpx.ConnectError("down")
+
+@pytest.mark.asyncio
+async def test_prefetch_is_bounded_low_priority_and_ranked_by_use(tmp_path):
+    catalog = make_catalog(tmp_path, alarms=[f"f{i}" for i in range(9)] + ["broken"])
+    client = FakeClient()
+    prefetcher = Prefetcher(client, None, concurrency=3)
+
+    result = await prefetcher.prefetch(catalog.entries("alarms"))
+
+    assert len(result.fetched) == 9 and result.failed == {"alarms/broken.json": "down"}
+    assert client.peak == 3 and client.priorities == {Priority.BULK}
+
+    for name in ("f5.json", "f2.json", "f5.json"):
+        prefetcher.record_use("alarms", name)
+    assert [entry.name for entry in prefetcher.most_used(catalog.entries("alarms"), 3)] == ["f5.json", "f2.json", "broken.json"]
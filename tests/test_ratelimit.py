@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.client import OpenGateAlarmClient
+from opengate_alarms.models import SearchRequest
+from opengate_alarms.ratelimit import LOCK_RETRY_DELAY, FileBudget, Priority, RequestScheduler, request_priority
+
+@pytest.mark.asyncio
+async def test_waiting_requests_are_served_by_priority():
+    scheduler = RequestScheduler(rate=50, capacity=1)
+    await scheduler.acquire()  # drain the burst
+    order = []
+
+    async def request(priority):
+        with request_priority(priority):
+            await scheduler.acquire()
+        order.append(priority)
+
+    tasks = [asyncio.create_task(request(p)) for p in (Priority.BULK, Priority.BACKGROUND, Priority.BULK, Priority.INTERACTIVE)]
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth() == {"interactive": 1, "background": 1, "bulk": 2}
+    await asyncio.gather(*tasks)
+
+    assert order == [Priority.INTERACTIVE, Priority.BACKGROUND, Priority.BULK, Priority.BULK]
+    metrics = scheduler.metrics()
+    assert metrics["bulk"]["granted"] == 2 and metrics["bulk"]["queued"] == 0
+    assert metrics["bulk"]["max_wait"] > metrics["interactive"]["max_wait"] > 0
+    assert metrics["interactive"]["granted"] == 2  # including the burst
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_do_not_consume_permits():
+    scheduler = RequestScheduler(rate=50, capacity=1)
+    await scheduler.acquire()
+    cancelled = asyncio.create_task(scheduler.acquire(Priority.INTERACTIVE))
+    waiting = asyncio.create_task(scheduler.acquire(Priority.BULK))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    assert await waiting < 0.1
+    assert scheduler.stats[Priority.INTERACTIVE].granted == 1
+
+def test_file_budget_is_shared_between_instances(tmp_path):
+    first = FileBudget(tmp_path / "budget.json", rate=1, capacity=2)
+    second = FileBudget(tmp_path / "budget.json", rate=1, capacity=2)
+    assert first.take() == 0
+    assert second.take() == 0
+    assert 0.9 < first.take() <= 1.0
+
+@pytest.mark.asyncio
+async def test_locked_file_budget_is_retried_without_blocking_the_loop(tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    budget = FileBudget(tmp_path / "budget.json", rate=1, capacity=2)
+    scheduler = RequestScheduler(budget=budget)
+    with open(tmp_path / "budget.json", "a+") as other_process:
+        fcntl.flock(other_process, fcntl.LOCK_EX)
+        assert budget.take() == LOCK_RETRY_DELAY
+        waiter = asyncio.create_task(scheduler.acquire())
+        # The loop keeps running while the permit waits for the lock
+        await asyncio.sleep(5 * LOCK_RETRY_DELAY)
+        assert not waiter.done()
+        fcntl.flock(other_process, fcntl.LOCK_UN)
+    assert await asyncio.wait_for(waiter, 1) > 0
+    # Attempts made while locked took nothing from the budget
+    assert budget.take() == 0
+
+def test_scheduler_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("OPENGATE_RATE_LIMIT", raising=False)
+    assert RequestScheduler.from_env() is None
+    monkeypatch.setenv("OPENGATE_RATE_LIMIT", "5")
+    monkeypatch.setenv("OPENGATE_RATE_BUDGET_FILE", str(tmp_path / "budget.json"))
+    scheduler = RequestScheduler.from_env()
+    assert scheduler.bucket is None and scheduler.budget.rate == 5
+
+@pytest.mark.asyncio
+async def test_client_requests_go_through_the_scheduler_at_their_priority():
+    scheduler = RequestScheduler(rate=1000)
+    client = OpenGateAlarmClient(api_key="fake-key", scheduler=scheduler)
+    summary = {"summary": {"date": "2023-10-27T10:00:00Z", "count": 0, "summaryGroup": []}}
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(return_value=httpx.Response(200, json={"alarms": []}))
+        respx.post(f"{client.base_url}/search/entities/alarms/summary").mock(return_value=httpx.Response(200, json=summary))
+        await client.query_alarms()
+        await client.fetch_all_alarms(SearchRequest())
+
+    assert scheduler.stats[Priority.INTERACTIVE].granted == 1
+    # The export's summary and page requests ran as bulk traffic
+    assert scheduler.stats[Priority.BULK].granted == 2
@@ -0,0 +1,199 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.cache import ResponseCache, cache_key
+from opengate_alarms.client import OpenGateAlarmClient
+from opengate_alarms.og_data import OpenGateDataHelper
+from opengate_alarms.resilience import CircuitOpenError, DeadlineExceeded, Resilience, RetryPolicy, retry_after
+from opengate_alarms.snapshot import SnapshotStore
+
+ALARM = {
+    "identifier": "AL-001",
+    "entityIdentifier": "DEV-01",
+    "name": "Test Alarm",
+    "severity": "CRITICAL",
+    "status": "OPEN",
+    "openingDate": "2023-10-27T10:00:00Z"
+}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_resilience(**kwargs):
+    """Resilience that records its backoff waits instead of sleeping."""
+    waits = []
+
+    async def sleep(delay):
+        waits.append(delay)
+
+    kwargs.setdefault("policy", RetryPolicy(retries=3, base=0.1))
+    return Resilience(sleep=sleep, **kwargs), waits
+
+def faults(*responses):
+    """respx side effect returning (or raising) ``responses`` in turn, then 200s."""
+    queue = list(responses)
+
+    def handler(request):
+        fault = queue.pop(0) if queue else httpx.Response(200, json={"alarms": [ALARM]})
+        if isinstance(fault, Exception):
+            raise fault
+        return fault
+
+    return handler
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    later = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "4"})) == 4
+    assert 25 < retry_after(httpx.Response(503, headers={"Retry-After": format_datetime(later, usegmt=True)})) <= 30
+    assert retry_after(httpx.Response(500, headers={"Retry-After": "4"})) is None
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "soon"})) is None
+
+@pytest.mark.asyncio
+async def test_shed_load_is_retried_with_jittered_backoff_and_retry_after():
+    resilience, waits = make_resilience()
+    client = OpenGateAlarmClient(api_key="fake-key", resilience=resilience)
+
+    async with respx.mock:
+        route = respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=faults(
+            httpx.Response(503),
+            httpx.ConnectError("connection refused"),
+            httpx.Response(429, headers={"Retry-After": "2"}),
+        ))
+        alarms = await client.query_alarms()
+
+    assert [a.id for a in alarms] == ["AL-001"]
+    assert route.call_count == 4
+    # Full jitter stays under base * 2**attempt; the server's Retry-After is a floor
+    assert 0 <= waits[0] <= 0.1 and 0 <= waits[1] <= 0.2 and waits[2] >= 2
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_raise_the_last_error():
+    resilience, waits = make_resilience(policy=RetryPolicy(retries=2, base=0.1))
+    client = OpenGateAlarmClient(api_key="fake-key", resilience=resilience)
+
+    async with respx.mock:
+        route = respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=httpx.ConnectError("down"))
+        with pytest.raises(httpx.ConnectError):
+            await client.query_alarms()
+        respx.post(f"{client.base_url}/search/entities/alarms/summary").mock(return_value=httpx.Response(400))
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_summary()
+
+    assert route.call_count == 3
+    # Client errors are not retried
+    assert len(waits) == 2
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_the_whole_call():
+    resilience = Resilience(deadlines={"alarms": 0.05})
+    client = OpenGateAlarmClient(api_key="fake-key", resilience=resilience)
+
+    async def hang(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"alarms": []})
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=hang)
+        with pytest.raises(DeadlineExceeded):
+            await client.query_alarms()
+
+    # A Retry-After longer than the remaining budget is not waited for
+    resilience, waits = make_resilience(deadlines={"alarms": 5})
+    client = OpenGateAlarmClient(api_key="fake-key", resilience=resilience)
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(return_value=httpx.Response(429, headers={"Retry-After": "60"}))
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.query_alarms()
+    assert waits == []
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_serves_cached_data_and_recovers():
+    clock = FakeClock()
+    cache = ResponseCache(ttls={"alarms": 10}, clock=clock)
+    resilience, _ = make_resilience(policy=RetryPolicy(retries=0), failure_threshold=2, reset_timeout=30, clock=clock)
+    client = OpenGateAlarmClient(api_key="fake-key", cache=cache, resilience=resilience)
+    url = f"{client.base_url}/search/entities/alarms"
+
+    async with respx.mock:
+        route = respx.post(url).mock(side_effect=faults())
+        await client.query_alarms()
+        clock.now = 20  # the cached page has expired
+
+        route.side_effect = faults(httpx.Response(503), httpx.Response(503))
+        # Each failure is answered with the expired entry instead of an error
+        for _ in range(2):
+            assert [a.id for a in await client.query_alarms()] == ["AL-001"]
+        assert resilience.unhealthy() == ["alarms"]
+        assert route.call_count == 3
+
+        # Open: no request is made at all
+        assert [a.id for a in await client.query_alarms()] == ["AL-001"]
+        with pytest.raises(CircuitOpenError):
+            await client.query_alarms(use_cache=False)
+        assert route.call_count == 3
+
+        # After reset_timeout one trial request goes through and closes the circuit
+        clock.now = 51
+        await client.query_alarms(use_cache=False)
+        assert route.call_count == 4
+        assert resilience.unhealthy() == []
+
+@pytest.mark.asyncio
+async def test_streams_fall_back_to_snapshots_while_unavailable(tmp_path):
+    store = SnapshotStore(tmp_path / "snapshots.db")
+    resilience, _ = make_resilience(policy=RetryPolicy(retries=1))
+    client = OpenGateAlarmClient(api_key="fake-key", snapshots=store, resilience=resilience)
+    helper = OpenGateDataHelper(api_key="fake-key", snapshots=store, resilience=resilience)
+    entities_url = f"{helper.base_url}/north/v80/search/entities"
+    request = {"limit": {"size": 25, "start": 1}}
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(side_effect=faults())
+        respx.post(entities_url).mock(return_value=httpx.Response(200, json={"entities": [{"id": "DEV-01"}]}))
+        assert [a.id async for a in client.stream_alarms()] == ["AL-001"]
+        assert [e["id"] async for e in helper.iter_entities(request)] == ["DEV-01"]
+
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(return_value=httpx.Response(502))
+        respx.post(entities_url).mock(side_effect=httpx.ReadTimeout("slow"))
+        assert [a.id async for a in client.stream_alarms()] == ["AL-001"]
+        assert [e["id"] async for e in helper.iter_entities(request)] == ["DEV-01"]
+        # Forced refreshes still report the outage
+        with pytest.raises(httpx.HTTPStatusError):
+            [a async for a in client.stream_alarms(use_cache=False)]
+
+@pytest.mark.asyncio
+async def test_entity_searches_serve_the_last_known_result_while_unavailable(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(ttls={"entities": 10}, clock=clock)
+    store = SnapshotStore(tmp_path / "snapshots.db")
+    resilience, _ = make_resilience(policy=RetryPolicy(retries=1))
+    helper = OpenGateDataHelper(api_key="fake-key", cache=cache, snapshots=store, resilience=resilience)
+    url = f"{helper.base_url}/north/v80/search/entities"
+    request = {"limit": {"size": 25, "start": 1}}
+
+    async with respx.mock:
+        respx.post(url).mock(return_value=httpx.Response(200, json={"entities": [{"id": "DEV-01"}]}))
+        assert await helper.search_entities_async(request) == [{"id": "DEV-01"}]
+    clock.now = 20  # the cached result has expired
+
+    async with respx.mock:
+        route = respx.post(url).mock(return_value=httpx.Response(503))
+        assert await helper.search_entities_async(request) == [{"id": "DEV-01"}]
+        # The last known result is not stored again as a fresh one
+        assert cache.get("entities", cache_key(helper.build_entity_payload(request))) is None
+        # Pages skip the fresh cache but still fall back, except for exports
+        assert [page async for page in helper.iter_entity_pages(request, prefetch=0)] == [(1, [{"id": "DEV-01"}])]
+        with pytest.raises(httpx.HTTPStatusError):
+            [page async for page in helper.iter_entity_pages(request, prefetch=0, allow_stale=False)]
+        # One retry per search
+        assert route.call_count == 6
@@ -0,0 +1,32 @@
+import httpx
+
+from opengate_alarms.tui.scheduler import AdaptiveInterval, RefreshStats, retry_after_seconds
+
+def _http_error(status, headers=None):
+    request = httpx.Request("POST", "https://api.example.test/north/v80/search/entities/alarms")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+def test_interval_speeds_up_on_changes_and_backs_off_when_idle():
+    interval = AdaptiveInterval(initial=10, minimum=2, maximum=60, idle_factor=2)
+
+    assert interval.record(RefreshStats(changed=True)) == 5
+    assert interval.record(RefreshStats(changed=True)) == 2.5
+    assert interval.record(RefreshStats(changed=True)) == 2
+    assert interval.record(RefreshStats(changed=False)) == 4
+    for _ in range(10):
+        interval.record(RefreshStats(changed=False))
+    assert interval.interval == 60
+
+def test_interval_backs_off_on_errors_and_honors_retry_after():
+    interval = AdaptiveInterval(initial=10, maximum=60)
+
+    assert interval.record(RefreshStats(error=RuntimeError("boom"))) == 20
+    assert interval.record(RefreshStats(error=_http_error(429, {"Retry-After": "90"}))) == 90
+    interval.reset()
+    assert interval.interval == 10
+
+def test_retry_after_only_for_throttling_statuses():
+    assert retry_after_seconds(_http_error(503, {"Retry-After": "7"})) == 7
+    assert retry_after_seconds(_http_error(500, {"Retry-After": "7"})) is None
+    assert retry_after_seconds(RuntimeError("boom")) is None
@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+
+from opengate_alarms.select_paths import ColumnPlan, get_nested_value, parse_complex_select
+
+FILTERS = Path(__file__).parent.parent / "filters" / "entities"
+
+def current(value):
+    return {"_current": {"value": value}}
+
+# Every shape the generic walk distinguishes, for the path provision.device.identifier.value
+SHAPES = [
+    {"provision": {"device": {"identifier": current("D-1")}}},
+    {"provision": {"device": {"identifier": {"current": {"value": "D-2"}}}}},
+    {"provision": {"device": {"identifier": {"value": "D-3", "_current": {"value": "shadowed"}}}}},
+    {"device": {"identifier": current("D-4")}},
+    {"provision": [{"device": {"identifier": current("D-5")}}]},
+    {"provision": {"device": {"identifier": [current("D-6")]}}},
+    {"provision": {"device": {"identifier": {"_current": {"date": "x"}}}}},
+    {"provision": {"device": None}},
+    {"provision": {"device": "scalar"}},
+    {"provision": {"device": []}},
+    {"provision": ["scalar", {}]},
+    {},
+]
+
+def test_get_nested_value_resolves_every_shape():
+    path = ["provision", "device", "identifier", "value"]
+    values = [get_nested_value(entity, path) for entity in SHAPES]
+    assert values == ["D-1", "D-2", "D-3", "D-4", "D-5", "D-6"] + [None] * 6
+
+def test_column_plan_builds_the_same_rows_as_per_cell_lookups():
+    columns = parse_complex_select(json.loads((FILTERS / "device_status.json").read_text())["select"])
+    plan = ColumnPlan(columns)
+    entities = SHAPES + [
+        {
+            "provision": {"device": {"identifier": current("D-7"), "model": current({"name": "M1"})}},
+            "device": {"communicationModules": [{"subscription": {"presence": {"ipRtt": current(12)}}}]},
+        }
+    ]
+    for entity in entities * 2:
+        expected = [str(v) if (v := get_nested_value(entity, path)) is not None else "N/A" for _, path in columns]
+        assert plan.row(entity) == expected
+    assert plan.headers[0] == "ID"
+    assert plan.matches(columns)
+    assert not plan.matches(columns[1:])
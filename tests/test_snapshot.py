@@ -0,0 +1,75 @@
+import pytest
+import respx
+import httpx
+from opengate_alarms.client import OpenGateAlarmClient
+from opengate_alarms.models import SearchRequest
+from opengate_alarms.snapshot import SnapshotStore
+
+ALARM = {
+    "alarm.identifier": "AL-001",
+    "alarm.entityIdentifier": "DEV-01",
+    "alarm.name": "Test Alarm",
+    "alarm.severity": "CRITICAL",
+    "alarm.status": "OPEN",
+    "alarm.creationDate": "2023-10-27T10:00:00Z"
+}
+
+def test_store_round_trip_and_reopen(tmp_path):
+    path = tmp_path / "snapshots.db"
+    store = SnapshotStore(path)
+    store.save("alarms", {"filter": {}}, [{"id": 1}])
+    store.save("alarms", {"filter": {}}, [{"id": 2}])
+    store.close()
+
+    reopened = SnapshotStore(path)
+    snapshot = reopened.load("alarms", {"filter": {}})
+    assert snapshot.body == b'[{"id":2}]'
+    assert reopened.load("alarms", {"filter": {"eq": {}}}) is None
+    assert reopened.load("entities", {"filter": {}}) is None
+    reopened.clear("alarms")
+    assert reopened.load("alarms", {"filter": {}}) is None
+    reopened.close()
+
+def test_from_env_can_disable_the_store(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENGATE_SNAPSHOT_PATH", "off")
+    assert SnapshotStore.from_env() is None
+    monkeypatch.setenv("OPENGATE_SNAPSHOT_PATH", str(tmp_path / "s.db"))
+    store = SnapshotStore.from_env()
+    assert store.path == tmp_path / "s.db"
+    store.close()
+
+@pytest.mark.asyncio
+async def test_query_writes_through_and_a_new_client_reads_it_back(tmp_path):
+    store = SnapshotStore(tmp_path / "snapshots.db")
+    client = OpenGateAlarmClient(api_key="fake-key", snapshots=store)
+    url = f"{client.base_url}/search/entities/alarms"
+    request = SearchRequest(filter={"eq": {"alarm.severity": "CRITICAL"}})
+
+    assert client.load_alarm_snapshot(request) is None
+    async with respx.mock:
+        respx.post(url).mock(return_value=httpx.Response(200, json=[ALARM]))
+        await client.query_alarms(request)
+
+    cold = OpenGateAlarmClient(api_key="fake-key", snapshots=SnapshotStore(tmp_path / "snapshots.db"))
+    saved_at, alarms = cold.load_alarm_snapshot(request)
+    assert saved_at > 0
+    assert [(a.id, a.severity, a.creation_date.year) for a in alarms] == [("AL-001", "CRITICAL", 2023)]
+    # A different search has its own snapshot
+    assert cold.load_alarm_snapshot(SearchRequest()) is None
+
+@pytest.mark.asyncio
+async def test_clients_of_other_endpoints_do_not_read_each_others_snapshots(tmp_path):
+    path = tmp_path / "snapshots.db"
+    client = OpenGateAlarmClient(api_key="fake-key", base_url="https://one.example.test", snapshots=SnapshotStore(path))
+    async with respx.mock:
+        respx.post(f"{client.base_url}/search/entities/alarms").mock(return_value=httpx.Response(200, json=[ALARM]))
+        await client.query_alarms()
+
+    other_server = OpenGateAlarmClient(api_key="fake-key", base_url="https://two.example.test", snapshots=SnapshotStore(path))
+    other_key = OpenGateAlarmClient(api_key="other-key", base_url="https://one.example.test", snapshots=SnapshotStore(path))
+    same = OpenGateAlarmClient(api_key="fake-key", base_url="https://one.example.test/north/v80", snapshots=SnapshotStore(path))
+    assert other_server.load_alarm_snapshot() is None
+    assert other_key.load_alarm_snapshot() is None
+    assert [a.id for a in same.load_alarm_snapshot()[1]] == ["AL-001"]
+    # The API key itself is never written to the store
+    assert b"fake-key" not in path.read_bytes()
@@ -0,0 +1,74 @@
+import json
+
+import httpx
+import pytest
+import respx
+
+from opengate_alarms.client import OpenGateAlarmClient
+from opengate_alarms.streaming import JsonItemStream, iter_json_items
+
+def _feed_in_chunks(parser, raw, size):
+    items = []
+    for i in range(0, len(raw), size):
+        items.extend(parser.feed(raw[i:i + size]))
+    return items + parser.close()
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_items_under_key_with_other_keys_skipped(chunk_size):
+    entities = [{"id": i, "name": "dévice \"]}"} for i in range(20)]
+    raw = json.dumps({"page": {"number": 1, "list": [1, 2]}, "entities": entities, "total": 20}).encode()
+
+    parser = JsonItemStream(["entities", "devices"])
+    assert _feed_in_chunks(parser, raw, chunk_size) == entities
+    assert parser.key == "entities"
+
+def test_top_level_array_and_split_numbers():
+    parser = JsonItemStream()
+    assert parser.feed(b"[1, 2, 3") == [1, 2]
+    assert parser.feed(b"4]") == [34]
+    assert parser.close() == []
+
+def test_missing_key_yields_nothing():
+    parser = JsonItemStream(["alarms"])
+    assert _feed_in_chunks(parser, b'{"other": [1, 2]}', 4) == []
+    assert parser.key is None
+
+def test_truncated_document_raises():
+    parser = JsonItemStream(["alarms"])
+    parser.feed(b'{"alarms": [{"a": 1}, {"b":')
+    with pytest.raises(ValueError):
+        parser.close()
+
+@pytest.mark.asyncio
+async def test_iter_json_items_from_async_chunks():
+    async def chunks():
+        raw = json.dumps({"alarms": [{"n": i} for i in range(5)]}).encode()
+        for i in range(0, len(raw), 7):
+            yield raw[i:i + 7]
+
+    assert [item async for item in iter_json_items(chunks(), ["alarms"])] == [{"n": i} for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_stream_alarms_mock():
+    client = OpenGateAlarmClient(api_key="fake-key")
+    url = f"{client.base_url}/search/entities/alarms"
+    body = {
+        "alarms": [
+            {
+                "alarm.identifier": f"AL-{i}",
+                "alarm.entityIdentifier": "DEV-01",
+                "alarm.name": "Test Alarm",
+                "alarm.severity": "CRITICAL",
+                "alarm.status": "OPEN",
+                "alarm.creationDate": "2023-10-27T10:00:00Z",
+            }
+            for i in range(3)
+        ]
+    }
+
+    async with respx.mock:
+        respx.post(url).mock(return_value=httpx.Response(200, json=body))
+
+        alarms = [alarm async for alarm in client.stream_alarms()]
+
+    assert [a.id for a in alarms] == ["AL-0", "AL-1", "AL-2"]
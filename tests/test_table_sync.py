@@ -0,0 +1,51 @@
+import pytest
+from textual.app import App, ComposeResult
+from textual.widgets import DataTable
+
+from opengate_alarms.tui.table_sync import KeyedTableUpdate
+
+COLUMNS = ("ID", "Name", "Status")
+
+class TableApp(App):
+    def compose(self) -> ComposeResult:
+        yield DataTable()
+
+def apply(table, rows, sort_column=None):
+    update = KeyedTableUpdate(table, COLUMNS)
+    for row in rows:
+        update.upsert(row[0], row)
+    return update.finish(sort_column=sort_column)
+
+@pytest.mark.asyncio
+async def test_keyed_update_touches_only_changed_rows():
+    app = TableApp()
+    async with app.run_test():
+        table = app.query_one(DataTable)
+        first = apply(table, [("a", "A", "OPEN"), ("b", "B", "OPEN"), ("c", "C", "OPEN")])
+        assert (first.added, first.removed, first.updated_cells) == (3, 0, 0)
+
+        table.move_cursor(row=table.get_row_index("b"))
+        diff = apply(table, [("c", "C", "OPEN"), ("b", "B", "CLOSED"), ("d", "D", "OPEN")], sort_column=0)
+
+        assert (diff.added, diff.removed, diff.updated_cells) == (1, 1, 1)
+        assert [row_key.value for row_key in table.rows] == ["b", "c", "d"]
+        assert table.get_row("b") == ["b", "B", "CLOSED"]
+        # The cursor follows its row, not its index
+        assert table.coordinate_to_cell_key(table.cursor_coordinate).row_key.value == "b"
+
+        unchanged = apply(table, [("b", "B", "CLOSED"), ("c", "C", "OPEN"), ("d", "D", "OPEN")])
+        assert not unchanged.changed
+
+@pytest.mark.asyncio
+async def test_keyed_update_rebuilds_columns_when_labels_change():
+    app = TableApp()
+    async with app.run_test():
+        table = app.query_one(DataTable)
+        table.add_columns("OTHER")
+        table.add_row("x", key="x")
+
+        diff = apply(table, [("a", "A", "OPEN")])
+
+        assert [str(column.label) for column in table.columns.values()] == list(COLUMNS)
+        assert [row_key.value for row_key in table.rows] == ["a"]
+        assert diff.added == 1
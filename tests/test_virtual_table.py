@@ -0,0 +1,73 @@
+import pytest
+from textual.app import App, ComposeResult
+from textual.widgets import DataTable
+
+from opengate_alarms.tui.virtual_table import VirtualTable
+
+class TableApp(App):
+    def compose(self) -> ComposeResult:
+        yield DataTable()
+
+def fake_source(total):
+    calls = []
+
+    async def fetch_page(page, size):
+        calls.append(page)
+        start = (page - 1) * size
+        return [(f"AL-{i}", (f"AL-{i}", "OPEN")) for i in range(start, min(start + size, total))]
+
+    return fetch_page, calls
+
+def cursor_key(table):
+    return table.coordinate_to_cell_key(table.cursor_coordinate).row_key.value
+
+@pytest.mark.asyncio
+async def test_window_slides_with_the_cursor_and_reuses_cached_pages():
+    app = TableApp()
+    async with app.run_test():
+        table = app.query_one(DataTable)
+        fetch_page, calls = fake_source(1000)
+        virtual = VirtualTable(table, ("ID", "Status"), fetch_page, page_size=10, window_pages=3, cache_pages=4)
+
+        await virtual.load(total=1000)
+        assert table.row_count == 30
+        assert virtual.describe() == "rows 1-30 of 1000"
+        assert sorted(calls) == [1, 2, 3]
+
+        table.move_cursor(row=26)
+        assert await virtual.follow_cursor(26) is not None
+        assert virtual.window == (11, 40)
+        assert table.get_row_at(0)[0] == 11
+        # The cursor stays on the same alarm while the rows around it change
+        assert cursor_key(table) == "AL-26"
+
+        table.move_cursor(row=2)
+        await virtual.follow_cursor(2)
+        assert virtual.window == (1, 30)
+        # Pages 1-3 were still cached; only page 4 (and the prefetch) were fetched
+        assert calls.count(1) == 1 and calls.count(4) == 1
+        assert len(virtual.pages) <= virtual.pages.max_entries == 5
+
+        # Away from the edges nothing happens
+        table.move_cursor(row=15)
+        assert await virtual.follow_cursor(15) is None
+
+@pytest.mark.asyncio
+async def test_total_is_inferred_from_the_last_short_page():
+    app = TableApp()
+    async with app.run_test():
+        table = app.query_one(DataTable)
+        fetch_page, _ = fake_source(25)
+        virtual = VirtualTable(table, ("ID", "Status"), fetch_page, page_size=10, window_pages=2)
+
+        await virtual.load()
+        assert virtual.total is None
+        assert virtual.describe() == "rows 1-20 of 20+"
+
+        table.move_cursor(row=18)
+        await virtual.follow_cursor(18)
+        assert virtual.total == 25
+        assert virtual.window == (11, 25)
+        # The end of the result set is reached, so the window stops sliding
+        table.move_cursor(row=14)
+        assert await virtual.follow_cursor(14) is None